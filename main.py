@@ -1,6 +1,21 @@
+from mptconfig import constants
+from mptconfig.batch import ConfigBatch
+from mptconfig.bundle import ConfigBundle
+from mptconfig.check_registry import CheckChoices
+from mptconfig.check_registry import CheckInputChoices
 from mptconfig.checker import MptConfigChecker
+from mptconfig.config_diff import ConfigDiff
 from mptconfig.constants import check_constants_paths
+from mptconfig.constants import YYYYMMDD_TODAY
+from mptconfig.result_sinks import ResultSinkChoices
+from mptconfig.result_sinks import write_results
+from mptconfig.service import CheckService
+from mptconfig.watcher import CheckWatcher
+from pathlib import Path
+from typing import List
 
+import argparse
+import contextlib
 import logging
 import sys
 
@@ -30,14 +45,129 @@ def setup_logging() -> None:
     _logger.addHandler(stream_handler)
 
 
+def parse_args(args: List[str] = None) -> argparse.Namespace:
+    check_names = [check.name for check in CheckChoices]
+    parser = argparse.ArgumentParser(description="Check consistency HDSR mptconfig with FEWS")
+    parser.add_argument(
+        "--only", nargs="+", choices=check_names, metavar="CHECK", help=f"only run these checks: {check_names}"
+    )
+    parser.add_argument("--skip", nargs="+", choices=check_names, metavar="CHECK", help="do not run these checks")
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="measure peak memory per check in the performance sheet (slower)"
+    )
+    parser.add_argument(
+        "--cache-dir", type=Path, default=None, help="reuse results of checks whose input files did not change"
+    )
+    parser.add_argument(
+        "--watch", action="store_true", help="keep running and re-run only the checks whose input files changed"
+    )
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between polls in --watch mode")
+    parser.add_argument(
+        "--batch", type=Path, default=None, help="json file with configs to check in one batch (see ConfigBatch)"
+    )
+    parser.add_argument(
+        "--diff",
+        type=Path,
+        default=None,
+        metavar="OLD_CONFIG",
+        help="add a sheet with the differences to this (older) fews config and only run the affected checks",
+    )
+    parser.add_argument(
+        "--bundle", type=Path, default=None, help="pack the files (and parsed inputs) of a run into this zip file"
+    )
+    parser.add_argument(
+        "--from-bundle", type=Path, default=None, help="run on the inputs in this zip file (see --bundle)"
+    )
+    parser.add_argument(
+        "--input-store",
+        type=Path,
+        default=None,
+        help="sqlite file to store the inputs in (reused if the input files did not change), see InputStore",
+    )
+    parser.add_argument(
+        "--serve", action="store_true", help="keep the inputs in memory and answer json requests (see CheckService)"
+    )
+    parser.add_argument("--port", type=int, default=8765, help="port of the http service in --serve mode")
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="run the location checks in this nr of caw code shards (processes), see ShardedCheckRunner",
+    )
+    parser.add_argument(
+        "--histtag-chunk-size",
+        type=int,
+        default=None,
+        help="stream the histtags csv in chunks of this nr of rows (for very large csvs), see ChunkedHisttags",
+    )
+    return parser.parse_args(args=args)
+
+
 if __name__ == "__main__":
     check_python_version()
     setup_logging()
     logger = logging.getLogger(__name__)
-    check_constants_paths()
+    arguments = parse_args()
+    checks = CheckChoices.select(only=arguments.only, skip=arguments.skip)
+    if arguments.batch:
+        batch_output_dir = constants.PathConstants.output_dir.value.path / f"batch_{YYYYMMDD_TODAY}"
+        ConfigBatch.from_json(path=arguments.batch, output_dir=batch_output_dir, checks=checks).run()
+        sys.exit(0)
+    if arguments.bundle:
+        ConfigBundle.create(path=arguments.bundle, checks=checks, path_constants=constants.PathConstants)
+        sys.exit(0)
+    # a bundle gives path constants with the input paths replaced by extracted files
+    with (
+        ConfigBundle(path=arguments.from_bundle, path_constants=constants.PathConstants).opened()
+        if arguments.from_bundle
+        else contextlib.nullcontext(enter_result=constants.PathConstants)
+    ) as path_constants:
+        config_diff = None
+        if arguments.diff:
+            config_diff = ConfigDiff(
+                old_config_path=arguments.diff, new_config_path=path_constants.fews_config.value.path
+            )
+            checks = config_diff.get_affected_checks(checks=checks)
+        # only the inputs that the selected checks need must exist
+        check_inputs = CheckInputChoices.read_by(checks=checks)
+        check_constants_paths(
+            path_names=[check_input.path_constant_name for check_input in check_inputs] + ["output_dir"],
+            path_constants=path_constants,
+        )
 
-    # run checks
-    logger.info("starting mpt config checker")
-    meetpunt_config = MptConfigChecker()
-    meetpunt_config.run()
+        # run checks
+        logger.info(f"starting mpt config checker with checks {[check.name for check in checks]}")
+        if arguments.watch:
+            watcher = CheckWatcher(
+                checks=checks,
+                interval_s=arguments.interval,
+                trace_memory=arguments.trace_memory,
+                path_constants=path_constants,
+            )
+            watcher.watch()
+            sys.exit(0)
+        if arguments.serve:
+            CheckService(checks=checks, port=arguments.port, path_constants=path_constants).serve()
+            sys.exit(0)
+        meetpunt_config = MptConfigChecker(
+            trace_memory=arguments.trace_memory,
+            histtag_chunk_size=arguments.histtag_chunk_size,
+            path_constants=path_constants,
+        )
+        if config_diff:
+            meetpunt_config.results.add_sheet(excelsheet=config_diff.to_excel_sheet())
+        if config_diff and not checks:
+            logger.info("no checks are affected by the config diff")
+            write_results(
+                results=meetpunt_config.results,
+                result_sinks=[ResultSinkChoices.xlsx],
+                result_xlsx=path_constants.result_xlsx.value.path,
+            )
+        else:
+            meetpunt_config.run(
+                checks=checks,
+                result_cache_dir=arguments.cache_dir,
+                input_store_path=arguments.input_store,
+                nr_shards=arguments.shards,
+            )
     logger.info("shutting down mpt config checker")
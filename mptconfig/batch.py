@@ -0,0 +1,260 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from mptconfig import constants
+from mptconfig.check_registry import CheckChoices
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.checker import MptConfigChecker
+from mptconfig.excel import ExcelSheet
+from mptconfig.excel import ExcelSheetCollector
+from mptconfig.excel import ExcelSheetTypeChoices
+from mptconfig.excel import ExcelWriter
+from mptconfig.parse_cache import ParsedFileCache
+from mptconfig.result_sinks import ResultSinkChoices
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Set
+
+import json
+import logging
+import os
+import pandas as pd  # noqa pandas comes with geopandas
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# ignored_paths is a dict {PathConstants name: path}, e.g. {"ignored_xy": Path(...)}. An ignore csv that is not in
+# ignored_paths is read from its path in PathConstants.
+BatchConfigNamedTuple = namedtuple("BatchConfigNamedTuple", ["name", "fews_config", "histtags_csv", "ignored_paths"])
+
+
+def _run_config(paths: constants.PathTuples, checks: List[CheckChoices], result_sinks: List[ResultSinkChoices]) -> Dict:
+    """Run the checks on one config of a batch (this must be a module level function, so it can run in a process
+    pool). Returns a summary: wall time, parse cache hits and nr rows per check sheet."""
+    hits_start = ParsedFileCache.hits
+    start = time.perf_counter()
+    checker = MptConfigChecker(path_constants=constants.create_path_constants(paths=paths))
+    checker.run(checks=checks, result_sinks=result_sinks, max_workers=1)
+    return {
+        "wall_time_s": round(time.perf_counter() - start, 3),
+        "parse_cache_hits": ParsedFileCache.hits - hits_start,
+        "nr_rows": {sheet.name: sheet.nr_rows for sheet in checker.results.output_check_sheets},
+    }
+
+
+class ConfigBatch:
+    """Check several configs (e.g. 201902 and 202002) in one batch. Each config gets its own result workbook (and
+    new csvs) in <output_dir>/<config name>/, plus one combined summary workbook <output_dir>/batch_summary.xlsx.
+
+    Configs run in a process pool (max_workers processes, default 1 per cpu), so a batch takes about as long as its
+    slowest config. Files that are byte-identical across configs (e.g. the histtags csv, ignore csvs or an idmap
+    that did not change) are parsed once in this process and passed to the workers (see ParsedFileCache).
+
+    Example:
+        configs = [
+            BatchConfigNamedTuple(name="201902", fews_config=Path(...), histtags_csv=Path(...), ignored_paths={}),
+            BatchConfigNamedTuple(name="202002", fews_config=Path(...), histtags_csv=Path(...), ignored_paths={}),
+        ]
+        summary_df = ConfigBatch(configs=configs, output_dir=Path(...)).run()
+    """
+
+    summary_xlsx_name = "batch_summary.xlsx"
+
+    def __init__(
+        self,
+        configs: List[BatchConfigNamedTuple],
+        output_dir: Path,
+        checks: List[CheckChoices] = None,
+        result_sinks: List[ResultSinkChoices] = None,
+        max_workers: int = None,
+    ):
+        self.configs = configs
+        self.output_dir = output_dir
+        self.checks = checks if checks else list(CheckChoices)
+        self.result_sinks = result_sinks if result_sinks else [ResultSinkChoices.xlsx]
+        self.max_workers = max_workers if max_workers else min(len(configs), os.cpu_count() or 1)
+        self.validate_constructor()
+
+    def validate_constructor(self) -> None:
+        assert self.configs, "at least one config is required"
+        names = [config.name for config in self.configs]
+        assert len(names) == len(set(names)), f"config names {names} must be unique"
+        for config in self.configs:
+            assert isinstance(config, BatchConfigNamedTuple), f"config {config} must be a BatchConfigNamedTuple"
+            assert config.name and Path(config.name).name == config.name, f"config name {config.name} is no dir name"
+            ignored_names = [name for name in constants.PathConstants.__members__ if name.startswith("ignored_")]
+            unknown_paths = set(config.ignored_paths or {}).difference(ignored_names)
+            assert not unknown_paths, f"unknown ignored_paths {unknown_paths} in config {config.name}"
+        assert isinstance(self.output_dir, Path), f"output_dir {self.output_dir} must be a pathlib.Path"
+        assert self.max_workers >= 1, f"max_workers {self.max_workers} must be >= 1"
+
+    @classmethod
+    def from_json(cls, path: Path, **kwargs) -> "ConfigBatch":
+        """Read configs from a json file with a list of configs, e.g.:
+        [{"name": "201902", "fews_config": "D:/.../config", "histtags_csv": "D:/.../histtags.csv",
+          "ignored_paths": {"ignored_xy": "D:/.../ignored_xy.csv"}}, ...]
+        """
+        with open(path) as json_file:
+            configs = [
+                BatchConfigNamedTuple(
+                    name=config["name"],
+                    fews_config=Path(config["fews_config"]),
+                    histtags_csv=Path(config["histtags_csv"]),
+                    ignored_paths={name: Path(path) for name, path in config.get("ignored_paths", {}).items()},
+                )
+                for config in json.load(json_file)
+            ]
+        return cls(configs=configs, **kwargs)
+
+    def get_paths(self, config: BatchConfigNamedTuple) -> constants.PathTuples:
+        config_output_dir = self.output_dir / config.name
+        overrides = {
+            "result_xlsx": config_output_dir / constants.PathConstants.result_xlsx.value.path.name,
+            "output_dir": config_output_dir,
+            "fews_config": config.fews_config,
+            "histtags_csv": config.histtags_csv,
+        }
+        overrides.update(config.ignored_paths or {})
+        return {
+            path_constant.name: (
+                path_constant.value.is_file,
+                path_constant.value.should_exist,
+                overrides.get(path_constant.name, path_constant.value.path),
+                path_constant.value.description,
+            )
+            for path_constant in constants.PathConstants
+        }
+
+    def check_paths(self) -> None:
+        """Check that the input paths of all configs exist, before any config is run."""
+        path_names = [check_input.path_constant_name for check_input in CheckInputChoices.read_by(checks=self.checks)]
+        for config in self.configs:
+            for name, (is_file, _, path, _) in self.get_paths(config=config).items():
+                if name not in path_names:
+                    continue
+                assert path.is_file() if is_file else path.is_dir(), f"path {path} of config {config.name} not found"
+
+    def _get_input_paths(self, config: BatchConfigNamedTuple) -> Dict[CheckInputChoices, List[Path]]:
+        checker = MptConfigChecker(path_constants=constants.create_path_constants(paths=self.get_paths(config=config)))
+        return {
+            check_input: checker.get_input_paths(check_input=check_input)
+            for check_input in CheckInputChoices.read_by(checks=self.checks)
+        }
+
+    def _parse_shared_files(self) -> Set[str]:
+        """Parse the inputs whose files are all byte-identical in two or more configs, once, in this process.
+        Returns the hashes of those files."""
+        config_inputs = {config.name: self._get_input_paths(config=config) for config in self.configs}
+        nr_configs_per_hash = {}
+        for input_paths in config_inputs.values():
+            file_hashes = set(
+                ParsedFileCache.get_file_hash(path=path) for paths in input_paths.values() for path in paths
+            )
+            for file_hash in file_hashes:
+                nr_configs_per_hash[file_hash] = nr_configs_per_hash.get(file_hash, 0) + 1
+        shared_hashes = set(file_hash for file_hash, nr in nr_configs_per_hash.items() if nr > 1)
+        # fews_config is not parsed as a whole: checks read its files through other inputs or in the check itself
+        skip_inputs = (CheckInputChoices.fews_config, CheckInputChoices.validation_csvs_new)
+        parsed_hashes = set()
+        for config in self.configs:
+            input_paths = config_inputs[config.name]
+            path_constants = constants.create_path_constants(paths=self.get_paths(config=config))
+            checker = MptConfigChecker(path_constants=path_constants)
+            for check_input, paths in input_paths.items():
+                file_hashes = set(ParsedFileCache.get_file_hash(path=path) for path in paths)
+                if check_input in skip_inputs or not file_hashes.issubset(shared_hashes.difference(parsed_hashes)):
+                    continue
+                logger.info(f"parsing {check_input.value} of config {config.name} once for the whole batch")
+                checker.warm_input(check_input=check_input)
+                parsed_hashes.update(file_hashes)
+        return shared_hashes
+
+    def _create_summary_df(self, summaries: Dict[str, Dict]) -> pd.DataFrame:
+        data = []
+        for config in self.configs:
+            summary = summaries[config.name]
+            data.append(
+                {
+                    "name": config.name,
+                    "status": summary.get("status", "ok"),
+                    "wall_time_s": summary.get("wall_time_s"),
+                    "parse_cache_hits": summary.get("parse_cache_hits"),
+                    "result_xlsx": self.get_paths(config=config)["result_xlsx"][2].as_posix(),
+                }
+            )
+        return pd.DataFrame(data=data)
+
+    def _write_summary(self, summary_df: pd.DataFrame, summaries: Dict[str, Dict]) -> None:
+        sheet_names = [sheet_name for check in self.checks for sheet_name in check.value.sheet_names]
+        nr_rows_df = pd.DataFrame(
+            data={config.name: summaries[config.name].get("nr_rows", {}) for config in self.configs},
+            index=sheet_names,
+        )
+        nr_rows_df.index.name = "sheet"
+        results = ExcelSheetCollector()
+        results.add_sheet(
+            excelsheet=ExcelSheet(
+                name="batch summary",
+                df=summary_df,
+                description="per config: status, rekentijd, aantal bestanden uit de parse cache en result file",
+                sheet_type=ExcelSheetTypeChoices.output_no_check,
+            )
+        )
+        results.add_sheet(
+            excelsheet=ExcelSheet(
+                name="batch nr rows",
+                df=nr_rows_df.reset_index(drop=False),
+                description="aantal rijen (fouten) per check sheet (rij) per config (kolom)",
+                sheet_type=ExcelSheetTypeChoices.output_check,
+            )
+        )
+        ExcelWriter(results=results, result_xlsx=self.output_dir / self.summary_xlsx_name).write()
+
+    def run(self) -> pd.DataFrame:
+        """Run all configs and write the summary workbook. A config that fails does not stop the batch: its
+        error is in the summary. Returns the summary (one row per config)."""
+        self.check_paths()
+        start = time.perf_counter()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for config in self.configs:
+            (self.output_dir / config.name).mkdir(exist_ok=True)
+        ParsedFileCache.enable()
+        try:
+            shared_hashes = self._parse_shared_files()
+            kwargs_per_config = {
+                config.name: {
+                    "paths": self.get_paths(config=config),
+                    "checks": self.checks,
+                    "result_sinks": self.result_sinks,
+                }
+                for config in self.configs
+            }
+            summaries = {}
+            if self.max_workers == 1:
+                for name, kwargs in kwargs_per_config.items():
+                    try:
+                        summaries[name] = _run_config(**kwargs)
+                    except Exception as err:
+                        logger.exception(f"config {name} failed")
+                        summaries[name] = {"status": f"error: {err}"}
+            else:
+                entries = ParsedFileCache.export(file_hashes=shared_hashes)
+                with ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=ParsedFileCache.enable, initargs=(entries,)
+                ) as executor:
+                    futures = {
+                        name: executor.submit(_run_config, **kwargs) for name, kwargs in kwargs_per_config.items()
+                    }
+                    for name, future in futures.items():
+                        try:
+                            summaries[name] = future.result()
+                        except Exception as err:
+                            logger.exception(f"config {name} failed")
+                            summaries[name] = {"status": f"error: {err}"}
+        finally:
+            ParsedFileCache.disable()
+        summary_df = self._create_summary_df(summaries=summaries)
+        self._write_summary(summary_df=summary_df, summaries=summaries)
+        logger.info(f"checked {len(self.configs)} configs in {round(time.perf_counter() - start, 3)}s")
+        return summary_df
@@ -0,0 +1,220 @@
+from contextlib import contextmanager
+from datetime import datetime
+from enum import Enum
+from mptconfig import constants
+from mptconfig.check_registry import CheckChoices
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.check_registry import CheckScheduler
+from mptconfig.checker import MptConfigChecker
+from mptconfig.parse_cache import ParsedFileCache
+from pathlib import Path
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+from typing import Type
+
+import hashlib
+import json
+import logging
+import tempfile
+import time
+import zipfile
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigBundle:
+    """A portable snapshot of everything a run reads, in one zip file (zip has an index, so each member is read
+    directly). It holds:
+        - fews_config/..: the xml and csv files of the fews config that the checks read (same relative paths);
+        - <PathConstants name>/<file name>: the data/input csvs and the H-drive ignore list;
+        - parsed/<nr>.pickle: the parsed idmaps, location sets, histtags and ignore csvs (ParsedFileCache entries);
+        - manifest.json: sha256 and size per file and per parsed entry, and the PathConstants paths.
+
+    A run from a bundle extracts its files to a temporary dir and feeds the parsed inputs to the ParsedFileCache,
+    so nothing has to be parsed again. This makes it easy to reproduce a production run on another machine.
+    Paths are read from path_constants (default constants.PathConstants, see MptConfigChecker).
+
+    Only open bundles from a trusted source: the parsed inputs are unpickled, which can run arbitrary code. With
+    verify=True (default) each file and parsed entry must match its sha256 in the manifest, and no file is extracted
+    outside the target dir. This guards against corrupt or stale bundles, not against a forged manifest.
+
+    Example:
+        bundle = ConfigBundle.create(path=Path("mptconfig_201902.zip"))
+        with ConfigBundle(path=Path("mptconfig_201902.zip")).opened() as path_constants:
+            MptConfigChecker(path_constants=path_constants).run()
+    """
+
+    manifest_name = "manifest.json"
+    version = 1
+
+    def __init__(self, path: Path, path_constants: Type[Enum] = None):
+        self.path = path
+        self.path_constants = path_constants if path_constants else constants.PathConstants
+        self._manifest = None
+        assert isinstance(self.path, Path), f"path {self.path} must be a pathlib.Path"
+
+    @property
+    def manifest(self) -> Dict:
+        if self._manifest is not None:
+            return self._manifest
+        with zipfile.ZipFile(self.path) as zip_file:
+            self._manifest = json.loads(zip_file.read(self.manifest_name))
+        assert self._manifest["version"] == self.version, f"bundle version {self._manifest['version']} not supported"
+        return self._manifest
+
+    @staticmethod
+    def _get_arc_names(paths: List[Path], path_constants: Type[Enum]) -> Dict[Path, str]:
+        """Name in the bundle per file path: relative to the fews config dir, or to the path_constants member."""
+        fews_config_dir = path_constants.fews_config.value.path
+        path_constant_names = {
+            path_constant.value.path: path_constant.name
+            for path_constant in path_constants
+            if path_constant.value.is_file
+        }
+        arc_names = {}
+        for path in paths:
+            if path in path_constant_names:
+                arc_names[path] = f"{path_constant_names[path]}/{path.name}"
+                continue
+            try:
+                arc_names[path] = f"fews_config/{path.relative_to(fews_config_dir).as_posix()}"
+            except ValueError:
+                raise AssertionError(f"path {path} is neither in fews_config nor in PathConstants")
+        return arc_names
+
+    @staticmethod
+    def _get_parsed_entries(checker: MptConfigChecker, checks: List[CheckChoices], paths: List[Path]) -> Dict:
+        """Run checks (without writing results) with the ParsedFileCache enabled, so that it holds everything the
+        checks parse, also the fews config files that a check reads itself. Returns the entries of paths."""
+        was_enabled = ParsedFileCache.is_enabled
+        ParsedFileCache.enable()
+        try:
+            CheckScheduler(checker=checker, checks=checks, max_workers=1).run()
+            return ParsedFileCache.export(file_hashes=set(ParsedFileCache.get_file_hash(path=path) for path in paths))
+        finally:
+            if not was_enabled:
+                ParsedFileCache.disable()
+
+    @classmethod
+    def create(cls, path: Path, checks: List[CheckChoices] = None, path_constants: Type[Enum] = None) -> "ConfigBundle":
+        """Pack the files (and parsed inputs) that checks (default all) read, from path_constants (default
+        constants.PathConstants)."""
+        assert not path.exists(), f"bundle {path} already exists"
+        start = time.perf_counter()
+        path_constants = path_constants if path_constants else constants.PathConstants
+        checks = checks if checks else list(CheckChoices)
+        check_inputs = CheckInputChoices.read_by(checks=checks)
+        checker = MptConfigChecker(path_constants=path_constants)
+        paths = set(path for check_input in check_inputs for path in checker.get_input_paths(check_input=check_input))
+        # validation csvs are read when new validation csvs are created
+        validation_csvs = [
+            checker.fews_config.MapLayerFiles.get(validation_csv.value)
+            for validation_csv in constants.ValidationCsvChoices
+        ]
+        paths.update(validation_csv for validation_csv in validation_csvs if validation_csv)
+        arc_names = cls._get_arc_names(paths=sorted(paths), path_constants=path_constants)
+        entries = cls._get_parsed_entries(checker=checker, checks=checks, paths=sorted(paths))
+
+        manifest = {
+            "version": cls.version,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "checks": [check.name for check in checks],
+            "paths": {
+                name: arc_names.get(path_constants[name].value.path)
+                for name in ["histtags_csv"]
+                + [name for name in path_constants.__members__ if name.startswith("ignored_")]
+            },
+            "files": {},
+            "parsed": [],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(path, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+            for file_path, arc_name in sorted(arc_names.items(), key=lambda item: item[1]):
+                content = file_path.read_bytes()
+                zip_file.writestr(arc_name, content)
+                manifest["files"][arc_name] = {"sha256": hashlib.sha256(content).hexdigest(), "size": len(content)}
+            for nr, (key, pickled) in enumerate(sorted(entries.items())):
+                arc_name = f"parsed/{nr}.pickle"
+                zip_file.writestr(arc_name, pickled)
+                manifest["parsed"].append(
+                    {"member": arc_name, "key": list(key), "sha256": hashlib.sha256(pickled).hexdigest()}
+                )
+            zip_file.writestr(cls.manifest_name, json.dumps(manifest, indent=2))
+        logger.info(
+            f"created bundle {path} with {len(arc_names)} files and {len(entries)} parsed inputs in "
+            f"{round(time.perf_counter() - start, 3)}s"
+        )
+        return cls(path=path, path_constants=path_constants)
+
+    def _get_target_path(self, target_dir: Path, arc_name: str) -> Path:
+        """Path of arc_name in target_dir. A name that resolves outside target_dir (e.g. '../x') is rejected."""
+        target_path = (target_dir / arc_name).resolve()
+        assert (
+            target_dir.resolve() in target_path.parents
+        ), f"file {arc_name} in bundle {self.path} is outside the target dir"
+        return target_path
+
+    def _verify(self, content: bytes, sha256: str, arc_name: str):
+        assert hashlib.sha256(content).hexdigest() == sha256, f"file {arc_name} in bundle {self.path} is corrupt"
+
+    def extract(self, target_dir: Path, verify: bool = True) -> Dict[Tuple, bytes]:
+        """Extract all files to target_dir (optionally verify the sha256 of files and parsed entries). Returns the
+        parsed entries."""
+        entries = {}
+        with zipfile.ZipFile(self.path) as zip_file:
+            for arc_name, file_meta in self.manifest["files"].items():
+                file_path = self._get_target_path(target_dir=target_dir, arc_name=arc_name)
+                content = zip_file.read(arc_name)
+                if verify:
+                    self._verify(content=content, sha256=file_meta["sha256"], arc_name=arc_name)
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                file_path.write_bytes(content)
+            for parsed in self.manifest["parsed"]:
+                pickled = zip_file.read(parsed["member"])
+                if verify:
+                    self._verify(content=pickled, sha256=parsed["sha256"], arc_name=parsed["member"])
+                entries[tuple(parsed["key"])] = pickled
+        return entries
+
+    def get_paths(self, target_dir: Path) -> constants.PathTuples:
+        """path_constants (as plain tuples) with the input paths in target_dir. Output paths are not changed."""
+        overrides = {"fews_config": target_dir / "fews_config"}
+        overrides.update(
+            {
+                name: self._get_target_path(target_dir=target_dir, arc_name=arc_name)
+                for name, arc_name in self.manifest["paths"].items()
+                if arc_name is not None
+            }
+        )
+        return {
+            path_constant.name: (
+                path_constant.value.is_file,
+                path_constant.value.should_exist,
+                overrides.get(path_constant.name, path_constant.value.path),
+                path_constant.value.description,
+            )
+            for path_constant in self.path_constants
+        }
+
+    @contextmanager
+    def opened(self, target_dir: Path = None, verify: bool = True) -> Iterator[Enum]:
+        """Extract the bundle (default to a temporary dir) and enable the ParsedFileCache with the parsed inputs of
+        the bundle. Yields path constants (see constants.create_path_constants) that point to the extracted files,
+        to be passed to MptConfigChecker(path_constants=..). self.path_constants itself is not changed."""
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="mptconfig_bundle_") as tmp_dir:
+            target_dir = target_dir if target_dir else Path(tmp_dir)
+            entries = self.extract(target_dir=target_dir, verify=verify)
+            logger.info(f"opened bundle {self.path} in {round(time.perf_counter() - start, 3)}s")
+            was_enabled = ParsedFileCache.is_enabled
+            ParsedFileCache.enable(entries=entries)
+            try:
+                yield constants.create_path_constants(
+                    paths=self.get_paths(target_dir=target_dir), name="BundlePathConstants"
+                )
+            finally:
+                if not was_enabled:
+                    ParsedFileCache.disable()
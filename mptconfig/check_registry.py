@@ -0,0 +1,433 @@
+from collections import namedtuple
+from concurrent.futures import Executor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from enum import Enum
+from mptconfig.excel import ExcelSheet
+from mptconfig.instrumentation import get_rows_out
+from mptconfig.instrumentation import PerformanceRecorder
+from mptconfig.result_cache import CheckResultCache
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+import logging
+import os
+import pickle
+
+
+logger = logging.getLogger(__name__)
+
+
+class CheckInputChoices(Enum):
+    """Shared inputs of the checks. Each value is the name of a MptConfigChecker (caching) property."""
+
+    fews_config = "fews_config"
+    idmaps = "idmaps"
+    histtags = "histtags"
+    hoofdloc = "hoofdloc"
+    subloc = "subloc"
+    waterstandloc = "waterstandloc"
+    mswloc = "mswloc"
+    psloc = "psloc"
+    ignored_ex_loc = "ignored_ex_loc"
+    ignored_histtag = "ignored_histtag"
+    ignored_time_series_error = "ignored_time_series_error"
+    ignored_ts800 = "ignored_ts800"
+    ignored_xy = "ignored_xy"
+    # validation_csvs_new is not read by any check, it is only set by check_validation_rules
+    validation_csvs_new = "validation_csvs_new"
+
+    @classmethod
+    def location_sets(cls) -> List["CheckInputChoices"]:
+        return [cls.hoofdloc, cls.subloc, cls.waterstandloc, cls.mswloc, cls.psloc]
+
+    @classmethod
+    def read_by(cls, checks: List["CheckChoices"]) -> List["CheckInputChoices"]:
+        """Inputs that are read by one or more checks."""
+        inputs = set(check_input for check in checks for check_input in check.value.inputs)
+        return [check_input for check_input in cls if check_input in inputs]
+
+    @property
+    def path_constant_name(self) -> str:
+        """Name of the PathConstants member this input is read from."""
+        mapping = {self.histtags: "histtags_csv"}
+        for check_input in self.__class__:
+            if check_input.value.startswith("ignored_"):
+                mapping[check_input] = check_input.value
+        return mapping.get(self, "fews_config")
+
+
+CheckNamedTuple = namedtuple("CheckNamedTuple", ["method_name", "sheet_names", "inputs", "mutates"])
+
+
+class CheckChoices(Enum):
+    """Registry of all MptConfigChecker checks, in the order of the excel sheets.
+
+    Each check defines which inputs it reads and which inputs it mutates (shared state). Examples:
+        - check_dates_loc_sets adds columns 'pd_start' and 'pd_end' to the location sets' df;
+        - check_s_loc_consistency sets MptConfigChecker._hoofdloc_new (so hoofdloc.df changes);
+        - check_validation_rules sets MptConfigChecker._validation_csvs_new.
+    A check that mutates an input must run after all earlier checks that read it, and before all later checks
+    that read it. All other checks are independent and can run concurrently (see CheckScheduler).
+    """
+
+    idmap_int_loc_in_csv = CheckNamedTuple(
+        method_name="check_idmap_int_loc_in_csv",
+        sheet_names=("idmap int_loc in csv error",),
+        inputs=(
+            CheckInputChoices.idmaps,
+            CheckInputChoices.hoofdloc,
+            CheckInputChoices.subloc,
+            CheckInputChoices.waterstandloc,
+            CheckInputChoices.mswloc,
+        ),
+        mutates=(),
+    )
+    dates_loc_sets = CheckNamedTuple(
+        method_name="check_dates_loc_sets",
+        sheet_names=("loc_set date errors",),
+        inputs=(
+            CheckInputChoices.hoofdloc,
+            CheckInputChoices.subloc,
+            CheckInputChoices.waterstandloc,
+            CheckInputChoices.mswloc,
+            CheckInputChoices.psloc,
+        ),
+        mutates=(
+            CheckInputChoices.hoofdloc,
+            CheckInputChoices.subloc,
+            CheckInputChoices.waterstandloc,
+            CheckInputChoices.psloc,
+        ),
+    )
+    idmap_sections = CheckNamedTuple(
+        method_name="check_idmap_sections",
+        sheet_names=("idmap section error",),
+        inputs=(CheckInputChoices.fews_config,),
+        mutates=(),
+    )
+    ignored_histtags = CheckNamedTuple(
+        method_name="check_ignored_histtags",
+        sheet_names=("ignored histtags match",),
+        inputs=(CheckInputChoices.idmaps, CheckInputChoices.histtags, CheckInputChoices.ignored_histtag),
+        mutates=(),
+    )
+    histtags_nomatch = CheckNamedTuple(
+        method_name="check_histtags_nomatch",
+        sheet_names=("histtags nomatch",),
+        inputs=(CheckInputChoices.idmaps, CheckInputChoices.histtags, CheckInputChoices.ignored_histtag),
+        mutates=(),
+    )
+    double_idmaps = CheckNamedTuple(
+        method_name="check_double_idmaps",
+        sheet_names=("idmaps double",),
+        inputs=(CheckInputChoices.idmaps,),
+        mutates=(),
+    )
+    missing_pars = CheckNamedTuple(
+        method_name="check_missing_pars",
+        sheet_names=("pars missing",),
+        inputs=(CheckInputChoices.fews_config, CheckInputChoices.idmaps),
+        mutates=(),
+    )
+    s_loc_consistency = CheckNamedTuple(
+        method_name="check_s_loc_consistency",
+        sheet_names=("s_locs not consistent",),
+        inputs=(CheckInputChoices.hoofdloc, CheckInputChoices.subloc, CheckInputChoices.ignored_xy),
+        mutates=(CheckInputChoices.hoofdloc,),
+    )
+    ex_par_errors_int_loc_missing = CheckNamedTuple(
+        method_name="check_ex_par_errors_int_loc_missing",
+        sheet_names=("ex_par error", "int_loc missing"),
+        inputs=(
+            CheckInputChoices.idmaps,
+            CheckInputChoices.hoofdloc,
+            CheckInputChoices.subloc,
+            CheckInputChoices.waterstandloc,
+            CheckInputChoices.mswloc,
+        ),
+        mutates=(),
+    )
+    ex_par_missing = CheckNamedTuple(
+        method_name="check_ex_par_missing",
+        sheet_names=("ex_par missing",),
+        inputs=(CheckInputChoices.idmaps, CheckInputChoices.hoofdloc),
+        mutates=(),
+    )
+    ex_loc_int_loc_mismatch = CheckNamedTuple(
+        method_name="check_ex_loc_int_loc_mismatch",
+        sheet_names=("ex_loc int_loc mismatch",),
+        inputs=(CheckInputChoices.idmaps, CheckInputChoices.ignored_ex_loc),
+        mutates=(),
+    )
+    timeseries_logic = CheckNamedTuple(
+        method_name="check_timeseries_logic",
+        sheet_names=("time_series error",),
+        inputs=(
+            CheckInputChoices.idmaps,
+            CheckInputChoices.subloc,
+            CheckInputChoices.ignored_time_series_error,
+            CheckInputChoices.ignored_ts800,
+        ),
+        mutates=(),
+    )
+    validation_rules = CheckNamedTuple(
+        method_name="check_validation_rules",
+        sheet_names=("validation error",),
+        inputs=(
+            CheckInputChoices.fews_config,
+            CheckInputChoices.idmaps,
+            CheckInputChoices.hoofdloc,
+            CheckInputChoices.subloc,
+            CheckInputChoices.waterstandloc,
+            CheckInputChoices.mswloc,
+            CheckInputChoices.psloc,
+        ),
+        mutates=(CheckInputChoices.validation_csvs_new,),
+    )
+    int_par_ex_par_mismatch = CheckNamedTuple(
+        method_name="check_int_par_ex_par_mismatch",
+        sheet_names=("int_par ex_par mismatch",),
+        inputs=(CheckInputChoices.idmaps,),
+        mutates=(),
+    )
+    location_set_errors = CheckNamedTuple(
+        method_name="check_location_set_errors",
+        sheet_names=("loc_set error",),
+        inputs=(
+            CheckInputChoices.fews_config,
+            CheckInputChoices.hoofdloc,
+            CheckInputChoices.subloc,
+            CheckInputChoices.waterstandloc,
+            CheckInputChoices.mswloc,
+            CheckInputChoices.psloc,
+            CheckInputChoices.ignored_xy,
+        ),
+        mutates=(),
+    )
+
+    @classmethod
+    def select(cls, only: List[str] = None, skip: List[str] = None) -> List["CheckChoices"]:
+        """Select checks by name (e.g. 'double_idmaps'): only these checks (default all) minus the skipped ones."""
+        names = [check.name for check in cls]
+        unknown = set(only or []).union(skip or []).difference(names)
+        assert not unknown, f"unknown check(s) {sorted(unknown)}, choose from {names}"
+        checks = [check for check in cls if (not only or check.name in only) and check.name not in (skip or [])]
+        assert checks, f"no checks left to run (only={only}, skip={skip})"
+        return checks
+
+    @property
+    def shard_method_name(self) -> Optional[str]:
+        """MptConfigChecker method that returns the result rows of this check for MptConfigChecker.caw_shard, if this
+        check loops over locations that are independent per caw object (see ShardedCheckRunner)."""
+        mapping = {
+            self.ex_par_errors_int_loc_missing: "_get_ex_par_error_rows",
+            self.timeseries_logic: "_get_timeseries_error_rows",
+            self.validation_rules: "_get_validation_rule_error_rows",
+            self.location_set_errors: "_get_location_set_error_rows",
+        }
+        return mapping.get(self)
+
+    def depends_on(self, earlier_check: "CheckChoices") -> bool:
+        """Must this check wait for earlier_check (a check that comes before this check in the registry)?"""
+        reads_mutated_input = set(earlier_check.value.mutates) & set(self.value.inputs + self.value.mutates)
+        mutates_read_input = set(self.value.mutates) & set(earlier_check.value.inputs)
+        return bool(reads_mutated_input or mutates_read_input)
+
+
+class CheckScheduler:
+    """Run checks of a MptConfigChecker concurrently while respecting their (shared state) dependencies.
+
+    First all inputs of the checks are loaded once (warmed), so that checks only read cached inputs. Then each
+    check is submitted to a pool as soon as the checks it depends on have finished. The resulting sheets are
+    returned in registry order, so the excel sheet order does not depend on which check finished first.
+
+    Most checks are pure python loops, so threads hardly run in parallel (GIL). With use_processes=True checks that
+    do not mutate shared state run in a process pool on a pickled snapshot of the checker. Checks that do mutate
+    shared state always run in this process. With a shard_runner (see ShardedCheckRunner) checks that loop over
+    locations run per caw code shard in its process pool instead."""
+
+    def __init__(
+        self,
+        checker,
+        checks: List[CheckChoices],
+        max_workers: int = None,
+        use_processes: bool = False,
+        result_cache: CheckResultCache = None,
+        shard_runner=None,
+    ):
+        self.checker = checker
+        self.checks = [check for check in CheckChoices if check in checks]
+        # by default 1 worker per cpu (max 4)
+        self.max_workers = max_workers if max_workers else min(4, os.cpu_count() or 1)
+        self.use_processes = use_processes
+        self.result_cache = result_cache
+        self.shard_runner = shard_runner
+        self._executor = None
+        assert all(isinstance(check, CheckChoices) for check in checks), "checks must be CheckChoices"
+        assert self.max_workers >= 1, f"max_workers {self.max_workers} must be >= 1"
+
+    @property
+    def inputs(self) -> List[CheckInputChoices]:
+        return CheckInputChoices.read_by(checks=self.checks)
+
+    def get_dependencies(self) -> Dict[CheckChoices, Set[CheckChoices]]:
+        return {
+            check: set(earlier_check for earlier_check in self.checks[:index] if check.depends_on(earlier_check))
+            for index, check in enumerate(self.checks)
+        }
+
+    @staticmethod
+    def run_check(checker, check: CheckChoices, shard_runner=None) -> List[ExcelSheet]:
+        rows_in = sum(checker.get_input_nr_rows(check_input=check_input) or 0 for check_input in check.value.inputs)
+        with checker.performance.measure(name=check.name, kind="check") as record:
+            if shard_runner and check.shard_method_name:
+                sheets = shard_runner.run_check(check=check)
+            else:
+                result = getattr(checker, check.value.method_name)()
+                sheets = list(result) if isinstance(result, tuple) else [result]
+            record["rows_in"] = rows_in
+            record["rows_out"] = get_rows_out(results=sheets)
+        assert [sheet.name for sheet in sheets] == list(check.value.sheet_names), f"unexpected sheets from {check}"
+        return sheets
+
+    def _get_executor(self) -> Executor:
+        """Thread pool, or a process pool whose workers each unpickle a snapshot of the checker once (initializer)."""
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_set_checker_snapshot,
+                    initargs=(pickle.dumps(self.checker),),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _close_executor(self, wait_for_running: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait_for_running)
+            self._executor = None
+
+    def _run_in_this_process(self, check: CheckChoices) -> List[ExcelSheet]:
+        """Run a check that mutates shared state (if use_processes) or runs in shards, in this process. Afterwards
+        the snapshot of the process pool is outdated, so a new pool (with a new snapshot) is used for next checks.
+        Checks that are still running in the old pool run to completion on their own snapshot."""
+        sheets = self.run_check(checker=self.checker, check=check, shard_runner=self.shard_runner)
+        if self.use_processes:
+            self._close_executor(wait_for_running=False)
+        return sheets
+
+    def _submit_ready_checks(
+        self,
+        dependencies: Dict[CheckChoices, Set[CheckChoices]],
+        results: Dict[CheckChoices, List[ExcelSheet]],
+        running: Dict[Future, CheckChoices],
+    ) -> None:
+        """Submit (or run in this process) all checks whose dependencies have finished."""
+        for check in self.checks:
+            is_ready = dependencies[check].issubset(results.keys())
+            if check in results or check in running.values() or not is_ready:
+                continue
+            is_sharded = bool(self.shard_runner and check.shard_method_name)
+            if is_sharded and running:
+                # the shards of this check run in the process pool of the shard runner, on a snapshot that is taken
+                # when no other check is running (and mutating the checker)
+                continue
+            if is_sharded or (self.use_processes and check.value.mutates):
+                # shared state can only be mutated in this process
+                results[check] = self._run_in_this_process(check=check)
+            elif self.use_processes:
+                running[self._get_executor().submit(_run_check_on_snapshot, check)] = check
+            else:
+                running[self._get_executor().submit(self.run_check, self.checker, check)] = check
+
+    def _collect_done_checks(
+        self, results: Dict[CheckChoices, List[ExcelSheet]], running: Dict[Future, CheckChoices]
+    ) -> None:
+        """Wait for at least one running check and move the sheets of all finished checks to results."""
+        done, _ = wait(fs=running.keys(), return_when=FIRST_COMPLETED)
+        for future in done:
+            check = running.pop(future)
+            # future.result() re-raises an exception from the thread/process
+            results[check] = future.result()
+            if self.use_processes:
+                results[check], performance = results[check]
+                self.checker.performance.merge(other=performance)
+
+    def _run_concurrent(self, results: Dict[CheckChoices, List[ExcelSheet]]) -> Dict[CheckChoices, List[ExcelSheet]]:
+        """Run all checks that are not in results (e.g. cached results) yet."""
+        dependencies = self.get_dependencies()
+        results = results.copy()
+        running = {}
+        try:
+            while len(results) < len(self.checks):
+                self._submit_ready_checks(dependencies=dependencies, results=results, running=running)
+                if running:
+                    self._collect_done_checks(results=results, running=running)
+        finally:
+            self._close_executor()
+        return results
+
+    def _load_cached_results(self, fingerprints: Dict[CheckChoices, str]) -> Dict[CheckChoices, List[ExcelSheet]]:
+        cached_results = {}
+        for check, fingerprint in fingerprints.items():
+            sheets = self.result_cache.load(check=check, fingerprint=fingerprint)
+            if sheets is None:
+                continue
+            cached_results[check] = sheets
+            # a cached check gets a (nearly zero time) measurement too, so the performance sheet lists all checks
+            with self.checker.performance.measure(name=check.name, kind="check") as record:
+                record["rows_out"] = get_rows_out(results=sheets)
+                record["cache_hits"] = 1
+        return cached_results
+
+    def run(self) -> List[ExcelSheet]:
+        fingerprints = {}
+        results = {}
+        if self.result_cache:
+            fingerprints = self.result_cache.get_fingerprints(
+                checker=self.checker, dependencies=self.get_dependencies()
+            )
+            results = self._load_cached_results(fingerprints=fingerprints)
+        checks_to_run = [check for check in self.checks if check not in results]
+        # only the inputs of the checks that are not cached are loaded
+        for check_input in CheckInputChoices.read_by(checks=checks_to_run):
+            self.checker.warm_input(check_input=check_input)
+        if self.max_workers == 1:
+            for check in checks_to_run:
+                results[check] = self.run_check(checker=self.checker, check=check, shard_runner=self.shard_runner)
+        else:
+            results = self._run_concurrent(results=results)
+        if self.result_cache:
+            for check in checks_to_run:
+                self.result_cache.save(check=check, fingerprint=fingerprints[check], sheets=results[check])
+            logger.info(f"result cache: {self.result_cache.stats}")
+        return [sheet for check in self.checks for sheet in results[check]]
+
+
+# the checker snapshot of a process pool worker, see _set_checker_snapshot
+_snapshot_checker = None
+
+
+def _set_checker_snapshot(checker_snapshot: bytes) -> None:
+    """Initializer of a process pool worker: unpickle the checker snapshot once per worker (instead of once per
+    submitted check)."""
+    global _snapshot_checker
+    _snapshot_checker = pickle.loads(checker_snapshot)
+
+
+def _run_check_on_snapshot(check: CheckChoices) -> Tuple[List[ExcelSheet], PerformanceRecorder]:
+    """Run a check in a child process on the checker snapshot of that process (this must be a module level
+    function). Checks that run here do not mutate shared state, so the snapshot can be reused. Returns the sheets
+    and the performance measurements that were made for this check."""
+    checker = _snapshot_checker
+    checker.performance = PerformanceRecorder(trace_memory=checker.performance.trace_memory)
+    sheets = CheckScheduler.run_check(checker=checker, check=check)
+    return sheets, checker.performance
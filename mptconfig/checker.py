@@ -1,30 +1,49 @@
+from enum import Enum
 from mptconfig import constants
+from mptconfig.check_registry import CheckChoices
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.check_registry import CheckScheduler
 from mptconfig.checker_helpers import HelperValidationRules
 from mptconfig.checker_helpers import is_in_a_validation
 from mptconfig.checker_helpers import NewValidationCsv
 from mptconfig.checker_helpers import NewValidationCsvCreator
+from mptconfig.checker_helpers import ValidationRuleTables
 from mptconfig.constants import MAX_DIFF
 from mptconfig.excel import ExcelSheet
 from mptconfig.excel import ExcelSheetCollector
 from mptconfig.excel import ExcelSheetTypeChoices
-from mptconfig.excel import ExcelWriter
 from mptconfig.fews_utilities import FewsConfig
 from mptconfig.fews_utilities import xml_to_dict
+from mptconfig.histtag_pipeline import ChunkedHisttags
 from mptconfig.idmapping_choices import IntLocChoices
+from mptconfig.input_store import InputStore
+from mptconfig.instrumentation import get_nr_rows
+from mptconfig.instrumentation import instrumented_input
+from mptconfig.instrumentation import PerformanceRecorder
+from mptconfig.prefetch import FileByteCache
+from mptconfig.result_cache import CheckResultCache
+from mptconfig.result_sinks import ResultSinkChoices
+from mptconfig.result_sinks import write_results
+from mptconfig.sharding import filter_caw_shard
+from mptconfig.sharding import merge_shard_rows
+from mptconfig.sharding import shard_rank
+from mptconfig.sharding import ShardedCheckRunner
 from mptconfig.utils import flatten_nested_list
+from mptconfig.utils import get_df_fingerprint
 from mptconfig.utils import idmap2tags
 from mptconfig.utils import is_unmeasured_location
 from mptconfig.utils import pd_drop_columns
 from mptconfig.utils import pd_read_csv_expect_columns
 from mptconfig.utils import update_h_locs_start_end
 from mptconfig.utils import update_histtag
+from mptconfig.vocabulary import IdVocabulary
 from pathlib import Path
-from shapely.geometry import Point  # noqa shapely comes with geopandas
 from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
+from typing import Type
 
-import geopandas as gpd
 import logging
 import numpy as np  # noqa numpy comes with geopandas
 import pandas as pd  # noqa pandas comes with geopandas
@@ -41,10 +60,24 @@ class MptConfigChecker:
     The main property of the class is 'self.results' which is:
         - a dictionary of panda dataframes: each dataframe is one excel sheet.
         - updated throughout the whole class with check results
+    Each check and each cached input is measured (time, rows, cache hits) in 'self.performance'. Peak memory is
+    only measured if trace_memory=True, as tracemalloc makes python considerably slower.
+    With a histtag_chunk_size the histtags csv is never loaded as a whole, but streamed in chunks of that nr of rows
+    (see ChunkedHisttags), for histtags csvs that do not fit in memory.
+    All paths are read from path_constants (default constants.PathConstants), an Enum with the same members as
+    PathConstants (see constants.create_path_constants), so that checkers of several configs can run side by side.
     """
 
-    def __init__(self):
+    def __init__(self, trace_memory: bool = False, histtag_chunk_size: int = None, path_constants: Type[Enum] = None):
+        self.path_constants = path_constants if path_constants else constants.PathConstants
         self.results = ExcelSheetCollector()
+        self.histtag_chunk_size = histtag_chunk_size
+        self.performance = PerformanceRecorder(trace_memory=trace_memory)
+        self.vocabulary = IdVocabulary()
+        self.result_cache = None
+        self.input_store = None
+        # only set in a shard (see ShardedCheckRunner): loop only over the locations of this caw code range
+        self.caw_shard = None
         self._location_sets = None
         self._histtags = None
         self._hoofdloc = None
@@ -55,7 +88,11 @@ class MptConfigChecker:
         self._psloc = None
         self._mpt_histtags = None
         self._mpt_histtags_new = None
+        self._chunked_histtags = None
+        self._input_fingerprints = {}
         self._validation_csvs_new = None
+        self._idmaps = None
+        self._idmap_dfs = None
         self._fews_config = None
         self._ignored_ex_loc = None
         self._ignored_histtag = None
@@ -63,75 +100,116 @@ class MptConfigChecker:
         self._ignored_ts800 = None
         self._ignored_xy = None
 
+    def __getstate__(self) -> Dict:
+        # an Enum that is created at runtime can not be pickled (the checker is pickled for a process pool)
+        state = self.__dict__.copy()
+        state["path_constants"] = constants.get_path_tuples(path_constants=self.path_constants)
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self.path_constants = constants.create_path_constants(paths=state["path_constants"])
+
     @property
+    @instrumented_input(cache_attribute="_fews_config")
     def fews_config(self):
         # why inside caching property? Since it is important to not load fews_config during
         # instantiating MptConfigChecker, as almost all tests use a patched PathConstants
         if self._fews_config is not None:
             return self._fews_config
-        self._fews_config = FewsConfig(path=constants.PathConstants.fews_config.value.path)
+        self._fews_config = FewsConfig(path=self.path_constants.fews_config.value.path)
         return self._fews_config
 
     @property
+    @instrumented_input(cache_attribute="_histtags")
     def histtags(self) -> pd.DataFrame:
         if self._histtags is not None:
             return self._histtags
-        logger.info(f"reading histags: {constants.PathConstants.histtags_csv.value.path}")
+        logger.info(f"reading histags: {self.path_constants.histtags_csv.value.path}")
         dtype_columns = ["total_min_start_dt", "total_max_end_dt"]
         self._histtags = pd_read_csv_expect_columns(
-            path=constants.PathConstants.histtags_csv.value.path,
+            path=self.path_constants.histtags_csv.value.path,
             expected_columns=["serie", "total_min_start_dt", "total_max_end_dt"],
             parse_dates=dtype_columns,
         )
         for dtype_column in dtype_columns:
             if not pd.api.types.is_datetime64_dtype(self.histtags[dtype_column]):
                 raise AssertionError(
-                    f"dtype_column {dtype_column} in {constants.PathConstants.histtags_csv.value.path} "
+                    f"dtype_column {dtype_column} in {self.path_constants.histtags_csv.value.path} "
                     f"can not be converted to np.datetime64. Check if values are dates."
                 )
         return self._histtags
 
     @property
+    @instrumented_input(cache_attribute="_chunked_histtags")
+    def chunked_histtags(self) -> ChunkedHisttags:
+        """Histtags streamed through the idmaps (see ChunkedHisttags). Used instead of histtags and mpt_histtags if
+        histtag_chunk_size is set. The histtags without idmap are written next to the result xlsx."""
+        if self._chunked_histtags is not None:
+            return self._chunked_histtags
+        assert self.histtag_chunk_size, "chunked_histtags requires a histtag_chunk_size"
+        idmap_df = pd.concat(
+            [
+                pd.DataFrame(data=self._get_idmaps(idmap_files=[idmap_file])).assign(idmap_file=idmap_file)
+                for idmap_file in constants.IDMAP_FILES
+            ],
+            ignore_index=True,
+        )
+        result_xlsx = self.path_constants.result_xlsx.value.path
+        self._chunked_histtags = ChunkedHisttags(
+            idmap_df=idmap_df,
+            unmatched_path=result_xlsx.parent / f"{result_xlsx.stem}_histtags_nomatch.csv",
+            chunk_size=self.histtag_chunk_size,
+        ).run(path=self.path_constants.histtags_csv.value.path)
+        return self._chunked_histtags
+
+    @property
+    @instrumented_input(cache_attribute="_hoofdloc")
     def hoofdloc(self) -> constants.HoofdLocationSet:
-        """Get HoofdLocationSet. The property .geo_df has eventually been updated."""
+        """Get HoofdLocationSet. The property .df has eventually been updated."""
         if self._hoofdloc_new is not None:
             assert self._hoofdloc and isinstance(self._hoofdloc, constants.HoofdLocationSet)
             assert isinstance(self._hoofdloc_new, pd.DataFrame)
-            self._hoofdloc._geo_df = self._hoofdloc_new
+            self._hoofdloc._df = self._hoofdloc_new
         if self._hoofdloc is not None:
             return self._hoofdloc
-        self._hoofdloc = constants.HoofdLocationSet(fews_config=self.fews_config)
+        self._hoofdloc = constants.HoofdLocationSet(fews_config=self.fews_config, vocabulary=self.vocabulary)
         return self._hoofdloc
 
     @property
+    @instrumented_input(cache_attribute="_subloc")
     def subloc(self) -> constants.SubLocationSet:
         if self._subloc is not None:
             return self._subloc
-        self._subloc = constants.SubLocationSet(fews_config=self.fews_config)
+        self._subloc = constants.SubLocationSet(fews_config=self.fews_config, vocabulary=self.vocabulary)
         return self._subloc
 
     @property
+    @instrumented_input(cache_attribute="_waterstandloc")
     def waterstandloc(self) -> constants.WaterstandLocationSet:
         if self._waterstandloc is not None:
             return self._waterstandloc
-        self._waterstandloc = constants.WaterstandLocationSet(fews_config=self.fews_config)
+        self._waterstandloc = constants.WaterstandLocationSet(fews_config=self.fews_config, vocabulary=self.vocabulary)
         return self._waterstandloc
 
     @property
+    @instrumented_input(cache_attribute="_mswloc")
     def mswloc(self) -> constants.MswLocationSet:
         if self._mswloc is not None:
             return self._mswloc
-        self._mswloc = constants.MswLocationSet(fews_config=self.fews_config)
+        self._mswloc = constants.MswLocationSet(fews_config=self.fews_config, vocabulary=self.vocabulary)
         return self._mswloc
 
     @property
+    @instrumented_input(cache_attribute="_psloc")
     def psloc(self) -> constants.PeilschaalLocationSet:
         if self._psloc is not None:
             return self._psloc
-        self._psloc = constants.PeilschaalLocationSet(fews_config=self.fews_config)
+        self._psloc = constants.PeilschaalLocationSet(fews_config=self.fews_config, vocabulary=self.vocabulary)
         return self._psloc
 
     @property
+    @instrumented_input(cache_attribute="_mpt_histtags")
     def mpt_histtags(self) -> pd.DataFrame:
         if self._mpt_histtags is not None:
             return self._mpt_histtags
@@ -145,6 +223,7 @@ class MptConfigChecker:
         return self._mpt_histtags
 
     @property
+    @instrumented_input(cache_attribute="_mpt_histtags_new")
     def mpt_histtags_new(self) -> pd.DataFrame:
         """Convert histTag-ids to mpt-ids. Alle meetpunt ids uitgelezen uit de histTags.csv, die niet
         in de ignore staan en in de idmapping zijn opgenomen.
@@ -159,13 +238,16 @@ class MptConfigChecker:
         if self._mpt_histtags_new is not None:
             return self._mpt_histtags_new
         logger.debug("creating mpt_histtags_new")
-        mpt_df = pd.concat(
-            [
-                self.mpt_histtags.groupby(["fews_locid"], sort=False)["total_min_start_dt"].min(),
-                self.mpt_histtags.groupby(["fews_locid"], sort=False)["total_max_end_dt"].max(),
-            ],
-            axis=1,
-        )
+        if self.histtag_chunk_size:
+            mpt_df = self.chunked_histtags.aggregates[["total_min_start_dt", "total_max_end_dt"]].copy()
+        else:
+            mpt_df = pd.concat(
+                [
+                    self.mpt_histtags.groupby(["fews_locid"], sort=False)["total_min_start_dt"].min(),
+                    self.mpt_histtags.groupby(["fews_locid"], sort=False)["total_max_end_dt"].max(),
+                ],
+                axis=1,
+            )
         assert sorted(mpt_df.columns) == ["total_max_end_dt", "total_min_start_dt"], "unexpected columns in mpt_df"
         assert mpt_df.index.name == "fews_locid"  # groupby() makes it the index column
         mpt_df.reset_index(drop=False, inplace=True)
@@ -209,35 +291,38 @@ class MptConfigChecker:
         return self._validation_csvs_new if self._validation_csvs_new else []
 
     @property
+    @instrumented_input(cache_attribute="_ignored_ex_loc")
     def ignored_ex_loc(self) -> pd.DataFrame:
         if self._ignored_ex_loc is not None:
             return self._ignored_ex_loc
-        logger.info(f"reading {constants.PathConstants.ignored_ex_loc.value.path}")
+        logger.info(f"reading {self.path_constants.ignored_ex_loc.value.path}")
         self._ignored_ex_loc = pd_read_csv_expect_columns(
-            path=constants.PathConstants.ignored_ex_loc.value.path,
+            path=self.path_constants.ignored_ex_loc.value.path,
             expected_columns=["externalLocation", "internalLocation"],
         )
         return self._ignored_ex_loc
 
     @property
+    @instrumented_input(cache_attribute="_ignored_histtag")
     def ignored_histtag(self) -> pd.DataFrame:
         if self._ignored_histtag is not None:
             return self._ignored_histtag
-        logger.info(f"reading {constants.PathConstants.ignored_histtag.value.path}")
+        logger.info(f"reading {self.path_constants.ignored_histtag.value.path}")
         self._ignored_histtag = pd_read_csv_expect_columns(
-            path=constants.PathConstants.ignored_histtag.value.path,
+            path=self.path_constants.ignored_histtag.value.path,
             expected_columns=["ENDDATE", "STARTDATE", "UNKNOWN_SERIE"],
         )
         self._ignored_histtag["UNKNOWN_SERIE"] = self._ignored_histtag["UNKNOWN_SERIE"].str.replace("#", "")
         return self._ignored_histtag
 
     @property
+    @instrumented_input(cache_attribute="_ignored_time_series_error")
     def ignored_time_series_error(self) -> pd.DataFrame:
         if self._ignored_time_series_error is not None:
             return self._ignored_time_series_error
-        logger.info(f"reading {constants.PathConstants.ignored_time_series_error.value.path}")
+        logger.info(f"reading {self.path_constants.ignored_time_series_error.value.path}")
         self._ignored_time_series_error = pd_read_csv_expect_columns(
-            path=constants.PathConstants.ignored_time_series_error.value.path,
+            path=self.path_constants.ignored_time_series_error.value.path,
             expected_columns=[
                 "fout",
                 "internalLocation",
@@ -248,28 +333,30 @@ class MptConfigChecker:
         return self._ignored_time_series_error
 
     @property
+    @instrumented_input(cache_attribute="_ignored_ts800")
     def ignored_ts800(self) -> pd.DataFrame:
         if self._ignored_ts800 is not None:
             return self._ignored_ts800
-        logger.info(f"reading {constants.PathConstants.ignored_ts800.value.path}")
+        logger.info(f"reading {self.path_constants.ignored_ts800.value.path}")
         self._ignored_ts800 = pd_read_csv_expect_columns(
-            path=constants.PathConstants.ignored_ts800.value.path,
+            path=self.path_constants.ignored_ts800.value.path,
             expected_columns=["externalLocation", "internalLocation"],
         )
         return self._ignored_ts800
 
     @property
+    @instrumented_input(cache_attribute="_ignored_xy")
     def ignored_xy(self) -> pd.DataFrame:
         if self._ignored_xy is not None:
             return self._ignored_xy
-        logger.info(f"reading {constants.PathConstants.ignored_xy.value.path}")
+        logger.info(f"reading {self.path_constants.ignored_xy.value.path}")
         self._ignored_xy = pd_read_csv_expect_columns(
-            path=constants.PathConstants.ignored_xy.value.path, expected_columns=["internalLocation", "x", "y"]
+            path=self.path_constants.ignored_xy.value.path, expected_columns=["internalLocation", "x", "y"]
         )
         return self._ignored_xy
 
     def _update_enddate_new_csv(self, df: pd.DataFrame, file_name: str) -> pd.DataFrame:
-        """Eventually update ENDDATE in new csv when it exceeds date_threshold """
+        """Eventually update ENDDATE in new csv when it exceeds date_threshold"""
         # TODO: waarom ook alweer in 1 korte zin
         date_threshold = self.mpt_histtags_new["pd_end"].max() - MAX_DIFF
         assert isinstance(date_threshold, pd.Timestamp), f"date_threshold {date_threshold} should be a pd.Timestamp"
@@ -298,9 +385,8 @@ class MptConfigChecker:
         )
         return df
 
-    @staticmethod
-    def _df_to_csv(df: pd.DataFrame, file_name: str) -> None:
-        csv_file_path = constants.PathConstants.output_dir.value.path / file_name
+    def _df_to_csv(self, df: pd.DataFrame, file_name: str) -> None:
+        csv_file_path = self.path_constants.output_dir.value.path / file_name
         if csv_file_path.suffix == "":
             csv_file_path = Path(f"{csv_file_path}.csv")
         if csv_file_path.is_file():
@@ -309,73 +395,74 @@ class MptConfigChecker:
         logger.info(f"created new csv {file_name}")
 
     @staticmethod
-    def _validate_geom(gdf: gpd.GeoDataFrame) -> pd.DataFrame:
+    def _validate_geom(df: pd.DataFrame) -> pd.DataFrame:
         """
-        Turn a GeoDataFrame into DataFrame and:
-            1. Validate geom columns names and dtypes
-            2. Ensure column 'geometry' == Point('X','Y','Z')
-            3. Ensure no decimal in column X, Y
+        Validate the coordinates of a location set df (see LocationSet.df) and return a copy that:
+            1. has validated geom columns names and dtypes
+            2. has numeric columns X, Y (and Z), where Z is Z_NODATA_VALUE or between -50 and 50
+            3. has no decimal in column X, Y (go from 137319.0 to 137319)
         """
-        assert isinstance(gdf, gpd.GeoDataFrame)
+        assert isinstance(df, pd.DataFrame)
         # check column names
-        assert "geometry" in gdf.columns
-        assert ("X" and "Y") in gdf.columns
+        assert ("X" and "Y") in df.columns
 
         # check dtypes
-        assert gdf["X"].dtype in (np.float64, "float64", "O")
-        assert gdf["Y"].dtype in (np.float64, "float64", "O")
-        has_column_z = "Z" in gdf.columns
+        assert df["X"].dtype in (np.float64, "float64", "O")
+        assert df["Y"].dtype in (np.float64, "float64", "O")
+        has_column_z = "Z" in df.columns
         if has_column_z:
-            assert gdf["Z"].dtype == "O"
-
-        # ensure geom == column(X,Y,Z)
-        for idx, row in gdf.iterrows():
-            assert row["geometry"].x == float(gdf["X"][idx])
-            assert row["geometry"].y == float(gdf["Y"][idx])
-            # if the original csv had no Z column or the Z value was missing we set it to -9999 in geometry
-            assert row["geometry"].z == FewsConfig.Z_NODATA_VALUE or -50 < row["geometry"].z < 50
-            if not has_column_z:
-                continue
-            assert row["geometry"].z == float(gdf["Z"][idx])
+            assert df["Z"].dtype == "O"
+
+        # ensure numeric coordinates (vectorized, so without creating a shapely geometry per row)
+        xyz_df = FewsConfig.get_xyz(df=df, x_attrib="X", y_attrib="Y", z_attrib="Z" if has_column_z else None)
+        # if the original csv had no Z column or the Z value was missing we set it to -9999
+        is_valid_z = (xyz_df["Z"] == FewsConfig.Z_NODATA_VALUE) | ((xyz_df["Z"] > -50) & (xyz_df["Z"] < 50))
+        assert is_valid_z.all(), f"invalid Z for LOC_ID(s) {list(df[~is_valid_z]['LOC_ID'])}"
 
         # ensure no decimal in column X, Y (go from 137319.0 to 137319)
-        gdf["X"] = gdf["X"].astype(np.int32)
-        gdf["Y"] = gdf["Y"].astype(np.int32)
-        df = gdf.drop("geometry", axis=1)
+        df = df.copy()
+        df["X"] = df["X"].astype(np.int32)
+        df["Y"] = df["Y"].astype(np.int32)
         return df
 
     def _write_new_opvlwater_hoofdloc_csv(self) -> None:
-        """Write HoofdLocationSet.geo_df to csv. This .geo_df was eventually
+        """Write HoofdLocationSet.df to csv. This .df was eventually
         updated during check_s_loc_consistency() in _create_hoofdloc_new()."""
         if self._hoofdloc_new is None:
             logger.warning(f"skip creating {self.hoofdloc.name}.csv as hoofdloc was not updated")
             return
         logger.info(f"creating new csv {self.hoofdloc.name}")
-        df = self._validate_geom(gdf=self.hoofdloc.geo_df)
+        df = self._validate_geom(df=self.hoofdloc.df)
         df = self._update_enddate_new_csv(df=df, file_name=self.hoofdloc.name)
         self._df_to_csv(df=df, file_name=self.hoofdloc.name)
 
     def _write_new_opvlwater_subloc_csv(self) -> None:
-        """ Write SubLocationSet.geo_df to csv."""
+        """Write SubLocationSet.df to csv."""
         logger.info(f"creating new csv {self.subloc.name}")
-        df = self._validate_geom(gdf=self.subloc.geo_df)
+        df = self._validate_geom(df=self.subloc.df)
         df = self._update_enddate_new_csv(df=df, file_name=self.subloc.name)
-        grouper = df.groupby(["PAR_ID"])
-        par_types_df = grouper["TYPE"].unique().apply(func=lambda x: sorted(x)).transform(lambda x: "/".join(x))
         df["PAR_ID"] = df["LOC_ID"].str[0:-1] + "0"
-        df["ALLE_TYPES"] = df["PAR_ID"].apply(func=lambda x: par_types_df.loc[x])
-        df[["HBOVPS", "HBENPS"]] = df.apply(func=self._update_staff_gauge, axis=1, result_type="expand")
+        df["ALLE_TYPES"] = df.groupby("PAR_ID", observed=True)["TYPE"].transform(
+            func=lambda x: "/".join(sorted(x.unique()))
+        )
+        # assign upstream and downstream staff gauges to subloc
+        staff_gauges = self._get_staff_gauges()
+        df["HBOVPS"] = self._map_staff_gauges(loc_ids=df["HBOV"], staff_gauges=staff_gauges)
+        df["HBENPS"] = self._map_staff_gauges(loc_ids=df["HBEN"], staff_gauges=staff_gauges)
         # get existing fews config file name
         self._df_to_csv(df=df, file_name=self.subloc.name)
 
     def _write_new_waterstandlocaties_csv(self) -> None:
-        """ Write WaterstandLocationSet.geo_df to csv."""
+        """Write WaterstandLocationSet.df to csv."""
         logger.info(f"creating new csv {self.waterstandloc.name}")
-        df = self._validate_geom(gdf=self.waterstandloc.geo_df)
+        df = self._validate_geom(df=self.waterstandloc.df)
         df = self._update_enddate_new_csv(df=df, file_name=self.waterstandloc.name)
-        grouper = self.mpt_histtags.groupby(["fews_locid"])
         # leave it HIST_TAG (instead of HISTTAG), as that is what OPVLWATER_WATERSTANDEN_AUTO.csv expects
-        df["HIST_TAG"] = df.apply(func=update_histtag, args=[grouper], axis=1, result_type="expand")
+        if self.histtag_chunk_size:
+            df["HIST_TAG"] = df["LOC_ID"].astype(str).map(self.chunked_histtags.aggregates["latest_serie"]).fillna("")
+        else:
+            grouper = self.mpt_histtags.groupby(["fews_locid"])
+            df["HIST_TAG"] = df.apply(func=update_histtag, args=[grouper], axis=1, result_type="expand")
         self._df_to_csv(df=df, file_name=self.waterstandloc.name)
 
     def _write_new_validation_csvs(self) -> None:
@@ -398,32 +485,227 @@ class MptConfigChecker:
         """
         if not idmap_files:
             idmap_files = constants.IDMAP_FILES
-        idmaps = [xml_to_dict(xml_filepath=self.fews_config.IdMapFiles[idmap])["idMap"]["map"] for idmap in idmap_files]
+        # parse each idmap file only once
+        if self._idmaps is None:
+            self._idmaps = {}
+        missing_idmap_files = [idmap for idmap in idmap_files if idmap not in self._idmaps]
+        self.performance.count_cache(name="idmaps", is_hit=not missing_idmap_files)
+        if missing_idmap_files:
+            with self.performance.measure(name="idmaps", kind="input") as record:
+                for idmap in missing_idmap_files:
+                    xml_dict = xml_to_dict(xml_filepath=self.fews_config.IdMapFiles[idmap])
+                    self._idmaps[idmap] = xml_dict["idMap"]["map"]
+                    self.vocabulary.update(df=pd.DataFrame(data=self._idmaps[idmap]))
+                record["rows_out"] = sum(len(self._idmaps[idmap]) for idmap in missing_idmap_files)
+        idmaps = [self._idmaps[idmap] for idmap in idmap_files]
         return [item for sublist in idmaps for item in sublist]
 
-    def _create_hoofdloc_new(self, par_dict: Dict) -> None:
+    def _get_idmap_df(self, idmap_files: List[str] = None) -> pd.DataFrame:
+        """Get id mapping (see _get_idmaps) as a pd.DataFrame with the four idmap columns as shared categoricals
+        (see IdVocabulary), so that e.g. isin() on a location set LOC_ID compares integer codes. The pd.DataFrame
+        is cached per idmap_files, a copy is returned as checks add columns to it."""
+        if not idmap_files:
+            idmap_files = constants.IDMAP_FILES
+        if self._idmap_dfs is None:
+            self._idmap_dfs = {}
+        key = tuple(idmap_files)
+        if key not in self._idmap_dfs:
+            self._idmap_dfs[key] = pd.DataFrame(data=self._get_idmaps(idmap_files=idmap_files))
+        # recode in case the vocabulary has grown since (this is a no-op otherwise)
+        self._idmap_dfs[key] = self.vocabulary.categorize(df=self._idmap_dfs[key])
+        return self._idmap_dfs[key].copy()
+
+    def warm_input(self, check_input: CheckInputChoices) -> None:
+        """Load (and cache) a check input, so that checks that run concurrently only read cached inputs."""
+        assert isinstance(check_input, CheckInputChoices), f"check_input {check_input} must be a CheckInputChoices"
+        if check_input == CheckInputChoices.idmaps:
+            self._get_idmaps()
+        elif check_input == CheckInputChoices.histtags and self.histtag_chunk_size:
+            self.chunked_histtags
+        else:
+            loaded_input = getattr(self, check_input.value)
+            if check_input in CheckInputChoices.location_sets():
+                # location sets have caching properties too
+                for loc_set_property in ("df", "attrib_files"):
+                    getattr(loaded_input, loc_set_property)
+        self._share_vocabulary()
+
+    def reset_input(self, check_input: CheckInputChoices) -> None:
+        """Forget a cached check input (and what is derived from it), so that it is read again on next access.
+        E.g. after its file has been edited (see CheckWatcher), or to undo mutations of earlier checks."""
+        assert isinstance(check_input, CheckInputChoices), f"check_input {check_input} must be a CheckInputChoices"
+        self._input_fingerprints.pop(check_input, None)
+        if check_input == CheckInputChoices.idmaps:
+            self._idmaps = None
+            self._idmap_dfs = None
+        else:
+            setattr(self, f"_{check_input.value}", None)
+        if check_input == CheckInputChoices.hoofdloc:
+            self._hoofdloc_new = None
+        if check_input in (CheckInputChoices.idmaps, CheckInputChoices.histtags):
+            self._mpt_histtags = None
+            self._mpt_histtags_new = None
+            self._chunked_histtags = None
+
+    def _share_vocabulary(self) -> None:
+        """Recode the already loaded location sets to the (grown) vocabulary. After warming all inputs, location
+        sets and idmaps have the same categorical dtypes, so joins between them work on integer codes."""
+        for loc_set in (self._hoofdloc, self._subloc, self._waterstandloc, self._mswloc, self._psloc):
+            if loc_set is not None and loc_set._df is not None:
+                loc_set._df = self.vocabulary.categorize(df=loc_set._df)
+
+    def get_input_paths(self, check_input: CheckInputChoices) -> List[Path]:
+        """Files a check input is read from, without loading the input. Used to fingerprint check results (see
+        CheckResultCache). Checks that read fews_config directly read xml and csv files from RegionConfigFiles,
+        IdMapFiles and MapLayerFiles."""
+        if check_input == CheckInputChoices.validation_csvs_new:
+            return []
+        if check_input == CheckInputChoices.fews_config:
+            directories = (
+                self.fews_config.RegionConfigFiles,
+                self.fews_config.IdMapFiles,
+                self.fews_config.MapLayerFiles,
+            )
+            paths = [path for files in directories for path in files.values() if path.suffix in (".xml", ".csv")]
+            return sorted(paths)
+        if check_input == CheckInputChoices.idmaps:
+            return [self.fews_config.IdMapFiles[idmap] for idmap in constants.IDMAP_FILES]
+        if check_input in CheckInputChoices.location_sets():
+            loc_set_classes = {
+                CheckInputChoices.hoofdloc: constants.HoofdLocationSet,
+                CheckInputChoices.subloc: constants.SubLocationSet,
+                CheckInputChoices.waterstandloc: constants.WaterstandLocationSet,
+                CheckInputChoices.mswloc: constants.MswLocationSet,
+                CheckInputChoices.psloc: constants.PeilschaalLocationSet,
+            }
+            # a new LocationSet only reads its df when needed
+            loc_set = loc_set_classes[check_input](fews_config=self.fews_config)
+            return loc_set.get_file_paths()
+        return [self.path_constants[check_input.path_constant_name].value.path]
+
+    def prefetch_inputs(self, check_inputs: List[CheckInputChoices]) -> None:
+        """Read the files of check_inputs concurrently into FileByteCache before any of them is parsed, so that a
+        cold start on a network share pays the round-trip latency once instead of per file. First the files that are
+        known up front (PathConstants, IDMAP_FILES, LocationSets.xml and, if fews_config is an input, all its xml and
+        csv files), then the csvs of the location sets and the validation csvs, which are listed in LocationSets.xml.
+        """
+        loc_set_inputs = [
+            check_input for check_input in check_inputs if check_input in CheckInputChoices.location_sets()
+        ]
+        if self.histtag_chunk_size:
+            # a streamed histtags csv must not be read into memory as a whole
+            check_inputs = [check_input for check_input in check_inputs if check_input != CheckInputChoices.histtags]
+        with self.performance.measure(name="prefetch", kind="prefetch") as record:
+            paths = [
+                path
+                for check_input in check_inputs
+                if check_input not in loc_set_inputs
+                for path in self.get_input_paths(check_input=check_input)
+            ]
+            if loc_set_inputs:
+                paths.append(self.fews_config.RegionConfigFiles["LocationSets"])
+            nr_files = FileByteCache.prefetch(paths=paths)["nr_files"]
+            if loc_set_inputs:
+                paths = [
+                    path for check_input in loc_set_inputs for path in self.get_input_paths(check_input=check_input)
+                ]
+                validation_csvs = [
+                    self.fews_config.MapLayerFiles.get(validation_csv.value)
+                    for validation_csv in constants.ValidationCsvChoices
+                ]
+                paths += [path for path in validation_csvs if path]
+                nr_files += FileByteCache.prefetch(paths=paths)["nr_files"]
+            record["rows_out"] = nr_files
+
+    def get_input_fingerprint(self, check_input: CheckInputChoices) -> Optional[int]:
+        """Fingerprint (see get_df_fingerprint) of a check input as a table, cached until reset_input. Compare it
+        with the fingerprint of e.g. a reloaded input in O(1). None for inputs that are no table (fews_config,
+        validation_csvs_new) and for streamed histtags (see ChunkedHisttags). Location sets can be mutated by
+        checks, so take their fingerprint before the checks run."""
+        if check_input in self._input_fingerprints:
+            return self._input_fingerprints[check_input]
+        if check_input in (CheckInputChoices.fews_config, CheckInputChoices.validation_csvs_new):
+            return None
+        if check_input == CheckInputChoices.histtags and self.histtag_chunk_size:
+            return None
+        if check_input == CheckInputChoices.idmaps:
+            df = self._get_idmap_df()
+        elif check_input in CheckInputChoices.location_sets():
+            df = getattr(self, check_input.value).df
+        else:
+            df = getattr(self, check_input.value)
+        with self.performance.measure(name=f"{check_input.value} fingerprint", kind="fingerprint") as record:
+            self._input_fingerprints[check_input] = get_df_fingerprint(df=df, ordered=True)
+            record["rows_in"] = len(df)
+        return self._input_fingerprints[check_input]
+
+    def get_input_nr_rows(self, check_input: CheckInputChoices) -> Optional[int]:
+        """Get nr rows of an already loaded check input, without loading it (and without counting a cache hit)."""
+        if check_input == CheckInputChoices.idmaps:
+            return sum(len(idmap) for idmap in (self._idmaps or {}).values())
+        if check_input == CheckInputChoices.histtags and self.histtag_chunk_size:
+            return get_nr_rows(value=self._chunked_histtags)
+        return get_nr_rows(value=getattr(self, f"_{check_input.value}"))
+
+    def _create_hoofdloc_new(self, par_df: pd.DataFrame) -> None:
         """Create a new hoofdloc from sublocs in case no errors found during
         check_h_loc_consistency in case all sublocs of same h_loc have consistent parameters."""
-        assert isinstance(par_dict, dict), f"par_dict should be a dictionary, not a {type(par_dict)}"
-        par_gdf = pd.DataFrame(data=par_dict)
-        columns = list(self.hoofdloc.geo_df.columns)
-        drop_cols = [col for col in columns if col in par_gdf.columns and col != "LOC_ID"]
-        new_geo_df = self.hoofdloc.geo_df.drop(drop_cols, axis=1, inplace=False)
-        new_geo_df = par_gdf.merge(new_geo_df, on="LOC_ID")
-        new_geo_df["geometry"] = new_geo_df.apply(
-            func=lambda x: Point(float(x["X"]), float(x["Y"]), float(x["Z"])), axis=1
-        )
-        new_geo_df = new_geo_df[columns]
-        self._hoofdloc_new = gpd.GeoDataFrame(new_geo_df)
-
-    def _update_staff_gauge(self, row: pd.Series) -> Tuple[str, str]:
-        """Assign upstream and downstream staff gauges to subloc."""
-        result = {"HBOV": "", "HBEN": ""}
-        for key in result.keys():
-            df = self.waterstandloc.geo_df.loc[self.waterstandloc.geo_df["LOC_ID"] == row[key]]
-            if not df.empty:
-                result[key] = df["PEILSCHAAL"].values[0]
-        return result["HBOV"], result["HBEN"]
+        assert isinstance(par_df, pd.DataFrame), f"par_df should be a pd.DataFrame, not a {type(par_df)}"
+        columns = list(self.hoofdloc.df.columns)
+        drop_cols = [col for col in columns if col in par_df.columns and col != "LOC_ID"]
+        new_df = self.hoofdloc.df.drop(drop_cols, axis=1, inplace=False)
+        new_df = par_df.merge(new_df, on="LOC_ID")
+        self._hoofdloc_new = new_df[columns]
+
+    @staticmethod
+    def _get_caw_loc_names(loc_names: pd.Series, par_ids: pd.Series) -> pd.Series:
+        """Per subloc: the part of its LOC_NAME with the caw code of its PAR_ID, e.g. 'GEMAAL 0_1000-K_POLDER' for
+        PAR_ID 'KW100010'. NaN if LOC_NAME has no such part."""
+        caw_codes = par_ids.str[2:-2]
+        extracted_df = loc_names.str.extract(pat=r"(?P<name>[A-Z0-9 ]*_(?P<caw_code>[A-Z0-9]+)-K_[A-Z0-9 ]*)")
+        caw_loc_names = extracted_df["name"].where(extracted_df["caw_code"] == caw_codes)
+        # the first caw code in LOC_NAME is not the one of PAR_ID (or not found): search for that of PAR_ID
+        for index in caw_loc_names.index[caw_loc_names.isna()]:
+            match = re.search(pattern=f"([A-Z0-9 ]*_{caw_codes[index]}-K_[A-Z0-9 ]*)", string=loc_names[index])
+            if match:
+                caw_loc_names[index] = match.group(1)
+        return caw_loc_names
+
+    def _get_ignored_xy_index(self, loc_ids: pd.Series) -> pd.Series:
+        """Per loc_id: position of the first ignored_xy row whose internalLocation (a regex) matches it (like
+        re.match), NaN if none matches. All regexes are compiled into one alternation, so each loc_id is matched once
+        and the first matching alternative is the first matching row."""
+        patterns = self.ignored_xy["internalLocation"]
+        if patterns.empty:
+            return pd.Series(data=np.nan, index=loc_ids.index)
+        group_names = [f"ignored_xy_{position}" for position in range(len(patterns))]
+        pattern = "^(?:" + "|".join(f"(?P<{name}>{regex})" for name, regex in zip(group_names, patterns)) + ")"
+        is_match_df = loc_ids.str.extract(pat=pattern)[group_names].notna()
+        return pd.Series(data=is_match_df.values.argmax(axis=1), index=loc_ids.index).where(is_match_df.any(axis=1))
+
+    def _get_subloc_xy_not_same(self) -> pd.Series:
+        """Per subloc (same index as subloc.df): is its xy not the same as the xy of its hoofdloc (PAR_ID)?
+        Like shapely Point.equals() only x and y are compared. Sublocs without hoofdloc get True."""
+        # TODO: moet dit wel hoofdlocaties zijn?
+        hoofdloc_xy_df = self.hoofdloc.get_xyz()
+        hoofdloc_xy_df.index = self.hoofdloc.df["LOC_ID"].values
+        hoofdloc_xy_df = hoofdloc_xy_df[~hoofdloc_xy_df.index.duplicated(keep="first")]
+        subloc_xyz_df = self.subloc.get_xyz()
+        par_ids = self.subloc.df["PAR_ID"]
+        is_x_not_same = par_ids.map(hoofdloc_xy_df["X"]) != subloc_xyz_df["X"]
+        is_y_not_same = par_ids.map(hoofdloc_xy_df["Y"]) != subloc_xyz_df["Y"]
+        return is_x_not_same | is_y_not_same
+
+    def _get_staff_gauges(self) -> pd.Series:
+        """Get waterstandloc PEILSCHAAL per LOC_ID. In case of duplicate LOC_IDs the first PEILSCHAAL is used."""
+        df = self.waterstandloc.df.drop_duplicates(subset="LOC_ID", keep="first")
+        return df.set_index("LOC_ID")["PEILSCHAAL"]
+
+    @staticmethod
+    def _map_staff_gauges(loc_ids: pd.Series, staff_gauges: pd.Series) -> pd.Series:
+        """PEILSCHAAL (as is, so also NaN) per waterstandloc LOC_ID in loc_ids, "" if loc_id is no waterstandloc."""
+        is_waterstandloc = loc_ids.notna() & loc_ids.isin(staff_gauges.index)
+        return loc_ids.map(staff_gauges).where(is_waterstandloc, "")
 
     def check_idmap_int_loc_in_csv(self, sheet_name: str = "idmap int_loc in csv error") -> ExcelSheet:
         """Check if IdOPVLWATER.xml int_locs are in correct (hoofdloc/subloc/ow/msw) csv."""
@@ -433,24 +715,27 @@ class MptConfigChecker:
         )
         logger.info(f"start {self.check_idmap_int_loc_in_csv.__name__} with sheet_name={sheet_name}")
 
-        idmaps = self._get_idmaps(idmap_files=["IdOPVLWATER"])
         errors = {
             "int_locs": [],
             "error_type": [],
         }
-        idmap_df = pd.DataFrame(data=idmaps)
+        if self.input_store is not None:
+            # one indexed query for all four csvs
+            idmap_df = self.input_store.get_int_locs_in_csvs(idmap_file="IdOPVLWATER")
+        else:
+            idmap_df = self._get_idmap_df(idmap_files=["IdOPVLWATER"])
+            # hoofd locations are in oppvlwater_hoofdloc.csv
+            idmap_df["in_hoofd_csv"] = idmap_df["internalLocation"].isin(self.hoofdloc.df["LOC_ID"])
+            # sub locations are in oppvlwater_subloc.csv
+            idmap_df["in_sub_csv"] = idmap_df["internalLocation"].isin(self.subloc.df["LOC_ID"])
+            # ow locations are in oppvlwater_waterstanden.csv
+            idmap_df["in_ow_csv"] = idmap_df["internalLocation"].isin(self.waterstandloc.df["LOC_ID"])
+            # msw locations are in msw_stations.csv
+            idmap_df["in_msw_csv"] = idmap_df["internalLocation"].isin(self.mswloc.df["LOC_ID"])
         idmap_df["is_ow"] = idmap_df["internalLocation"].apply(func=lambda x: IntLocChoices.is_ow(x))
         idmap_df["is_kw_hoofd"] = idmap_df["internalLocation"].apply(func=lambda x: IntLocChoices.is_kw_hoofd(x))
         idmap_df["is_kw_sub"] = idmap_df["internalLocation"].apply(func=lambda x: IntLocChoices.is_kw_sub(x))
         idmap_df["is_msw"] = idmap_df["internalLocation"].apply(func=lambda x: IntLocChoices.is_msw(x))
-        # hoofd locations are in oppvlwater_hoofdloc.csv
-        idmap_df["in_hoofd_csv"] = idmap_df["internalLocation"].isin(self.hoofdloc.geo_df["LOC_ID"])
-        # sub locations are in oppvlwater_subloc.csv
-        idmap_df["in_sub_csv"] = idmap_df["internalLocation"].isin(self.subloc.geo_df["LOC_ID"])
-        # ow locations are in oppvlwater_waterstanden.csv
-        idmap_df["in_ow_csv"] = idmap_df["internalLocation"].isin(self.waterstandloc.geo_df["LOC_ID"])
-        # msw locations are in msw_stations.csv
-        idmap_df["in_msw_csv"] = idmap_df["internalLocation"].isin(self.mswloc.geo_df["LOC_ID"])
         idmap_df["nr_in_a_csv"] = sum(
             [idmap_df["in_hoofd_csv"], idmap_df["in_sub_csv"], idmap_df["in_ow_csv"], idmap_df["in_msw_csv"]]
         )
@@ -532,10 +817,10 @@ class MptConfigChecker:
         end_col = "EIND"
         pd_start_col = "pd_start"
         pd_end_col = "pd_end"
-        assert (start_col and end_col) not in self.mswloc.geo_df.columns
+        assert (start_col and end_col) not in self.mswloc.df.columns
         for loc_set in (self.hoofdloc, self.subloc, self.waterstandloc, self.psloc):
-            assert (start_col and end_col and "LOC_ID") in loc_set.geo_df.columns
-            df = loc_set.geo_df
+            assert (start_col and end_col and "LOC_ID") in loc_set.df.columns
+            df = loc_set.df
             df[pd_start_col] = pd.to_datetime(df[start_col], format="%Y%m%d", errors="coerce")
             df[pd_end_col] = pd.to_datetime(df[end_col], format="%Y%m%d", errors="coerce")
 
@@ -630,7 +915,7 @@ class MptConfigChecker:
                     _dict = xml_to_dict(xml_filepath=xml_filepath, section_start=section_start, section_end=section_end)
                     idmapping = _dict["idMap"]["map"]
                     prefix = constants.SECTION_TYPE_PREFIX_MAPPER[section_type]
-                    pattern = fr"{prefix}\d{{6}}$"
+                    pattern = rf"{prefix}\d{{6}}$"
                     idmap_wrong_section = [
                         idmap
                         for idmap in idmapping
@@ -670,6 +955,10 @@ class MptConfigChecker:
         assert isinstance(idmap_files, List) if idmap_files else True, "idmap_files must be a List"
         if not idmap_files:
             idmap_files = ["IdOPVLWATER"]
+        if self.histtag_chunk_size:
+            matched_series = self.chunked_histtags.get_matched_series(idmap_files=idmap_files)
+            result_df = self.ignored_histtag[self.ignored_histtag["UNKNOWN_SERIE"].isin(values=matched_series)]
+            return self._get_ignored_histtags_sheet(sheet_name=sheet_name, description=description, result_df=result_df)
         histtags_opvlwater_df = self.histtags.copy()
         idmaps = self._get_idmaps(idmap_files=idmap_files)
         # TODO: @daniel kan fews_locid een lijst met meerdere loc_id's zijn?
@@ -695,6 +984,10 @@ class MptConfigChecker:
         result_df = self.ignored_histtag[
             self.ignored_histtag["UNKNOWN_SERIE"].isin(values=histtags_opvlwater_df["serie"])
         ]
+        return self._get_ignored_histtags_sheet(sheet_name=sheet_name, description=description, result_df=result_df)
+
+    @staticmethod
+    def _get_ignored_histtags_sheet(sheet_name: str, description: str, result_df: pd.DataFrame) -> ExcelSheet:
         if result_df.empty:
             logger.info("hisTags ignore list consistent with idmaps")
         else:
@@ -710,6 +1003,9 @@ class MptConfigChecker:
             "hisTags die niet konden worden gemapped naar interne locatie en niet in de hisTag_ignore zijn opgenomen"
         )
         logger.info(f"start double{self.check_histtags_nomatch.__name__} with sheet_name={sheet_name}")
+        if self.histtag_chunk_size:
+            result_df = self.chunked_histtags.get_unmatched(ignored_series=self.ignored_histtag["UNKNOWN_SERIE"])
+            return self._get_histtags_nomatch_sheet(sheet_name=sheet_name, description=description, result_df=result_df)
         histtags_df = self.histtags.copy()
         idmaps = self._get_idmaps()
         histtags_df["fews_locid"] = self.histtags.apply(func=idmap2tags, args=[idmaps], axis=1)
@@ -731,6 +1027,10 @@ class MptConfigChecker:
         result_df = result_df[~result_df["serie"].isin(values=self.ignored_histtag["UNKNOWN_SERIE"])]
         result_df = result_df.drop("fews_locid", axis=1)
         result_df.columns = ["UNKNOWN_SERIE", "STARTDATE", "ENDDATE"]
+        return self._get_histtags_nomatch_sheet(sheet_name=sheet_name, description=description, result_df=result_df)
+
+    @staticmethod
+    def _get_histtags_nomatch_sheet(sheet_name: str, description: str, result_df: pd.DataFrame) -> ExcelSheet:
         if result_df.empty:
             logger.info("all histTags in idMaps")
         else:
@@ -760,12 +1060,15 @@ class MptConfigChecker:
             columns=["bestand", "externalLocation", "externalParameter", "internalLocation", "internalParameter"]
         )
         for idmap_file in constants.IDMAP_FILES:
-            idmaps = self._get_idmaps(idmap_files=[idmap_file])
-            idmap_doubles = [idmap for idmap in idmaps if idmaps.count(idmap) > 1]
+            if self.input_store is not None:
+                idmap_doubles = self.input_store.get_double_idmaps(idmap_file=idmap_file)
+            else:
+                idmaps = self._get_idmaps(idmap_files=[idmap_file])
+                idmap_doubles = [idmap for idmap in idmaps if idmaps.count(idmap) > 1]
+                idmap_doubles = list({idmap["externalLocation"]: idmap for idmap in idmap_doubles}.values())
             if not idmap_doubles:
                 logger.info(f"No double idmaps in {idmap_file} ")
                 continue
-            idmap_doubles = list({idmap["externalLocation"]: idmap for idmap in idmap_doubles}.values())
             logger.warning(f"{len(idmap_doubles)} double idmaps in {idmap_file}")
             df = pd.DataFrame(
                 data=idmap_doubles,
@@ -804,90 +1107,99 @@ class MptConfigChecker:
         return excel_sheet
 
     def check_s_loc_consistency(self, sheet_name: str = "s_locs not consistent") -> ExcelSheet:
-        """Check if all sub_locs of the same h_loc have consistent parameters: xy, rayon, systeem, kompas."""
+        """Check if all sub_locs of the same h_loc have consistent parameters: xy, rayon, systeem, kompas.
+
+        All sublocs are aggregated per PAR_ID in one pass; error strings are only built for inconsistent groups."""
         description = "fouten in CAW sublocatie-groepen waardoor hier geen hoofdlocaties.csv uit kan worden geschreven"
         logger.info(f"start {self.check_s_loc_consistency.__name__} with sheet_name={sheet_name}")
 
-        h_loc_errors = {
-            "LOC_ID": [],
-            "SUB_LOCS": [],
-            "LOC_NAME": [],
-            "GEOMETRY": [],
-            "SYSTEEM": [],
-            "RAYON": [],
-            "KOMPAS": [],
-        }
-
-        grouper = self.subloc.geo_df.groupby("PAR_ID")
-        par_dict = {
-            "LOC_ID": [],
-            "LOC_NAME": [],
-            "X": [],
-            "Y": [],
-            "ALLE_TYPES": [],
-            "START": [],
-            "EIND": [],
-            "SYSTEEM": [],
-            "RAYON": [],
-            "KOMPAS": [],
-        }
-
-        for loc_id, gdf in grouper:
-            caw_code = loc_id[2:-2]
-            errors = dict.fromkeys(["LOC_NAME", "GEOMETRY", "SYSTEEM", "RAYON", "KOMPAS"], False)
-            fields = dict.fromkeys(par_dict.keys(), None)
-            fields["LOC_ID"] = loc_id
-
-            loc_names = np.unique(gdf["LOC_NAME"].str.extract(pat=f"([A-Z0-9 ]*_{caw_code}-K_[A-Z0-9 ]*)").values)
-
-            if len(loc_names) == 1:
-                fields["LOC_NAME"] = loc_names[0]
-            else:
-                errors["LOC_NAME"] = ",".join(loc_names)
-
-            if any([re.match(pattern=loc, string=loc_id) for loc in self.ignored_xy["internalLocation"]]):
-                fields["X"], fields["Y"] = next(
-                    [row["x"], row["y"]]
-                    for index, row in self.ignored_xy.iterrows()
-                    if re.match(pattern=row["internalLocation"], string=loc_id)
-                )
-
-            else:
-                geoms = gdf["geometry"].unique()
-                if len(geoms) == 1:
-                    fields["X"] = geoms[0].x
-                    fields["Y"] = geoms[0].y
-                else:
-                    errors["GEOMETRY"] = ",".join([f"({geom.x} {geom.y})" for geom in geoms])
-
-            all_types = list(gdf["TYPE"].unique())
-            all_types.sort()
-            fields["ALLE_TYPES"] = "/".join(all_types)
-            fields["START"] = gdf["START"].min()
-            fields["EIND"] = gdf["EIND"].max()
-            for attribuut in ["SYSTEEM", "RAYON", "KOMPAS"]:
-                vals = gdf[attribuut].unique()
-                if len(vals) == 1:
-                    fields[attribuut] = vals[0]
-                else:
-                    errors[attribuut] = ",".join(vals)
+        # sublocs without PAR_ID belong to no group
+        is_par = self.subloc.df["PAR_ID"].notna()
+        subloc_df = self.subloc.df[is_par]
+        par_ids = subloc_df["PAR_ID"].astype(str)
+        df = pd.concat(
+            objs=[
+                pd.DataFrame(
+                    data={
+                        "PAR_ID": par_ids,
+                        "LOC_ID": subloc_df["LOC_ID"].astype(str),
+                        "LOC_NAME": self._get_caw_loc_names(loc_names=subloc_df["LOC_NAME"], par_ids=par_ids),
+                    }
+                ),
+                self.subloc.get_xyz()[is_par],
+                subloc_df[["TYPE", "START", "EIND", "SYSTEEM", "RAYON", "KOMPAS"]].astype(str),
+            ],
+            axis=1,
+        )
+        attributes = ["SYSTEEM", "RAYON", "KOMPAS"]
+
+        # one pass over all groups (sorted on PAR_ID, like the groups of a groupby)
+        grouper = df.groupby("PAR_ID", sort=True)
+        agg_df = grouper.agg(
+            SUB_LOCS=("LOC_ID", ",".join),
+            LOC_NAME=("LOC_NAME", "first"),
+            X=("X", "first"),
+            Y=("Y", "first"),
+            START=("START", "min"),
+            EIND=("EIND", "max"),
+            **{attribute: (attribute, "first") for attribute in attributes},
+            **{f"{attribute}_NUNIQUE": (attribute, "nunique") for attribute in attributes},
+        )
+        # like np.unique, nunique of loc names and xyz counts missing values too
+        agg_df["LOC_NAME_NUNIQUE"] = df.drop_duplicates(subset=["PAR_ID", "LOC_NAME"])["PAR_ID"].value_counts()
+        agg_df["XYZ_NUNIQUE"] = df.drop_duplicates(subset=["PAR_ID", "X", "Y", "Z"])["PAR_ID"].value_counts()
+        # sorted unique types, e.g. 'krooshek/pompvijzel'
+        agg_df["ALLE_TYPES"] = (
+            df.drop_duplicates(subset=["PAR_ID", "TYPE"]).sort_values(by="TYPE").groupby("PAR_ID")["TYPE"].agg("/".join)
+        )
 
-            if None not in fields.values():
-                for key, value in fields.items():
-                    par_dict[key].append(value)
+        # xy of groups that match ignored_xy are taken from ignored_xy (their xy is not checked)
+        ignored_index = self._get_ignored_xy_index(loc_ids=agg_df.index.to_series())
+        is_ignored = ignored_index.notna()
+        ignored_rows = self.ignored_xy.iloc[ignored_index[is_ignored].astype(int)]
+        agg_df.loc[is_ignored, "X"] = ignored_rows["x"].values
+        agg_df.loc[is_ignored, "Y"] = ignored_rows["y"].values
 
-            if any(errors.values()):
-                h_loc_errors["LOC_ID"].append(loc_id)
-                h_loc_errors["SUB_LOCS"].append(",".join(gdf["LOC_ID"].values))
-                for key, value in errors.items():
-                    if value is False:
-                        value = ""
-                    h_loc_errors[key].append(value)
+        errors_df = pd.DataFrame(
+            data={
+                "LOC_NAME": agg_df["LOC_NAME_NUNIQUE"] != 1,
+                "GEOMETRY": ~is_ignored & (agg_df["XYZ_NUNIQUE"] != 1),
+                **{attribute: agg_df[f"{attribute}_NUNIQUE"] != 1 for attribute in attributes},
+            },
+            index=agg_df.index,
+        )
+        has_error = errors_df.any(axis=1)
+        error_df = df[df["PAR_ID"].isin(agg_df.index[has_error])]
+        result_df = pd.DataFrame(
+            data={"LOC_ID": agg_df.index[has_error], "SUB_LOCS": agg_df.loc[has_error, "SUB_LOCS"].values}
+        )
+        # error strings: sorted unique loc names and unique values in order of appearance
+        error_strings = {
+            "LOC_NAME": error_df.drop_duplicates(subset=["PAR_ID", "LOC_NAME"])
+            .sort_values(by="LOC_NAME")
+            .groupby("PAR_ID")["LOC_NAME"]
+            .agg(",".join),
+            "GEOMETRY": error_df.drop_duplicates(subset=["PAR_ID", "X", "Y", "Z"])
+            .assign(XY="(" + error_df["X"].astype(str) + " " + error_df["Y"].astype(str) + ")")
+            .groupby("PAR_ID")["XY"]
+            .agg(",".join),
+            **{
+                attribute: error_df.drop_duplicates(subset=["PAR_ID", attribute])
+                .groupby("PAR_ID")[attribute]
+                .agg(",".join)
+                for attribute in attributes
+            },
+        }
+        for column, error_strings_per_par in error_strings.items():
+            is_column_error = errors_df.loc[has_error, column].values
+            values = result_df["LOC_ID"].map(error_strings_per_par).where(is_column_error, "")
+            result_df[column] = values.astype(object)
 
-        result_df = pd.DataFrame(data=h_loc_errors)
         if result_df.empty:
             logger.info("all grouped sublocs are consistent with eachother (xy, rayon, etc)")
-            self._create_hoofdloc_new(par_dict=par_dict)
+            par_df = agg_df[~has_error].reset_index().rename(columns={"PAR_ID": "LOC_ID"})
+            columns = ["LOC_ID", "LOC_NAME", "X", "Y", "ALLE_TYPES", "START", "EIND"] + attributes
+            self._create_hoofdloc_new(par_df=par_df[columns])
         else:
             logger.warning(f"{len(result_df)} grouped sublocs are not consistent with eachother (xy, rayon, etc)")
             logger.warning("h_locs can only be re-written when consistency errors are resolved")
@@ -896,11 +1208,9 @@ class MptConfigChecker:
         )
         return excel_sheet
 
-    def check_ex_par_errors_int_loc_missing(
-        self, ex_par_sheet_name: str = "ex_par error", int_loc_sheet_name: str = "int_loc missing"
-    ) -> Tuple[ExcelSheet, ExcelSheet]:
-        """Check on wrong external parameters and missing internal locations. This check returns
-        two sheets (2x name+df), whereas all other checks return one sheet (1x name+df)."""
+    def _get_ex_par_error_rows(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """External parameter errors and missing internal locations of the idmaps (in self.caw_shard), with per row
+        its rank (the nr of its internalLocation group over all idmaps)."""
 
         # roger: = ik snap eigenlijk niet waarom de kolom SS/SM erin staat.
         # De bedoeling was dat als een schuif wel een ES heeft, maar geen SP of SS of SM, dat het dan vreemd is.
@@ -929,14 +1239,6 @@ class MptConfigChecker:
         # hebben 0 of 1. Echter KW218221 is een uitzondering. We zouden een ignore voor KW218221 (alleen voor SM/SS
         # kunnen maken.. lage prio)
 
-        ex_par_description = "locaties waar foute externe parameters aan zijn gekoppeld"
-        int_loc_description = "interne locaties in de idmap die niet zijn opgenomen in locatiesets"
-
-        logger.info(
-            f"start {self.check_ex_par_errors_int_loc_missing.__name__} with 2 "
-            f"sheet_names={ex_par_sheet_name} and {int_loc_sheet_name}"
-        )
-
         ex_par_errors = {
             "internalLocation": [],
             "locationType": [],
@@ -946,37 +1248,46 @@ class MptConfigChecker:
             "I.X": [],
             "IX.": [],
             "SS./SM.": [],
+            shard_rank: [],
         }
-        int_loc_missing = []
-        idmaps = self._get_idmaps(idmap_files=["IdOPVLWATER"])
-        idmap_df = pd.DataFrame(data=idmaps)
-        for int_loc, loc_group in idmap_df.groupby("internalLocation"):
+        int_loc_missing = {"internalLocation": [], shard_rank: []}
+        idmap_df = self._get_idmap_df(idmap_files=["IdOPVLWATER"])
+        group_nrs = idmap_df.groupby("internalLocation", observed=True).ngroup()
+        idmap_df = filter_caw_shard(df=idmap_df, loc_id_column="internalLocation", caw_shard=self.caw_shard)
+        # properties of the first row per LOC_ID, instead of filtering the location set df per int_loc
+        hoofdloc_df = self.hoofdloc.df.drop_duplicates(subset="LOC_ID", keep="first")
+        subloc_df = self.subloc.df.drop_duplicates(subset="LOC_ID", keep="first")
+        hoofdloc_all_types = dict(zip(hoofdloc_df["LOC_ID"], hoofdloc_df["ALLE_TYPES"]))
+        subloc_all_types = dict(zip(subloc_df["LOC_ID"], subloc_df["ALLE_TYPES"]))
+        subloc_types = dict(zip(subloc_df["LOC_ID"], subloc_df["TYPE"]))
+        for int_loc, loc_group in idmap_df.groupby("internalLocation", observed=True):
             regexes = []
             errors = dict.fromkeys(["I.X", "IX.", "FQ", "SS./SM."], False)
             ex_pars = np.unique(loc_group["externalParameter"].values)
             ex_pars_gen = [re.sub(r"\d", ".", ex_par) for ex_par in ex_pars]
-            if int_loc in self.hoofdloc.geo_df["LOC_ID"].values:
-                loc_properties = self.hoofdloc.geo_df[self.hoofdloc.geo_df["LOC_ID"] == int_loc]
+            if int_loc in hoofdloc_all_types:
+                loc_all_types = hoofdloc_all_types[int_loc]
                 loc_type = "hoofdloc"
-            elif int_loc in self.subloc.geo_df["LOC_ID"].values:
-                loc_properties = self.subloc.geo_df[self.subloc.geo_df["LOC_ID"] == int_loc]
+            elif int_loc in subloc_all_types:
+                loc_all_types = subloc_all_types[int_loc]
                 loc_type = "subloc"
                 regexes = ["HR.$"]
-            elif int_loc in self.waterstandloc.geo_df["LOC_ID"].values:
+            elif int_loc in self.waterstandloc.df["LOC_ID"].values:
                 loc_type = "waterstandloc"
-            elif int_loc in self.mswloc.geo_df["LOC_ID"].values:
+            elif int_loc in self.mswloc.df["LOC_ID"].values:
                 loc_type = "mswloc"
             else:
                 loc_type = None
-                int_loc_missing += [int_loc]
+                int_loc_missing["internalLocation"].append(int_loc)
+                int_loc_missing[shard_rank].append(group_nrs[loc_group.index[0]])
             if loc_type in ["hoofdloc", "subloc"]:
-                all_types = loc_properties["ALLE_TYPES"].values[0].split("/")
+                all_types = loc_all_types.split("/")
                 all_types = [item.lower() for item in all_types]
             elif loc_type == "waterstandloc":
                 all_types = ["waterstandloc"]
 
             if loc_type == "subloc":
-                sub_type = self.subloc.geo_df[self.subloc.geo_df["LOC_ID"] == int_loc]["TYPE"].values[0]
+                sub_type = subloc_types[int_loc]
 
                 allowed_parameters = [
                     parameters
@@ -1040,6 +1351,27 @@ class MptConfigChecker:
                 ex_par_errors["types"].append(",".join(all_types))
                 for key, value in errors.items():
                     ex_par_errors[key].append(value)
+                ex_par_errors[shard_rank].append(group_nrs[loc_group.index[0]])
+        return pd.DataFrame(data=ex_par_errors), pd.DataFrame(data=int_loc_missing)
+
+    def check_ex_par_errors_int_loc_missing(
+        self,
+        ex_par_sheet_name: str = "ex_par error",
+        int_loc_sheet_name: str = "int_loc missing",
+        shard_rows: List[Tuple[pd.DataFrame, pd.DataFrame]] = None,
+    ) -> Tuple[ExcelSheet, ExcelSheet]:
+        """Check on wrong external parameters and missing internal locations. This check returns
+        two sheets (2x name+df), whereas all other checks return one sheet (1x name+df). shard_rows are the rows of
+        all shards, if run in shards."""
+        ex_par_description = "locaties waar foute externe parameters aan zijn gekoppeld"
+        int_loc_description = "interne locaties in de idmap die niet zijn opgenomen in locatiesets"
+
+        logger.info(
+            f"start {self.check_ex_par_errors_int_loc_missing.__name__} with 2 "
+            f"sheet_names={ex_par_sheet_name} and {int_loc_sheet_name}"
+        )
+        if shard_rows is None:
+            shard_rows = [self._get_ex_par_error_rows()]
 
         # Roger:
         # niet veranderen, maar wel sidenote bij interpreteren van result_df:
@@ -1067,8 +1399,8 @@ class MptConfigChecker:
         #    dus dan moeten we deze toevoegen aan een ignore lijst.
         # 3) als er een openingspercentage is, dan is het niet erg dan er een SS of SM ontbreekt
 
-        ex_par_result_df = pd.DataFrame(data=ex_par_errors)
-        int_loc_result_df = pd.DataFrame(data={"internalLocation": int_loc_missing})
+        ex_par_result_df = merge_shard_rows(frames=[rows[0] for rows in shard_rows])
+        int_loc_result_df = merge_shard_rows(frames=[rows[1] for rows in shard_rows])
 
         if len(ex_par_result_df) == 0:
             logger.info("no external parameter errors")
@@ -1105,9 +1437,8 @@ class MptConfigChecker:
             "QS": [],
             "HS": [],
         }
-        idmaps = self._get_idmaps(idmap_files=["IdOPVLWATER"])
-        idmap_df = pd.DataFrame(data=idmaps)
-        for index, row in self.hoofdloc.geo_df.iterrows():
+        idmap_df = self._get_idmap_df(idmap_files=["IdOPVLWATER"])
+        for index, row in self.hoofdloc.df.iterrows():
             missings = dict.fromkeys(["QR", "QS", "HS"], False)
             int_loc = row["LOC_ID"]
             loc_group = idmap_df[idmap_df["internalLocation"] == int_loc]
@@ -1144,9 +1475,8 @@ class MptConfigChecker:
         description = "externe locaties die niet passen bij interne locatie"
         logger.info(f"start {self.check_ex_loc_int_loc_mismatch.__name__} with sheet_name={sheet_name}")
         ex_loc_errors = {"internalLocation": [], "externalLocation": []}
-        idmaps = self._get_idmaps(idmap_files=["IdOPVLWATER"])
-        idmap_df = pd.DataFrame(data=idmaps)
-        for loc_group in idmap_df.groupby("externalLocation"):
+        idmap_df = self._get_idmap_df(idmap_files=["IdOPVLWATER"])
+        for loc_group in idmap_df.groupby("externalLocation", observed=True):
             int_loc_error = []
             ex_loc = loc_group[0]
             assert isinstance(ex_loc, str) and len(ex_loc) in (3, 4), "we expected ex_loc is str with length 3 or 4"
@@ -1202,19 +1532,17 @@ class MptConfigChecker:
         )
         return excel_sheet
 
-    def check_timeseries_logic(self, sheet_name: str = "time_series error") -> ExcelSheet:
-        """Check if timeseries are consistent with internal locations and parameters."""
-        description = "tijdseries die niet logisch zijn gekoppeld aan interne locaties en parameters"
-        logger.info(f"start {self.check_timeseries_logic.__name__} with sheet_name={sheet_name}")
+    def _get_timeseries_error_rows(self) -> pd.DataFrame:
+        """Timeseries errors of the subloc idmaps (in self.caw_shard), with per row its rank (loc_group, int_loc)."""
+        idmap_df = self._get_idmap_df(idmap_files=["IdOPVLWATER"])
+        idmap_df = filter_caw_shard(df=idmap_df, loc_id_column="internalLocation", caw_shard=self.caw_shard)
 
-        idmaps = self._get_idmaps(idmap_files=["IdOPVLWATER"])
-        idmap_df = pd.DataFrame(data=idmaps)
+        # the per loc_group loop below works on small frames, where plain strings are faster than categoricals
+        idmap_subloc_df = idmap_df[idmap_df["internalLocation"].isin(values=self.subloc.df["LOC_ID"])].astype(object)
 
-        idmap_subloc_df = idmap_df[idmap_df["internalLocation"].isin(values=self.subloc.geo_df["LOC_ID"].values)]
-
-        idmap_subloc_df["type"] = idmap_subloc_df["internalLocation"].apply(
-            func=lambda x: self.subloc.geo_df[self.subloc.geo_df["LOC_ID"] == x]["TYPE"].values[0]
-        )
+        # map on the (categorical) internalLocation instead of a subloc.df lookup per row
+        subloc_types = self.subloc.df.drop_duplicates(subset="LOC_ID", keep="first").set_index("LOC_ID")["TYPE"]
+        idmap_subloc_df["type"] = idmap_subloc_df["internalLocation"].map(subloc_types).astype(str)
 
         idmap_subloc_df["loc_group"] = idmap_subloc_df["internalLocation"].str[0:-1]
 
@@ -1226,7 +1554,9 @@ class MptConfigChecker:
             "externalLocations": [],
             "error_type": [],
             "error": [],
+            shard_rank: [],
         }
+        nr_errors = 0
 
         for loc_group, group_df in idmap_subloc_df.groupby("loc_group"):
             ex_locs = np.unique(group_df["externalLocation"].values)
@@ -1252,14 +1582,14 @@ class MptConfigChecker:
             if len(org_uniques) == 1 and len(split_ts) == 1:
                 ex_locs_dict = {k: (org_uniques[0] if k in split_ts else v) for (k, v) in ex_locs_dict.items()}
 
-            group_df["ex_loc_group"] = group_df["externalLocation"].apply(func=lambda x: ex_locs_dict[x])
+            group_df["ex_loc_group"] = group_df["externalLocation"].map(ex_locs_dict).astype(int)
 
-            for int_loc, loc_df in group_df.groupby("internalLocation"):
+            for int_loc, loc_df in group_df.groupby("internalLocation", observed=True):
 
                 if int_loc in self.ignored_time_series_error["internalLocation"].values:
                     continue
 
-                int_loc_df = self.subloc.geo_df[self.subloc.geo_df["LOC_ID"] == int_loc]
+                int_loc_df = self.subloc.df[self.subloc.df["LOC_ID"] == int_loc]
                 sub_type = int_loc_df["TYPE"].values[0]
                 startdate_str = int_loc_df["START"].values[0]
                 enddate_str = int_loc_df["EIND"].values[0]
@@ -1303,7 +1633,7 @@ class MptConfigChecker:
                                     ts_errors["error_type"].append(sub_type)
                                     ts_errors["error"].append(f"{sub_type} zonder stuurpeil {','.join(sp_locs)} wel")
                     else:
-                        time_series = loc_df.groupby(["ex_loc_group", "externalParameter"])
+                        time_series = loc_df.groupby(["ex_loc_group", "externalParameter"], observed=True)
                         sp_series = [
                             series for series in time_series if bool(re.match(pattern="HR.", string=series[0][1]))
                         ]
@@ -1338,7 +1668,21 @@ class MptConfigChecker:
                                 ts_errors["error_type"].append(sub_type)
                                 error_msg = f'{",".join(conflicting_pars)} coupled to sp-serie (ex_par:{ex_par}, ex_loc(s):{",".join(ex_locs)})'  # noqa
                                 ts_errors["error"].append(error_msg)
-        result_df = pd.DataFrame(data=ts_errors)
+                # the rank of all errors of this int_loc (the loops are sorted by loc_group, then int_loc)
+                ts_errors[shard_rank] += [(loc_group, int_loc)] * (len(ts_errors["error"]) - nr_errors)
+                nr_errors = len(ts_errors["error"])
+        return pd.DataFrame(data=ts_errors)
+
+    def check_timeseries_logic(
+        self, sheet_name: str = "time_series error", shard_rows: List[pd.DataFrame] = None
+    ) -> ExcelSheet:
+        """Check if timeseries are consistent with internal locations and parameters. shard_rows are the rows of all
+        shards, if run in shards."""
+        description = "tijdseries die niet logisch zijn gekoppeld aan interne locaties en parameters"
+        logger.info(f"start {self.check_timeseries_logic.__name__} with sheet_name={sheet_name}")
+        if shard_rows is None:
+            shard_rows = [self._get_timeseries_error_rows()]
+        result_df = merge_shard_rows(frames=shard_rows)
         if len(result_df) == 0:
             logger.info("logical coupling of all timeseries to internal locations/parameters")
         else:
@@ -1348,8 +1692,84 @@ class MptConfigChecker:
         )
         return excel_sheet
 
-    def check_validation_rules(self, sheet_name: str = "validation error") -> ExcelSheet:
-        """Check if validation rules are consistent.
+    def _get_merged_validation_csvs(self) -> List[Tuple[constants.LocationSet, pd.DataFrame]]:
+        """Per location set with validation rules: its df merged with all its validation csvs."""
+        return [
+            (
+                loc_set,
+                HelperValidationRules.get_df_merged_validation_csvs(loc_set=loc_set, fews_config=self.fews_config),
+            )
+            for loc_set in (self.hoofdloc, self.subloc, self.waterstandloc, self.mswloc, self.psloc)
+            if loc_set.validation_rules
+        ]
+
+    def _get_validation_rule_error_rows(
+        self,
+        merged_validation_csvs: List[Tuple[constants.LocationSet, pd.DataFrame]] = None,
+        tables: ValidationRuleTables = None,
+    ) -> pd.DataFrame:
+        """Errors of the validation csv rows (in self.caw_shard), with per row its rank (loc_set nr, row nr).
+        The tables are built from the IdOPVLWATER idmaps if not given (e.g. in a shard)."""
+        errors = {
+            "internalLocation": [],
+            "internalParameters": [],
+            "start": [],
+            "eind": [],
+            "error_type": [],
+            "error_description": [],
+            shard_rank: [],
+        }
+        if merged_validation_csvs is None:
+            merged_validation_csvs = self._get_merged_validation_csvs()
+        if tables is None:
+            tables = ValidationRuleTables(idmap_df=self._get_idmap_df(idmap_files=["IdOPVLWATER"]))
+        hoofd_sub_loc_sets = (self.hoofdloc, self.subloc)
+        waterstand_loc_set = self.waterstandloc
+
+        for loc_set_nr, (loc_set, df_merged_validation_csvs) in enumerate(merged_validation_csvs):
+            df_merged_validation_csvs = filter_caw_shard(
+                df=df_merged_validation_csvs, loc_id_column="LOC_ID", caw_shard=self.caw_shard
+            )
+            # the value check (and its validation logic statements) only depends on the loc_set
+            if loc_set in hoofd_sub_loc_sets:
+                check_values = HelperValidationRules.check_hoofd_and_sub_loc
+                statements = tables.hloc_sloc_statements
+            elif loc_set == waterstand_loc_set:
+                check_values = HelperValidationRules.check_waterstandstand_loc
+                statements = tables.wloc_statements
+            else:
+                check_values = None
+                statements = None
+            for idx, row in df_merged_validation_csvs.iterrows():
+                # drop all empty columns current row so we can use row.keys() to check if value is missing
+                row = row.dropna()
+                # go from int_loc to 1 or more int_pars based on id_mapping
+                # eg: from 'KW101310' to ('H.S.0', 'H2.S.0')
+                int_pars = tables.get_int_pars(int_loc=row["LOC_ID"])
+                if not int_pars:
+                    logger.debug(f"no problem, int_loc {row['LOC_ID']} not in IdOPVLWATER")
+                    continue
+                validation_attribs = tables.get_attribs(loc_set=loc_set, int_pars=int_pars)
+                errors = HelperValidationRules.check_attributes_too_few_or_many(
+                    errors=errors,
+                    loc_set=loc_set,
+                    row=row,
+                    int_pars=list(int_pars),
+                    validation_attribs=validation_attribs,
+                )
+                if check_values:
+                    for rule in validation_attribs.rules:
+                        errors = check_values(
+                            errors=errors, rule=rule, row=row, int_pars=list(int_pars), statements=statements
+                        )
+                # the rank of all errors of this row
+                errors[shard_rank] += [(loc_set_nr, idx)] * (len(errors["error_type"]) - len(errors[shard_rank]))
+        return pd.DataFrame(data=errors)
+
+    def check_validation_rules(
+        self, sheet_name: str = "validation error", shard_rows: List[pd.DataFrame] = None
+    ) -> ExcelSheet:
+        """Check if validation rules are consistent. shard_rows are the rows of all shards, if run in shards.
 
         1. Per loc_set wordt er gelooped over de validatie csvs (df_merged_validation_csvs).
         2. Voor elke int_loc in csv wordt 0 of meerdere int_pars uit de IdOPVLWATER.xml gehaald
@@ -1423,70 +1843,31 @@ class MptConfigChecker:
 
         description = "controle of attributen van validatieregels overbodig zijn/missen óf verkeerde waarden bevatten"
         logger.info(f"start {self.check_validation_rules.__name__} with sheet_name={sheet_name}")
-        errors = {
-            "internalLocation": [],
-            "internalParameters": [],
-            "start": [],
-            "eind": [],
-            "error_type": [],
-            "error_description": [],
-        }
-        idmaps = self._get_idmaps(idmap_files=["IdOPVLWATER"])
-        idmap_df = pd.DataFrame(data=idmaps)
-        idmap_df_grouped_by_intloc = idmap_df.groupby("internalLocation")
-        idmap_df[is_in_a_validation] = False
-
-        for loc_set in (self.hoofdloc, self.subloc, self.waterstandloc, self.mswloc, self.psloc):
-            if not loc_set.validation_rules:
-                continue
-            # merge all validation csv per loc_set
-            df_merged_validation_csvs = HelperValidationRules.get_df_merged_validation_csvs(
-                loc_set=loc_set, fews_config=self.fews_config
-            )
+        merged_validation_csvs = self._get_merged_validation_csvs()
+        idmap_df = self._get_idmap_df(idmap_files=["IdOPVLWATER"])
+        # built once, for both the validation rows and the new validation csvs
+        tables = ValidationRuleTables(idmap_df=idmap_df)
+        if shard_rows is None:
+            shard_rows = [
+                self._get_validation_rule_error_rows(merged_validation_csvs=merged_validation_csvs, tables=tables)
+            ]
+        errors = merge_shard_rows(frames=shard_rows).to_dict(orient="list")
 
+        idmap_df[is_in_a_validation] = False
+        for _, df_merged_validation_csvs in merged_validation_csvs:
             # keep track of idmapping int_locs that are in df_merged_validation_csvs
             mask = idmap_df["internalLocation"].isin(df_merged_validation_csvs["LOC_ID"])
             assert len(mask) == len(idmap_df)
             # update idmap_df[is_in_a_validation] to True when mask is True (never True to False!)
             idmap_df.loc[mask, is_in_a_validation] = True
 
-            for idx, row in df_merged_validation_csvs.iterrows():
-                # drop all empty columns current row so we can use row.keys() to check if value is missing
-                row = row.dropna()
-                # go from int_loc to 1 or more int_pars based on id_mapping
-                # eg: from 'KW101310' to ['H.S.0', 'H2.S.0']
-                int_pars = HelperValidationRules.get_int_pars(
-                    idmap_df_grouped_by_intloc=idmap_df_grouped_by_intloc, int_loc=row["LOC_ID"]
-                )
-                if not int_pars:
-                    logger.debug(f"no problem, int_loc {row['LOC_ID']} not in IdOPVLWATER")
-                    continue
-                errors = HelperValidationRules.check_attributes_too_few_or_many(
-                    errors=errors,
-                    loc_set=loc_set,
-                    row=row,
-                    int_pars=int_pars,
-                )
-                for validation_rule in loc_set.validation_rules:
-                    matching_int_pars = [int_par.startswith(validation_rule["parameter"]) for int_par in int_pars]
-                    if not any(matching_int_pars):
-                        continue
-                    rule = validation_rule["extreme_values"]
-                    if loc_set in (self.hoofdloc, self.subloc):
-                        errors = HelperValidationRules.check_hoofd_and_sub_loc(
-                            errors=errors, rule=rule, row=row, int_pars=int_pars
-                        )
-                    elif loc_set == self.waterstandloc:
-                        errors = HelperValidationRules.check_waterstandstand_loc(
-                            errors=errors, rule=rule, row=row, int_pars=int_pars
-                        )
-
         new_csv_creator = NewValidationCsvCreator(
             fews_config=self.fews_config,
             hoofdloc=self.hoofdloc,
             subloc=self.subloc,
             waterstandloc=self.waterstandloc,
             idmap_df=idmap_df,
+            validation_rule_tables=tables,
         )
         self._validation_csvs_new = new_csv_creator.run()
         # bad design.. but new_csv_creator.idmap_df is updated in the meantime with two new columns
@@ -1515,8 +1896,7 @@ class MptConfigChecker:
             "fout": [],
         }
 
-        idmaps = self._get_idmaps(idmap_files=["IdOPVLWATER"])
-        idmap_df = pd.DataFrame(data=idmaps)
+        idmap_df = self._get_idmap_df(idmap_files=["IdOPVLWATER"])
 
         # about 12 OW locations have a ex_par 'H' (instead of 'H.B.x' or H.G.x').
         # roger: "Alle histtags horen altijd een volgnummer te hebben en HO of HB te zijn.
@@ -1575,14 +1955,8 @@ class MptConfigChecker:
         )
         return excel_sheet
 
-    def check_location_set_errors(self, sheet_name: str = "loc_set error") -> ExcelSheet:
-        """Check on errors in locationsets."""
-        description = (
-            "controle of alle locatiesets logisch zijn opgebouwd, de juiste attribuut-verwijzingen"
-            " hebben én consistent zijn per CAW-locatie"
-        )
-        logger.info(f"start {self.check_location_set_errors.__name__} with sheet_name={sheet_name}")
-
+    def _get_location_set_error_rows(self) -> pd.DataFrame:
+        """Errors of the location set rows (in self.caw_shard), with per row its rank (loc_set nr, row nr)."""
         loc_set_errors = {
             "locationId": [],
             "caw_code": [],
@@ -1602,9 +1976,11 @@ class MptConfigChecker:
             "missing_hbenps": [],
             "missing_h_loc": [],
             "xy_not_same": [],
+            shard_rank: [],
         }
+        subloc_xy_not_same = self._get_subloc_xy_not_same()
 
-        for loc_set in (self.hoofdloc, self.subloc, self.waterstandloc, self.mswloc, self.psloc):
+        for loc_set_nr, loc_set in enumerate((self.hoofdloc, self.subloc, self.waterstandloc, self.mswloc, self.psloc)):
             if loc_set.skip_check_location_set_error:
                 continue
             int_locs = []
@@ -1619,7 +1995,10 @@ class MptConfigChecker:
             if loc_set in (self.hoofdloc, self.subloc):
                 int_locs = [loc for loc in int_locs if loc[-1] != "0"]
 
-            for idx, row in list(loc_set.geo_df.iterrows()):
+            # plain strings: a .str method on a categorical runs on all categories of the (shared) vocabulary
+            loc_set_loc_ids = loc_set.df["LOC_ID"].astype(str)
+            loc_set_df = filter_caw_shard(df=loc_set.df, loc_id_column="LOC_ID", caw_shard=self.caw_shard)
+            for idx, row in list(loc_set_df.iterrows()):
                 error = {
                     "name_error": False,
                     "caw_name_inconsistent": False,
@@ -1647,9 +2026,6 @@ class MptConfigChecker:
 
                 if loc_set == self.subloc:
 
-                    # TODO: moet dit wel hoofdlocaties zijn?
-                    #  par_gdf = self.location_sets["hoofdlocaties"]["gdf"]
-                    par_gdf = self.hoofdloc.geo_df
                     loc_function = row["FUNCTIE"]
                     sub_type = row["TYPE"]
 
@@ -1672,34 +2048,32 @@ class MptConfigChecker:
                     if not error["name_error"]:
                         caw_name = re.match(pattern="([A-Z0-9 ]*)_", string=loc_name).group(1)
                         if not all(
-                            loc_set.geo_df[loc_set.geo_df["LOC_ID"].str.match(f"..{caw_code}")]["LOC_NAME"].str.match(
+                            loc_set.df[loc_set_loc_ids.str.match(f"..{caw_code}")]["LOC_NAME"].str.match(
                                 f"({caw_name}_{caw_code}-K)"
                             )
                         ):
                             error["caw_name_inconsistent"] = True
 
-                    if row["HBOV"] not in self.waterstandloc.geo_df["LOC_ID"].values:
+                    if row["HBOV"] not in self.waterstandloc.df["LOC_ID"].values:
                         error["missing_hbov"] = True
 
-                    if row["HBEN"] not in self.waterstandloc.geo_df["LOC_ID"].values:
+                    if row["HBEN"] not in self.waterstandloc.df["LOC_ID"].values:
                         error["missing_hben"] = True
 
-                    if row["HBOVPS"] not in self.psloc.geo_df["LOC_ID"].values:
+                    if row["HBOVPS"] not in self.psloc.df["LOC_ID"].values:
                         error["missing_hbovps"] = True
 
-                    if row["HBENPS"] not in self.psloc.geo_df["LOC_ID"].values:
+                    if row["HBENPS"] not in self.psloc.df["LOC_ID"].values:
                         error["missing_hbenps"] = True
 
-                    if row["PAR_ID"] not in self.hoofdloc.geo_df["LOC_ID"].values:
+                    if row["PAR_ID"] not in self.hoofdloc.df["LOC_ID"].values:
                         error["missing_h_loc"] = True
 
                     else:
                         if not any(
                             [re.match(pattern=loc, string=loc_id) for loc in self.ignored_xy["internalLocation"]]
                         ):
-                            par_gdf_row = par_gdf[par_gdf["LOC_ID"] == row["PAR_ID"]]
-                            par_gdf_geom = par_gdf_row["geometry"].values[0]
-                            if not par_gdf_geom.equals(row["geometry"]):
+                            if subloc_xy_not_same[idx]:
                                 error["xy_not_same"] = True
 
                     if any(error.values()):
@@ -1717,13 +2091,13 @@ class MptConfigChecker:
                     if not error["name_error"]:
                         caw_name = re.match(pattern="([A-Z0-9 ]*)_", string=loc_name).group(1)
                         if not all(
-                            loc_set.geo_df[loc_set.geo_df["LOC_ID"].str.match(f"..{caw_code}")]["LOC_NAME"].str.match(
+                            loc_set.df[loc_set_loc_ids.str.match(f"..{caw_code}")]["LOC_NAME"].str.match(
                                 f"({caw_name}_{caw_code}-w)"
                             )
                         ):
                             error["caw_name_inconsistent"] = True
 
-                    if row["PEILSCHAAL"] not in self.psloc.geo_df["LOC_ID"].values:
+                    if row["PEILSCHAAL"] not in self.psloc.df["LOC_ID"].values:
                         error["missing_peilschaal"] = True
 
                     if loc_id not in int_locs:
@@ -1737,8 +2111,21 @@ class MptConfigChecker:
                     loc_set_errors["location_name"].append(loc_name)
                     for key, value in error.items():
                         loc_set_errors[key].append(value)
+                    loc_set_errors[shard_rank].append((loc_set_nr, idx))
+        return pd.DataFrame(data=loc_set_errors)
 
-        result_df = pd.DataFrame(data=loc_set_errors)
+    def check_location_set_errors(
+        self, sheet_name: str = "loc_set error", shard_rows: List[pd.DataFrame] = None
+    ) -> ExcelSheet:
+        """Check on errors in locationsets. shard_rows are the rows of all shards, if run in shards."""
+        description = (
+            "controle of alle locatiesets logisch zijn opgebouwd, de juiste attribuut-verwijzingen"
+            " hebben én consistent zijn per CAW-locatie"
+        )
+        logger.info(f"start {self.check_location_set_errors.__name__} with sheet_name={sheet_name}")
+        if shard_rows is None:
+            shard_rows = [self._get_location_set_error_rows()]
+        result_df = merge_shard_rows(frames=shard_rows)
         if len(result_df) == 0:
             logger.info("no errors in locationSets")
         else:
@@ -1748,47 +2135,31 @@ class MptConfigChecker:
         )
         return excel_sheet
 
-    def _add_input_files_to_results(self) -> None:
+    def _add_input_files_to_results(self, check_inputs: List[CheckInputChoices] = None) -> None:
         """each input files is a excel sheet with type is input, as opposeded to check results results which are
-        excel sheets with type is output."""
-        self.results.add_sheet(
-            excelsheet=ExcelSheet(
-                name="ignored_ex_loc",
-                description=constants.PathConstants.ignored_ex_loc.value.description,
-                df=self.ignored_ex_loc,
-                sheet_type=ExcelSheetTypeChoices.input,
-            )
-        )
-        self.results.add_sheet(
-            excelsheet=ExcelSheet(
-                name="ignored_histtag",
-                description=constants.PathConstants.ignored_histtag.value.description,
-                df=self.ignored_histtag,
-                sheet_type=ExcelSheetTypeChoices.input,
-            )
-        )
-        self.results.add_sheet(
-            excelsheet=ExcelSheet(
-                name="ignored_ts800",
-                description=constants.PathConstants.ignored_ts800.value.description,
-                df=self.ignored_ts800,
-                sheet_type=ExcelSheetTypeChoices.input,
-            )
-        )
-        self.results.add_sheet(
-            excelsheet=ExcelSheet(
-                name="ignored_xy",
-                description=constants.PathConstants.ignored_xy.value.description,
-                df=self.ignored_xy,
-                sheet_type=ExcelSheetTypeChoices.input,
+        excel sheets with type is output. If check_inputs is given, then only these input files are added."""
+        for check_input in (
+            CheckInputChoices.ignored_ex_loc,
+            CheckInputChoices.ignored_histtag,
+            CheckInputChoices.ignored_ts800,
+            CheckInputChoices.ignored_xy,
+        ):
+            if check_inputs is not None and check_input not in check_inputs:
+                continue
+            self.results.add_sheet(
+                excelsheet=ExcelSheet(
+                    name=check_input.value,
+                    description=self.path_constants[check_input.value].value.description,
+                    df=getattr(self, check_input.value),
+                    sheet_type=ExcelSheetTypeChoices.input,
+                )
             )
-        )
 
     def _add_paths_to_results(self) -> None:
         columns = ["name", "path", "description"]
         data = [
             (path_constant.name, path_constant.value.path.as_posix(), path_constant.value.description)
-            for path_constant in constants.PathConstants
+            for path_constant in self.path_constants
         ]
         path_df = pd.DataFrame(data=data, columns=columns)
         excelsheet = ExcelSheet(
@@ -1821,40 +2192,94 @@ class MptConfigChecker:
         )
         self.results.add_sheet(excelsheet=excelsheet)
 
-    def run(self):
-        self.results.add_sheet(excelsheet=self.check_idmap_int_loc_in_csv())
-        self.results.add_sheet(excelsheet=self.check_dates_loc_sets())
-        self.results.add_sheet(excelsheet=self.check_idmap_sections())
-        self.results.add_sheet(excelsheet=self.check_ignored_histtags())
-        self.results.add_sheet(excelsheet=self.check_histtags_nomatch())
-        self.results.add_sheet(excelsheet=self.check_double_idmaps())
-        self.results.add_sheet(excelsheet=self.check_missing_pars())
-        self.results.add_sheet(excelsheet=self.check_s_loc_consistency())
-
-        # check returns two results
-        sheet1, sheet2 = self.check_ex_par_errors_int_loc_missing()
-        self.results.add_sheet(excelsheet=sheet1)
-        self.results.add_sheet(excelsheet=sheet2)
-
-        self.results.add_sheet(excelsheet=self.check_ex_par_missing())
-        self.results.add_sheet(excelsheet=self.check_ex_loc_int_loc_mismatch())
-        self.results.add_sheet(excelsheet=self.check_timeseries_logic())
-        self.results.add_sheet(excelsheet=self.check_validation_rules())
-        self.results.add_sheet(excelsheet=self.check_int_par_ex_par_mismatch())
-        self.results.add_sheet(excelsheet=self.check_location_set_errors())
-
-        # add output_no_check sheets
+    def _add_performance_to_results(self) -> None:
+        excelsheet = ExcelSheet(
+            name="performance",
+            df=self.performance.to_df(),
+            description="rekentijd, cpu tijd, piek geheugen (alleen met trace_memory), aantal rijen en cache "
+            "hits/misses per check en per ingelezen input",
+            sheet_type=ExcelSheetTypeChoices.output_no_check,
+        )
+        self.results.add_sheet(excelsheet=excelsheet)
+
+    def _add_output_no_check_sheets(self, check_inputs: List[CheckInputChoices], is_full_run: bool) -> None:
         self._add_tab_color_description_to_results()
         self._add_paths_to_results()
-        self._add_input_files_to_results()
-        self._add_mpt_histtags_new_to_results()
-
-        # write excel file with check results
-        excel_writer = ExcelWriter(results=self.results)
-        excel_writer.write()
-
-        # write new csv files
-        self._write_new_opvlwater_hoofdloc_csv()
-        self._write_new_opvlwater_subloc_csv()
-        self._write_new_waterstandlocaties_csv()
-        self._write_new_validation_csvs()
+        self._add_input_files_to_results(check_inputs=check_inputs)
+        if is_full_run:
+            self._add_mpt_histtags_new_to_results()
+        self._add_performance_to_results()
+
+    def _write_performance_json(self) -> None:
+        """Write all performance measurements (also of e.g. creating the new csvs) next to the result xlsx."""
+        result_xlsx = self.path_constants.result_xlsx.value.path
+        self.performance.to_json(path=result_xlsx.parent / f"{result_xlsx.stem}_performance.json")
+
+    def run(
+        self,
+        result_sinks: List[ResultSinkChoices] = None,
+        checks: List[CheckChoices] = None,
+        max_workers: int = None,
+        use_processes: bool = False,
+        result_cache_dir: Path = None,
+        prefetch: bool = True,
+        input_store_path: Path = None,
+        nr_shards: int = None,
+    ):
+        """Run checks (default all) and write the results to result_sinks (default only the excel file).
+        Only the inputs that the checks need are loaded. New csvs are only written if all checks are run.
+        By default independent checks run concurrently in threads: max_workers defaults to 1 per cpu, up to 4.
+        With use_processes=True they run in processes instead. max_workers=1 gives the old sequential behaviour:
+        all checks run one by one in this process.
+        With a result_cache_dir, checks whose input files did not change since a previous run are not run again
+        but their results are read from that dir (see CheckResultCache). Hits/misses are in self.result_cache.
+        With prefetch=True all input files are first read concurrently into memory (see prefetch_inputs).
+        With an input_store_path the inputs are stored in (or reused from) a SQLite database, and check_double_idmaps
+        and check_idmap_int_loc_in_csv run as SQL queries on it (see InputStore).
+        With nr_shards > 1 checks that loop over locations run per caw code shard in a process pool, each shard on
+        its own range of caw codes (see ShardedCheckRunner)."""
+        result_sinks = result_sinks if result_sinks else [ResultSinkChoices.xlsx]
+        checks = checks if checks else list(CheckChoices)
+        is_full_run = set(checks) == set(CheckChoices)
+        self.result_cache = CheckResultCache(cache_dir=result_cache_dir) if result_cache_dir else None
+        self.input_store = InputStore(db_path=input_store_path) if input_store_path else None
+        scheduler = CheckScheduler(
+            checker=self,
+            checks=checks,
+            max_workers=max_workers,
+            use_processes=use_processes,
+            result_cache=self.result_cache,
+            shard_runner=ShardedCheckRunner(checker=self, nr_shards=nr_shards) if nr_shards else None,
+        )
+        # all input files are read concurrently, then parsed from memory (the cache is emptied afterwards)
+        with FileByteCache.prefetched():
+            if prefetch:
+                self.prefetch_inputs(check_inputs=scheduler.inputs)
+            if self.input_store:
+                # before any check runs, as checks mutate their inputs
+                self.input_store.load(checker=self, check_inputs=scheduler.inputs)
+            try:
+                for excel_sheet in scheduler.run():
+                    self.results.add_sheet(excelsheet=excel_sheet)
+            finally:
+                if scheduler.shard_runner:
+                    scheduler.shard_runner.close()
+            self._add_output_no_check_sheets(check_inputs=scheduler.inputs, is_full_run=is_full_run)
+
+            # write excel file (and/or columnar result files) with check results
+            write_results(
+                results=self.results,
+                result_sinks=result_sinks,
+                result_xlsx=self.path_constants.result_xlsx.value.path,
+            )
+
+            if not is_full_run:
+                logger.info(f"skip creating new csvs as only {len(checks)} of {len(CheckChoices)} checks were run")
+                self._write_performance_json()
+                return
+            # write new csv files
+            self._write_new_opvlwater_hoofdloc_csv()
+            self._write_new_opvlwater_subloc_csv()
+            self._write_new_waterstandlocaties_csv()
+            self._write_new_validation_csvs()
+            self._write_performance_json()
@@ -1,11 +1,13 @@
+from collections import namedtuple
 from mptconfig import constants
 from mptconfig.fews_utilities import FewsConfig
 from mptconfig.idmapping_choices import IntLocChoices
-from mptconfig.utils import equal_dataframes
+from mptconfig.prefetch import FileByteCache
+from mptconfig.utils import get_df_fingerprint
 from pathlib import Path
 from typing import Dict
 from typing import List
-from typing import TypeVar
+from typing import Tuple
 
 import logging
 import pandas as pd  # noqa pandas comes with geopandas
@@ -14,29 +16,36 @@ import pandas as pd  # noqa pandas comes with geopandas
 logger = logging.getLogger(__name__)
 
 
-PandasDFGroupBy = TypeVar(name="pd.core.groupby.generic.DataFrameGroupBy")  # noqa
-
 added_to_new_validation = "added_to_new_validation"
 is_in_a_validation = "is_in_a_validation"
 
+# per location set and int_pars: the validation attributes that are required, those that are not allowed, and the
+# extreme_values of the validation rules that apply (e.g. [{'hmax': 'HS1_HMAX', 'hmin': 'HS1_HMIN'}])
+ValidationAttribsNamedTuple = namedtuple("ValidationAttribsNamedTuple", ["required", "not_allowed", "rules"])
+
 
 class NewValidationCsv:
-    def __init__(self, orig_filepath: Path, df: pd.DataFrame):
+    def __init__(self, orig_filepath: Path, df: pd.DataFrame, orig_fingerprint: int = None):
+        """orig_fingerprint is the (unordered) fingerprint of the original csv (see get_df_fingerprint). If not
+        given, the original csv is read again to compute it."""
         self.orig_filepath = orig_filepath
         self.df = df
+        self.orig_fingerprint = orig_fingerprint
         self.validate_constructor()
 
     def validate_constructor(self):
         assert isinstance(self.orig_filepath, Path)
         assert self.orig_filepath.is_file()
         assert isinstance(self.df, pd.DataFrame)
-        orig_df = pd.read_csv(
-            filepath_or_buffer=self.orig_filepath,
-            sep=None,
-            engine="python",
-        )
+        if self.orig_fingerprint is None:
+            orig_df = pd.read_csv(
+                filepath_or_buffer=FileByteCache.get_source(path=self.orig_filepath),
+                sep=None,
+                engine="python",
+            )
+            self.orig_fingerprint = get_df_fingerprint(df=orig_df, ordered=False)
         assert not self.df.empty
-        assert not equal_dataframes(expected_df=self.df, test_df=orig_df)
+        assert get_df_fingerprint(df=self.df, ordered=False) != self.orig_fingerprint
 
 
 class NewValidationCsvCreator:
@@ -47,17 +56,22 @@ class NewValidationCsvCreator:
         subloc: constants.SubLocationSet,
         waterstandloc: constants.WaterstandLocationSet,
         idmap_df: pd.DataFrame,
+        validation_rule_tables: "ValidationRuleTables" = None,
     ):
+        """validation_rule_tables (of the same idmaps) are built from idmap_df if not given."""
         self.fews_config = fews_config
         self.hoofdloc = hoofdloc
         self.subloc = subloc
         self.waterstandloc = waterstandloc
         self.idmap_df = idmap_df
+        self.validation_rule_tables = (
+            validation_rule_tables if validation_rule_tables else ValidationRuleTables(idmap_df=idmap_df)
+        )
         assert is_in_a_validation in self.idmap_df.columns
         self.ensure_config_matches_constants()
 
     def ensure_config_matches_constants(self) -> None:
-        """Ensure that config has same validation csv names as define in constants. """
+        """Ensure that config has same validation csv names as define in constants."""
         config_validation_csv_filenames = [x for x in self.fews_config.MapLayerFiles.keys() if "validatie" in x]
         expected_validation_csv_filenames = [x.value for x in constants.ValidationCsvChoices]
         too_few = set(expected_validation_csv_filenames).difference(set(config_validation_csv_filenames))
@@ -65,7 +79,7 @@ class NewValidationCsvCreator:
 
     def __get_int_loc_row_from_hoofd_sub_ow_loc_set(self, int_loc: str) -> pd.Series:
         row = None
-        for loc_set_df in (self.hoofdloc.geo_df, self.subloc.geo_df, self.waterstandloc.geo_df):
+        for loc_set_df in (self.hoofdloc.df, self.subloc.df, self.waterstandloc.df):
             int_loc_df = loc_set_df[loc_set_df["LOC_ID"] == int_loc]
             if int_loc_df.empty:
                 continue
@@ -75,7 +89,7 @@ class NewValidationCsvCreator:
         return row
 
     def get_new_csv_data(self) -> pd.DataFrame:
-        """Gather new validation csv data: filename, int_loc, startdate, enddate for location sets. """
+        """Gather new validation csv data: filename, int_loc, startdate, enddate for location sets."""
         self.idmap_df[added_to_new_validation] = False
         row_collector = []
         for idx, row in self.idmap_df.iterrows():
@@ -92,7 +106,7 @@ class NewValidationCsvCreator:
                     logger.debug(f"no validation csv for int_loc={row_int_loc}, int_par={row_int_par}")
                     continue
                 loc_type = "waterstand"
-            filename = constants.ValidationCsvChoices.get_validation_csv_name(int_par=row_int_par, loc_type=loc_type)
+            filename = self.validation_rule_tables.get_validation_csv_name(int_par=row_int_par, loc_type=loc_type)
             if not filename:
                 continue
             self.idmap_df[added_to_new_validation][idx] = True
@@ -126,11 +140,12 @@ class NewValidationCsvCreator:
             file_path = self.fews_config.MapLayerFiles[filename]
             logger.debug(f"adding {len(filename_group)} rows to {file_path.name}")
             df = pd.read_csv(
-                filepath_or_buffer=file_path,
+                filepath_or_buffer=FileByteCache.get_source(path=file_path),
                 sep=None,
                 engine="python",
             )
             assert (LOC_ID and STARTDATE and STARTDATE) in df.columns
+            orig_fingerprint = get_df_fingerprint(df=df, ordered=False)
             df.sort_values(by=list(df.columns), ascending=True, inplace=True)
             # add empty new rows to csv bottom
             for idx, row in filename_group.iterrows():
@@ -143,11 +158,65 @@ class NewValidationCsvCreator:
                     ignore_index=True,
                 )
 
-            new_csv = NewValidationCsv(orig_filepath=file_path, df=df)
+            new_csv = NewValidationCsv(orig_filepath=file_path, df=df, orig_fingerprint=orig_fingerprint)
             collector.append(new_csv)
         return collector
 
 
+class ValidationRuleTables:
+    """Lookup tables for check_validation_rules, built once per run, so that the work per validation csv row is
+    only dict lookups:
+        - int_pars: per int_loc its sorted int_pars in the idmaps, e.g. {'KW101310': ('H.S.0', 'H2.S.0')};
+        - attribs: per (location set name, int_pars) a ValidationAttribsNamedTuple (filled on first use);
+        - validation_csv_names: per (int_par, loc_type) the validation csv name (see get_validation_csv_name), for
+          all int_pars in the idmaps and all loc_types in INTPAR_2_VALIDATION_CSV.
+    The validation logic statements (see ValidationLogic) are precomputed as well.
+    """
+
+    def __init__(self, idmap_df: pd.DataFrame):
+        self.int_pars = {
+            int_loc: tuple(sorted(int_loc_group["internalParameter"].unique().tolist()))
+            for int_loc, int_loc_group in idmap_df.groupby("internalLocation", observed=True)
+        }
+        self.attribs = {}
+        loc_types = sorted(
+            set(loc_type for mapper in constants.INTPAR_2_VALIDATION_CSV.values() for loc_type in mapper)
+        )
+        self.validation_csv_names = {
+            (int_par, loc_type): constants.ValidationCsvChoices.get_validation_csv_name(
+                int_par=int_par, loc_type=loc_type
+            )
+            for int_par in idmap_df["internalParameter"].unique()
+            for loc_type in loc_types
+        }
+        self.hloc_sloc_statements = constants.ValidationLogic.get_hloc_sloc_validation_logic()
+        self.wloc_statements = constants.ValidationLogic.get_wloc_validation_logic()
+
+    def get_int_pars(self, int_loc: str) -> Tuple[str, ...]:
+        """Int_pars of int_loc, e.g. from 'KW101310' to ('H.S.0', 'H2.S.0'). Empty if int_loc has no idmap."""
+        return self.int_pars.get(int_loc, ())
+
+    def get_validation_csv_name(self, int_par: str, loc_type: str) -> str:
+        """Validation csv name of int_par and loc_type, e.g. 'oppvlwater_kunstvalidatie_streef1'. Empty if none."""
+        return self.validation_csv_names.get((int_par, loc_type)) or ""
+
+    def get_attribs(self, loc_set: constants.LocationSet, int_pars: Tuple[str, ...]) -> ValidationAttribsNamedTuple:
+        key = (loc_set.name, int_pars)
+        if key not in self.attribs:
+            attribs_all = loc_set.get_validation_attributes(int_pars=None)
+            attribs_required = loc_set.get_validation_attributes(int_pars=list(int_pars))
+            self.attribs[key] = ValidationAttribsNamedTuple(
+                required=attribs_required,
+                not_allowed=[attrib for attrib in attribs_all if attrib not in attribs_required],
+                rules=[
+                    validation_rule["extreme_values"]
+                    for validation_rule in loc_set.validation_rules
+                    if any(int_par.startswith(validation_rule["parameter"]) for int_par in int_pars)
+                ],
+            )
+        return self.attribs[key]
+
+
 class HelperValidationRules:
     """
     for hoofdloc, subloc and waterstandloc this general rule applies:
@@ -164,15 +233,6 @@ class HelperValidationRules:
         WIN <= OV <= ZOM
     """
 
-    @classmethod
-    def get_int_pars(cls, idmap_df_grouped_by_intloc: PandasDFGroupBy, int_loc: str) -> List[str]:
-        try:
-            int_loc_group = idmap_df_grouped_by_intloc.get_group(name=int_loc)
-            int_pars = sorted(int_loc_group["internalParameter"].unique().tolist())
-        except KeyError:
-            int_pars = []
-        return int_pars
-
     @classmethod
     def check_idmapping_int_loc_in_a_validation(cls, errors: Dict, idmap_df: pd.DataFrame) -> Dict:
         for idx, row in idmap_df.iterrows():
@@ -203,11 +263,18 @@ class HelperValidationRules:
         loc_set: constants.LocationSet,
         row: pd.Series,
         int_pars: List[str],
+        validation_attribs: ValidationAttribsNamedTuple = None,
     ) -> Dict:
-        attribs_all = loc_set.get_validation_attributes(int_pars=None)
-        attribs_required = loc_set.get_validation_attributes(int_pars=int_pars)
+        """validation_attribs (see ValidationRuleTables.get_attribs) are derived from loc_set if not given."""
+        if validation_attribs is None:
+            attribs_all = loc_set.get_validation_attributes(int_pars=None)
+            attribs_required = loc_set.get_validation_attributes(int_pars=int_pars)
+            attribs_not_allowed = [attrib for attrib in attribs_all if attrib not in attribs_required]
+        else:
+            attribs_required = validation_attribs.required
+            attribs_not_allowed = validation_attribs.not_allowed
         too_few = [attrib for attrib in attribs_required if attrib not in row.keys()]
-        too_many = [attrib for attrib in attribs_all if (attrib not in attribs_required) and (attrib in row.keys())]
+        too_many = [attrib for attrib in attribs_not_allowed if attrib in row.keys()]
         if too_few:
             errors = cls.__add_one_error(
                 row=row, int_pars=int_pars, error_type="too_few", description=",".join(too_few), errors=errors
@@ -260,7 +327,14 @@ class HelperValidationRules:
         return errors
 
     @classmethod
-    def check_hoofd_and_sub_loc(cls, errors: Dict, rule: Dict, row: pd.Series, int_pars: List[str]) -> Dict:
+    def check_hoofd_and_sub_loc(
+        cls,
+        errors: Dict,
+        rule: Dict,
+        row: pd.Series,
+        int_pars: List[str],
+        statements: List[Tuple[str, str, str]] = None,
+    ) -> Dict:
         """
         hoofd- and sublocations have only 1 value for hmax, hmin, and eventually one for smax, smax
         Examples:
@@ -275,7 +349,8 @@ class HelperValidationRules:
 
         Compare values separately and only report error if both values are defined (not nan).
         """
-        for statement in constants.ValidationLogic.get_hloc_sloc_validation_logic():
+        statements = statements if statements else constants.ValidationLogic.get_hloc_sloc_validation_logic()
+        for statement in statements:
             _lower, operator, _upper = statement
             _lower_rule = rule.get(_lower, "")  # e.g. from smin to 'HS1_HMIN'
             _upper_rule = rule.get(_upper, "")
@@ -285,7 +360,14 @@ class HelperValidationRules:
         return errors
 
     @classmethod
-    def check_waterstandstand_loc(cls, errors: Dict, rule: Dict, row: pd.Series, int_pars: List[str]) -> Dict:
+    def check_waterstandstand_loc(
+        cls,
+        errors: Dict,
+        rule: Dict,
+        row: pd.Series,
+        int_pars: List[str],
+        statements: List[Tuple[str, str, str]] = None,
+    ) -> Dict:
         """
         waterstandlocations have 1 value for hmax and hmin, 3 values for smax and smin
         Examples:
@@ -312,7 +394,8 @@ class HelperValidationRules:
 
         Compare values separately and only report error if both values are defined (not nan).
         """
-        for statement in constants.ValidationLogic.get_wloc_validation_logic():
+        statements = statements if statements else constants.ValidationLogic.get_wloc_validation_logic()
+        for statement in statements:
             _lower, operator, _upper = statement
             _lower_rule = rule.get(_lower, "")  # e.g. from smin to 'HS1_HMIN'
             _upper_rule = rule.get(_upper, "")
@@ -342,7 +425,7 @@ class HelperValidationRules:
         2) getting csvfile_paths from MapLayerFiles[attribute_file_name]
         """
         assert isinstance(loc_set, constants.LocationSet)
-        location_set_df = loc_set.geo_df
+        location_set_df = loc_set.df
 
         merged_csv_file_names = []
         for attrib_file in loc_set.attrib_files:
@@ -351,7 +434,7 @@ class HelperValidationRules:
             attrib_file_name = Path(attrib_file["csvFile"]).stem
             csv_file_path = fews_config.MapLayerFiles[attrib_file_name]
             attrib_df = pd.read_csv(
-                filepath_or_buffer=csv_file_path,
+                filepath_or_buffer=FileByteCache.get_source(path=csv_file_path),
                 sep=None,
                 engine="python",
             )
@@ -0,0 +1,273 @@
+from lxml import etree as ET  # noqa
+from mptconfig import constants
+from mptconfig.check_registry import CheckChoices
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.excel import ExcelSheet
+from mptconfig.excel import ExcelSheetTypeChoices
+from mptconfig.fews_utilities import FewsConfig
+from mptconfig.fews_utilities import xml_to_dict
+from mptconfig.fews_utilities import XmlDigest
+from mptconfig.parse_cache import ParsedFileCache
+from pathlib import Path
+from typing import List
+from typing import Optional
+from typing import Set
+
+import logging
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+logger = logging.getLogger(__name__)
+
+DIFF_COLUMNS = ["kind", "source", "key", "change", "column", "old", "new"]
+
+LOCATION_SET_CLASSES = {
+    CheckInputChoices.hoofdloc: constants.HoofdLocationSet,
+    CheckInputChoices.subloc: constants.SubLocationSet,
+    CheckInputChoices.waterstandloc: constants.WaterstandLocationSet,
+    CheckInputChoices.mswloc: constants.MswLocationSet,
+    CheckInputChoices.psloc: constants.PeilschaalLocationSet,
+}
+
+
+def diff_frames(old_df: pd.DataFrame, new_df: pd.DataFrame, key_columns: List[str]) -> pd.DataFrame:
+    """Keyed diff of two frames with one hash join (pd.merge). Returns a df with columns 'key', 'change' (added,
+    removed or changed), 'column', 'old' and 'new': one row per added/removed key and one row per changed value.
+    All values are compared as str. A key that occurs more than once is matched on its nth occurrence."""
+    value_columns = sorted(set(old_df.columns).union(new_df.columns).difference(key_columns))
+    frames = []
+    for df in (old_df, new_df):
+        df = df.reindex(columns=key_columns + value_columns).fillna("").astype(str)
+        df = df.sort_values(by=key_columns + value_columns, ignore_index=True)
+        df["key"] = (
+            df[key_columns[0]].str.cat(others=df[key_columns[1:]], sep="|")
+            if len(key_columns) > 1
+            else df[key_columns[0]]
+        )
+        df["occurrence"] = df.groupby("key", sort=False).cumcount()
+        frames.append(df.drop(columns=key_columns))
+    merged = frames[0].merge(
+        frames[1], on=["key", "occurrence"], how="outer", suffixes=("_old", "_new"), indicator=True
+    )
+    diffs = [
+        pd.DataFrame(data={"key": merged.loc[merged["_merge"] == side, "key"], "change": change})
+        for side, change in (("left_only", "removed"), ("right_only", "added"))
+    ]
+    in_both = merged[merged["_merge"] == "both"]
+    for column in value_columns:
+        changed = in_both[in_both[f"{column}_old"] != in_both[f"{column}_new"]]
+        diffs.append(
+            pd.DataFrame(
+                data={
+                    "key": changed["key"],
+                    "change": "changed",
+                    "column": column,
+                    "old": changed[f"{column}_old"],
+                    "new": changed[f"{column}_new"],
+                }
+            )
+        )
+    diff_df = pd.concat(diffs, ignore_index=True)
+    return diff_df.reindex(columns=["key", "change", "column", "old", "new"])
+
+
+class ConfigDiff:
+    """Semantic diff between two FEWS configs: what changed in idmaps, location sets, validation (attribute) csvs
+    and parameters. Each source is parsed into a table and diffed on its key (see diff_frames), e.g. per LOC_ID the
+    location attributes that changed. A source whose files are byte-identical in both configs is not parsed at all.
+    Other config files (xml and csv) are only compared on content. Xml files that only differ in layout (e.g.
+    indentation or attribute order) have the same canonical digest (see XmlDigest), so they are not changed.
+
+    The checks that are affected by the changes (see get_affected_checks) can be run on the new config only, instead
+    of running all checks on both configs and comparing workbooks.
+
+    Example:
+        config_diff = ConfigDiff(old_config_path=Path(.../201902/config), new_config_path=Path(.../202002/config))
+        config_diff.diff_df  # columns kind, source, key, change, column, old, new
+        config_diff.get_affected_checks()  # e.g. [CheckChoices.idmap_int_loc_in_csv, ...]
+    """
+
+    def __init__(self, old_config_path: Path, new_config_path: Path):
+        self.old_config = FewsConfig(path=old_config_path)
+        self.new_config = FewsConfig(path=new_config_path)
+        self._changed_inputs = set()
+        # names of files that are diffed per entity (so not only on content)
+        self._diffed_files = set()
+        self._diff_df = None
+
+    @staticmethod
+    def _is_same_file(old_path: Path, new_path: Path) -> bool:
+        if ParsedFileCache.get_file_hash(path=old_path) == ParsedFileCache.get_file_hash(path=new_path):
+            return True
+        if not old_path.suffix == new_path.suffix == ".xml":
+            return False
+        try:
+            return (
+                XmlDigest.from_file(xml_filepath=old_path).digest == XmlDigest.from_file(xml_filepath=new_path).digest
+            )
+        except ET.XMLSyntaxError:
+            return False
+
+    def _is_same(self, old_paths: List[Optional[Path]], new_paths: List[Optional[Path]]) -> bool:
+        """Are the files the same in both configs: byte-identical or (xml) with the same canonical digest? None means
+        that a file does not exist."""
+        self._diffed_files.update(path.name for path in old_paths + new_paths if path)
+        if len(old_paths) != len(new_paths) or None in old_paths or None in new_paths:
+            return False
+        return all(
+            self._is_same_file(old_path=old_path, new_path=new_path) for old_path, new_path in zip(old_paths, new_paths)
+        )
+
+    @staticmethod
+    def _add_source(diff_df: pd.DataFrame, kind: str, source: str) -> pd.DataFrame:
+        diff_df.insert(loc=0, column="source", value=source)
+        diff_df.insert(loc=0, column="kind", value=kind)
+        return diff_df
+
+    def _diff_idmaps(self) -> List[pd.DataFrame]:
+        diffs = []
+        for idmap in constants.IDMAP_FILES:
+            old_path = self.old_config.IdMapFiles.get(idmap)
+            new_path = self.new_config.IdMapFiles.get(idmap)
+            if self._is_same(old_paths=[old_path], new_paths=[new_path]):
+                continue
+            old_df, new_df = [
+                pd.DataFrame(data=xml_to_dict(xml_filepath=path)["idMap"]["map"] if path else [])
+                for path in (old_path, new_path)
+            ]
+            # an external series (location and parameter) that maps to another internal one is a changed map
+            diff_df = diff_frames(old_df=old_df, new_df=new_df, key_columns=["externalLocation", "externalParameter"])
+            if not diff_df.empty:
+                self._changed_inputs.update([CheckInputChoices.idmaps, CheckInputChoices.fews_config])
+            diffs.append(self._add_source(diff_df=diff_df, kind="idmap", source=idmap))
+        return diffs
+
+    def _diff_attrib_files(self, new_loc_set: constants.LocationSet, diffed_names: Set[str]) -> List[pd.DataFrame]:
+        """Diff the attribute (e.g. validation) csvs of a location set, keyed by their join id (e.g. LOC_ID)."""
+        diffs = []
+        for attrib_file in new_loc_set.attrib_files:
+            name = Path(attrib_file["csvFile"]).stem
+            old_path = self.old_config.MapLayerFiles.get(name)
+            new_path = self.new_config.MapLayerFiles.get(name)
+            # several location sets can share an attribute file
+            if name in diffed_names or self._is_same(old_paths=[old_path], new_paths=[new_path]):
+                continue
+            diffed_names.add(name)
+            old_df, new_df = [
+                pd.read_csv(filepath_or_buffer=path, sep=None, engine="python", dtype=str, keep_default_na=False)
+                if path
+                else pd.DataFrame()
+                for path in (old_path, new_path)
+            ]
+            join_id = attrib_file["id"].replace("%", "")
+            diff_df = diff_frames(old_df=old_df, new_df=new_df, key_columns=[join_id])
+            diffs.append(self._add_source(diff_df=diff_df, kind="validation", source=name))
+        return diffs
+
+    def _diff_location_sets(self) -> List[pd.DataFrame]:
+        diffs = []
+        diffed_attrib_names = set()
+        for check_input, loc_set_class in LOCATION_SET_CLASSES.items():
+            old_loc_set = loc_set_class(fews_config=self.old_config)
+            new_loc_set = loc_set_class(fews_config=self.new_config)
+            if self._is_same(old_paths=old_loc_set.get_file_paths(), new_paths=new_loc_set.get_file_paths()):
+                continue
+            diff_df = diff_frames(old_df=old_loc_set.df, new_df=new_loc_set.df, key_columns=["LOC_ID"])
+            loc_set_diffs = [self._add_source(diff_df=diff_df, kind="location", source=new_loc_set.name)]
+            loc_set_diffs += self._diff_attrib_files(new_loc_set=new_loc_set, diffed_names=diffed_attrib_names)
+            if any(not loc_set_diff.empty for loc_set_diff in loc_set_diffs):
+                # checks that read the validation csvs via fews_config are affected too
+                self._changed_inputs.update([check_input, CheckInputChoices.fews_config])
+            diffs += loc_set_diffs
+        return diffs
+
+    def _diff_parameters(self) -> List[pd.DataFrame]:
+        old_path = self.old_config.RegionConfigFiles.get("Parameters")
+        new_path = self.new_config.RegionConfigFiles.get("Parameters")
+        if self._is_same(old_paths=[old_path], new_paths=[new_path]):
+            return []
+        old_df, new_df = [
+            pd.DataFrame.from_dict(data=config.get_parameters(dict_keys="parameters"), orient="index")
+            .rename_axis("id")
+            .reset_index(drop=False)
+            for config in (self.old_config, self.new_config)
+        ]
+        diff_df = diff_frames(old_df=old_df, new_df=new_df, key_columns=["id"])
+        if not diff_df.empty:
+            self._changed_inputs.add(CheckInputChoices.fews_config)
+        return [self._add_source(diff_df=diff_df, kind="parameter", source="Parameters")]
+
+    def _diff_other_files(self) -> List[pd.DataFrame]:
+        """Compare the other xml and csv files (that checks read via fews_config) on content only."""
+        data = []
+        for directory in ("RegionConfigFiles", "IdMapFiles", "MapLayerFiles"):
+            old_files = getattr(self.old_config, directory)
+            new_files = getattr(self.new_config, directory)
+            for name in sorted(set(old_files).union(new_files)):
+                old_path = old_files.get(name)
+                new_path = new_files.get(name)
+                path = new_path or old_path
+                if path.suffix not in (".xml", ".csv") or path.name in self._diffed_files:
+                    continue
+                if self._is_same(old_paths=[old_path], new_paths=[new_path]):
+                    continue
+                change = "added" if not old_path else "removed" if not new_path else "changed"
+                data.append({"kind": "file", "source": directory, "key": path.name, "change": change})
+        if data:
+            self._changed_inputs.add(CheckInputChoices.fews_config)
+        return [pd.DataFrame(data=data, columns=DIFF_COLUMNS)]
+
+    def _create_diff_df(self) -> None:
+        self._changed_inputs = set()
+        self._diffed_files = set()
+        diffs = self._diff_idmaps() + self._diff_location_sets() + self._diff_parameters() + self._diff_other_files()
+        diffs = [diff_df for diff_df in diffs if not diff_df.empty]
+        self._diff_df = pd.concat(diffs, ignore_index=True) if diffs else pd.DataFrame(columns=DIFF_COLUMNS)
+        logger.info(f"found {len(self._diff_df)} differences between {self.old_config.path} and {self.new_config.path}")
+
+    @property
+    def diff_df(self) -> pd.DataFrame:
+        """One row per added/removed entity and one row per changed value (columns: DIFF_COLUMNS)."""
+        if self._diff_df is None:
+            self._create_diff_df()
+        return self._diff_df
+
+    @property
+    def changed_inputs(self) -> Set[CheckInputChoices]:
+        """Check inputs that differ between the configs."""
+        if self._diff_df is None:
+            self._create_diff_df()
+        return self._changed_inputs
+
+    @property
+    def changed_loc_ids(self) -> Set[str]:
+        """Internal locations that were added, removed or changed in a location set or in an idmap."""
+        diff_df = self.diff_df
+        loc_ids = set(diff_df.loc[diff_df["kind"] == "location", "key"])
+        idmap_df = diff_df[diff_df["kind"] == "idmap"]
+        for column in ("old", "new"):
+            loc_ids.update(idmap_df.loc[idmap_df["column"] == "internalLocation", column])
+        return loc_ids
+
+    def get_affected_checks(self, checks: List[CheckChoices] = None) -> List[CheckChoices]:
+        """Checks (default all) that read a changed input, or that read an input that an affected check mutates
+        (e.g. checks that read hoofdloc after check_s_loc_consistency has updated it). Other checks give the same
+        result on both configs."""
+        checks = [check for check in CheckChoices if check in checks] if checks else list(CheckChoices)
+        changed_inputs = set(self.changed_inputs)
+        affected_checks = []
+        for check in checks:
+            if changed_inputs.intersection(check.value.inputs):
+                affected_checks.append(check)
+                # checks that run later and read a mutated input get another input
+                changed_inputs.update(check.value.mutates)
+        return affected_checks
+
+    def to_excel_sheet(self) -> ExcelSheet:
+        return ExcelSheet(
+            name="config diff",
+            df=self.diff_df,
+            description="verschillen in idmaps, locationsets, validatie csvs, parameters en overige config bestanden "
+            "ten opzichte van de oude config",
+            sheet_type=ExcelSheetTypeChoices.output_check,
+        )
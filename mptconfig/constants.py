@@ -3,18 +3,24 @@ from datetime import datetime
 from enum import Enum
 from mptconfig.fews_utilities import FewsConfig
 from mptconfig.fews_utilities import xml_to_dict
+from mptconfig.vocabulary import IdVocabulary
 from pathlib import Path
 from typing import Dict
 from typing import List
 from typing import Tuple
+from typing import Type
+from typing import TYPE_CHECKING
 
-import geopandas as gpd
 import itertools
 import logging
 import pandas as pd  # noqa pandas comes with geopandas
 import re
 
 
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+
 logger = logging.getLogger(__name__)
 
 # Handy constant for building relative paths
@@ -111,6 +117,21 @@ class PathConstants(Enum):
     )
 
 
+# {PathConstants name: (is_file, should_exist, path, description)}. Plain tuples, so it can be passed to a process.
+PathTuples = Dict[str, Tuple[bool, bool, Path, str]]
+
+
+def create_path_constants(paths: PathTuples, name: str = "CustomPathConstants") -> Type[Enum]:
+    """An Enum with the same members as PathConstants, but with other paths (e.g. of a config in a batch or of an
+    extracted bundle). It is passed to MptConfigChecker(path_constants=..) instead of patching PathConstants."""
+    return Enum(name, {member: PathNamedTuple(*path_tuple) for member, path_tuple in paths.items()})
+
+
+def get_path_tuples(path_constants: Type[Enum]) -> PathTuples:
+    """Inverse of create_path_constants. An Enum that is created at runtime can not be pickled, its tuples can."""
+    return {path_constant.name: tuple(path_constant.value) for path_constant in path_constants}
+
+
 class SubLocTypeChoices(Enum):
     pompvijzel = "pompvijzel"
     krooshek = "krooshek"
@@ -124,13 +145,14 @@ class SubLocTypeChoices(Enum):
 
 
 class LocationSet:
-    def __init__(self, fews_config: FewsConfig = None, fews_config_path: Path = None):
+    def __init__(self, fews_config: FewsConfig = None, fews_config_path: Path = None, vocabulary: IdVocabulary = None):
         assert (fews_config and not fews_config_path) or (
             fews_config_path and not fews_config
         ), "use either path or config"
         self.fews_config_path = fews_config_path
         self._fews_config = fews_config
-        self._geo_df = None
+        self.vocabulary = vocabulary
+        self._df = None
         self._general_location_sets_dict = None
         self._csvfile_meta = None
         self._attrib_files = None
@@ -163,12 +185,26 @@ class LocationSet:
         return self._fews_config
 
     @property
-    def geo_df(self) -> gpd.GeoDataFrame:
-        if self._geo_df is not None:
-            return self._geo_df
-        self._geo_df = self.fews_config.get_locations(location_set_key=self.fews_name)
-        assert isinstance(self._geo_df, gpd.GeoDataFrame)
-        return self._geo_df
+    def df(self) -> pd.DataFrame:
+        """Locations as a plain pd.DataFrame (string columns like in the csv) without shapely geometries. The checks
+        use this df (and get_xyz() for coordinates), so they do not need geopandas/GDAL. With a vocabulary the id
+        and attribute columns (e.g. LOC_ID, PAR_ID, TYPE) are shared categoricals, see IdVocabulary."""
+        if self._df is not None:
+            return self._df
+        df = self.fews_config.get_locations_df(location_set_key=self.fews_name)
+        assert isinstance(df, pd.DataFrame)
+        self._df = self.vocabulary.categorize(df=df) if self.vocabulary else df
+        return self._df
+
+    @property
+    def geo_df(self) -> "gpd.GeoDataFrame":
+        """A copy of df with a geometry column (shapely Points). Note that it is created on each call."""
+        return self.fews_config.to_geo_df(df=self.df, location_set_key=self.fews_name)
+
+    def get_xyz(self) -> pd.DataFrame:
+        """Numeric coordinates of df: a pd.DataFrame with float columns X, Y and Z and the same index as df."""
+        x_attrib, y_attrib, z_attrib = self.fews_config.get_xyz_attribs(location_set_key=self.fews_name)
+        return self.fews_config.get_xyz(df=self.df, x_attrib=x_attrib, y_attrib=y_attrib, z_attrib=z_attrib)
 
     @property
     def general_location_sets_dict(self) -> Dict:
@@ -222,6 +258,13 @@ class LocationSet:
         self._attrib_files = [attrib_file for attrib_file in attribute_files if "attribute" in attrib_file]
         return self._attrib_files
 
+    def get_file_paths(self) -> List[Path]:
+        """Files this location set is read from: LocationSets.xml, its csv and its attribute (e.g. validation) csvs."""
+        map_layer_files = self.fews_config.MapLayerFiles
+        csv_names = [self.csv_filename] + [Path(attrib_file["csvFile"]).stem for attrib_file in self.attrib_files]
+        csv_paths = [map_layer_files.get(Path(csv_name).stem) for csv_name in csv_names]
+        return [self.fews_config.RegionConfigFiles["LocationSets"]] + [path for path in csv_paths if path]
+
     def get_validation_attributes(self, int_pars: List[str] = None) -> List[str]:
         """Get attributes (as a list) from validation rules (list with nested dicts).
 
@@ -602,14 +645,17 @@ PARAMETER_MAPPING = [
 ]
 
 
-def check_constants_paths():
+def check_constants_paths(path_names: List[str] = None, path_constants: Type[Enum] = None):
+    """Check PathConstants (or path_constants, see create_path_constants). If path_names is given, then only these
+    paths are checked on existence. Paths that should not exist (e.g. result_xlsx) are always checked."""
+    path_constants = path_constants if path_constants else PathConstants
     # check 1: BASE_DIR's name
     assert (
         BASE_DIR.name == "mptconfig_checker"
     ), f"BASE_DIR name ={BASE_DIR.name} should be project's root 'mptconfig_checker'"
 
     # check 2: PathConstants has exactly the following objects
-    all_defined_paths = [constant.name for constant in PathConstants]
+    all_defined_paths = [constant.name for constant in path_constants]
     expected_paths = [
         "result_xlsx",
         "fews_config",
@@ -628,7 +674,9 @@ def check_constants_paths():
     assert not too_few, f"too few paths {too_few}"
 
     # check 3: check if files and dirs exist if the are expected to. And visa versa
-    for path_namedtuple in PathConstants:
+    for path_namedtuple in path_constants:
+        if path_names is not None and path_namedtuple.value.should_exist and path_namedtuple.name not in path_names:
+            continue
         if not isinstance(path_namedtuple.value.path, Path):
             raise AssertionError(f"{path_namedtuple.name}'s path is not of type pathlib.Path")
         if not path_namedtuple.value.should_exist:
@@ -1,18 +1,28 @@
 from enum import Enum
-from mptconfig.constants import PathConstants
-from openpyxl import worksheet as openpyxl_worksheet
-from pandas.api.types import is_datetime64_any_dtype as is_datetime  # noqa pandas comes with geopandas
-from pandas.io.excel._xlsxwriter import XlsxWriter  # noqa used for type-hinting
+from mptconfig import constants
+from pandas.api.types import is_bool_dtype  # noqa pandas comes with geopandas
+from pandas.api.types import is_numeric_dtype  # noqa pandas comes with geopandas
 from pathlib import Path
 from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Tuple
+from typing import TYPE_CHECKING
 
+import datetime
 import logging
+import numpy as np  # noqa numpy comes with geopandas
 import pandas as pd  # noqa pandas comes with geopandas
 
 
+if TYPE_CHECKING:
+    # xlsxwriter is only imported when writing the excel file
+    from xlsxwriter import worksheet as xlsxwriter_worksheet
+    from xlsxwriter.format import Format
+
+    import xlsxwriter
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -211,13 +221,24 @@ class ExcelSheetCollector(dict):
 
 
 class ExcelWriter:
-    def __init__(self, results: ExcelSheetCollector):
+    """Stream all ExcelSheet objects to one xlsx file.
+
+    We use xlsxwriter's constant_memory mode: each row is flushed to disk once the next row is written. Rows are
+    written directly from column arrays, so we never materialize a sheet as (pandas) cell objects.
+    The file is written to result_xlsx (default the result_xlsx in constants.PathConstants)."""
+
+    minimal_cell_width = 13
+    # for sheets with more rows we estimate column widths on a (bounded) sample of rows
+    max_rows_column_widths = 10000
+
+    def __init__(self, results: ExcelSheetCollector, result_xlsx: Path = None):
         self.results = results
+        self.result_xlsx = result_xlsx if result_xlsx else constants.PathConstants.result_xlsx.value.path
         assert isinstance(self.results, ExcelSheetCollector), "results is not a ExcelSheetCollector"
         assert self.results.has_sheets, "cannot create excel file as no checks have been executed (so no sheets)"
 
     def _set_sheet_style(
-        self, df: pd.DataFrame, worksheet: openpyxl_worksheet, tab_color: ExcelTabColorChoices = None
+        self, df: pd.DataFrame, worksheet: "xlsxwriter_worksheet.Worksheet", tab_color: ExcelTabColorChoices = None
     ) -> None:
         if tab_color:
             assert isinstance(tab_color, ExcelTabColorChoices), f"tab_color {tab_color} must be a ExcelTabColorChoices"
@@ -235,48 +256,91 @@ class ExcelWriter:
         return str(value)
 
     @staticmethod
-    def get_df_column_widths(df: pd.DataFrame) -> List[int]:
+    def __max_str_length(values: pd.Series) -> int:
+        return 0 if values.empty else int(values.astype(str).str.len().max())
+
+    @classmethod
+    def get_df_column_widths(cls, df: pd.DataFrame) -> List[int]:
+        """Get max string length of index and columns (including index name and column names)."""
+        if len(df) > cls.max_rows_column_widths:
+            df = df.sample(n=cls.max_rows_column_widths, random_state=1)
         # find the maximum length of the index column
-        index_column_width = max([len(str(s)) for s in df.index.values] + [len(str(df.index.name))])
+        index_column_width = max(cls.__max_str_length(values=df.index.to_series()), len(str(df.index.name)))
         # find max of the lengths of column name and its values for each column, left to right
-        other_column_widths = [max([len(str(s)) for s in df[col].values] + [len(col)]) for col in df.columns]
+        other_column_widths = [max(cls.__max_str_length(values=df[col]), len(col)) for col in df.columns]
         return [index_column_width] + other_column_widths
 
-    def __auto_fit_column_size(self, worksheet: openpyxl_worksheet, df: pd.DataFrame) -> None:
-        minimal_cell_width = 13
+    def __auto_fit_column_size(self, worksheet: "xlsxwriter_worksheet.Worksheet", df: pd.DataFrame) -> None:
         df_column_widths = self.get_df_column_widths(df=df)
-        # index column is not included (counted) in worksheet.dim_colmax
-        assert worksheet.dim_colmax == len(df_column_widths) - 1
         for index, width in enumerate(df_column_widths):
-            new_width = float(max(minimal_cell_width, width))
+            new_width = float(max(self.minimal_cell_width, width))
             worksheet.set_column(first_col=index, last_col=index, width=new_width)
 
     @staticmethod
-    def _create_excel_writer(path: Path) -> XlsxWriter:
-        options = {"strings_to_formulas": False, "strings_to_urls": False}
-        writer = pd.ExcelWriter(path=path.as_posix(), mode="w", engine="xlsxwriter", options=options)
-        return writer
+    def __to_cell_value(value):
+        """Convert a value to a type that xlsxwriter can write (like pandas does). Missing values become empty cells."""
+        if isinstance(value, np.generic):
+            value = value.item()
+        if value is None:
+            return None
+        if isinstance(value, (str, bool, int, float)):
+            return None if isinstance(value, float) and np.isnan(value) else value
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.timedelta)):
+            return None if value is pd.NaT else value
+        return str(value)
+
+    @classmethod
+    def _get_column_arrays(cls, df: pd.DataFrame) -> List[List]:
+        """Get index and each column as a list of cell values."""
+        arrays = []
+        for series in [df.index.to_series()] + [df.iloc[:, i] for i in range(df.shape[1])]:
+            if is_bool_dtype(series) or (is_numeric_dtype(series) and not series.isna().any()):
+                # fast path: numpy types are converted to python types at once
+                arrays.append(series.tolist())
+            else:
+                arrays.append([cls.__to_cell_value(value) for value in series.tolist()])
+        return arrays
+
+    def _write_sheet(self, workbook: "xlsxwriter.Workbook", sheet: ExcelSheet, header_format: "Format") -> None:
+        worksheet = workbook.add_worksheet(name=sheet.name)
+        self._set_sheet_style(df=sheet.df, worksheet=worksheet, tab_color=sheet.tab_color)
+        # header row: index name (if any) and column names
+        if sheet.df.index.name is not None:
+            worksheet.write(0, 0, str(sheet.df.index.name), header_format)
+        for col_index, col_name in enumerate(sheet.df.columns, start=1):
+            worksheet.write(0, col_index, self.__as_text(col_name), header_format)
+        # data rows: first column is the index
+        index_values, *column_arrays = self._get_column_arrays(df=sheet.df)
+        for row_index, row_values in enumerate(zip(index_values, *column_arrays), start=1):
+            worksheet.write(row_index, 0, row_values[0], header_format)
+            for col_index in range(1, len(row_values)):
+                value = row_values[col_index]
+                if value is not None:
+                    worksheet.write(row_index, col_index, value)
+
+    @staticmethod
+    def _create_workbook(path: Path) -> "xlsxwriter.Workbook":
+        import xlsxwriter
+
+        options = {
+            "constant_memory": True,
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+            "default_date_format": "YYYY-MM-DD HH:MM:SS",
+        }
+        return xlsxwriter.Workbook(filename=path.as_posix(), options=options)
 
     def write(self):
         """Write each ExcelSheet object in ExcelSheetCollector to a separate sheet in one excel file."""
-        # TODO: added jinja2 as dependency, but it does not work on excel, so remove it from env
-        # TODO: add xlsxwriter ass dependency: we now use pd.ExcelWriter(engine="xlsxwriter") instead of engine=openpyxl
-
-        # create and load xlsx file
-        result_xlsx_path = PathConstants.result_xlsx.value.path
-        logger.info(f"creating result file {PathConstants.result_xlsx.value.path}")
+        result_xlsx_path = self.result_xlsx
+        logger.info(f"creating result file {result_xlsx_path}")
         assert not result_xlsx_path.exists(), f"result file should not already exist {result_xlsx_path}"
-        writer = self._create_excel_writer(path=result_xlsx_path)
+        workbook = self._create_workbook(path=result_xlsx_path)
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
         if not self.results.has_content_sheet:
             self.results.create_content_sheet()
         for sheet in self.results.ordered_sheets:
             assert isinstance(sheet, ExcelSheet)
-            sheet.df.to_excel(excel_writer=writer, sheet_name=sheet.name, index=True)
-            worksheet = writer.sheets[sheet.name]
-            self._set_sheet_style(df=sheet.df, worksheet=worksheet, tab_color=sheet.tab_color)
-
-        writer.save()
-        if writer.engine != "xlsxwriter":
-            assert writer.engine == "openpyxl"
-            writer.close()
-        logger.info(f"created result file {PathConstants.result_xlsx.value.path}")
+            self._write_sheet(workbook=workbook, sheet=sheet, header_format=header_format)
+        workbook.close()
+        logger.info(f"created result file {result_xlsx_path}")
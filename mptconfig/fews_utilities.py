@@ -1,14 +1,25 @@
 from collections import defaultdict
+from collections import OrderedDict
 from lxml import etree as ET  # noqa
+from mptconfig.parse_cache import ParsedFileCache
+from mptconfig.prefetch import FileByteCache
 from pathlib import Path
-from shapely.geometry import Point  # noqa shapely comes with geopandas
 from typing import Dict
 from typing import Optional
+from typing import Tuple
+from typing import TYPE_CHECKING
 from typing import Union
 
-import geopandas as gpd
+import hashlib
 import logging
 import os
+import pandas as pd  # noqa pandas comes with geopandas
+import threading
+
+
+if TYPE_CHECKING:
+    # geopandas (with shapely, fiona and pyproj) is slow to import: only import it when a location set is loaded
+    import geopandas as gpd
 
 
 logger = logging.getLogger(__name__)
@@ -28,10 +39,85 @@ def elements_equal(e1, e2):
     return all(elements_equal(c1, c2) for c1, c2 in zip(e1, e2))
 
 
+def get_comment_str(comment: ET._Comment) -> str:
+    """E.g. '<!--WATERSTANDSLOCATIES-->', as used for section_start and section_end in etree_to_dict."""
+    return ET.tostring(comment).decode("utf-8").strip()
+
+
+def get_element_digest(element: Union[ET._Element, ET._Comment], element_digests: Dict = None) -> str:
+    """Canonical sha256 of an element and its subtree: tag, attributes (sorted), text and tail (stripped, as in
+    etree_to_dict) and the digests of its children. Comments count (they delimit sections). Optionally the digests
+    of all elements in the subtree are added to element_digests, as {element: digest}."""
+    tag = element.tag if isinstance(element.tag, str) else f"#{type(element).__name__}"
+    attrib = sorted(element.attrib.items()) if isinstance(element.tag, str) else []
+    children = [get_element_digest(element=child, element_digests=element_digests) for child in element]
+    parts = [tag, repr(attrib), (element.text or "").strip(), (element.tail or "").strip()] + children
+    digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+    if element_digests is not None:
+        element_digests[element] = digest
+    return digest
+
+
+class XmlDigest:
+    """Canonical digests of an xml file (see get_element_digest), so that (sub)trees are compared in O(1) instead of
+    node by node, and equal elements are found with a dict lookup:
+        - digest: of the root element, which does not change if only the layout of the file changes;
+        - element_digests: per element path, e.g. {'/idMap': .., '/idMap/map[1]': .., ...};
+        - section_digests: per comment in the root element (e.g. '<!--WATERSTANDSLOCATIES-->') the digest of the
+          elements up to the next comment (a section, see section_start and section_end in etree_to_dict).
+    from_file() memoizes per file content (see ParsedFileCache.get_file_hash), so a file is hashed once per process.
+    Only the max_entries most recently used files are kept, so a long running process (e.g. CheckWatcher or
+    CheckService) in which files are edited over and over does not keep growing.
+
+    Example:
+        XmlDigest.from_file(xml_filepath=old_idmap).digest == XmlDigest.from_file(xml_filepath=new_idmap).digest
+    """
+
+    # {file hash: XmlDigest}, least recently used first
+    _entries = OrderedDict()
+    max_entries = 64
+    _lock = threading.Lock()
+
+    def __init__(self, etree: ET._Element):
+        digests = {}
+        self.digest = get_element_digest(element=etree, element_digests=digests)
+        tree = etree.getroottree()
+        self.root_path = tree.getpath(etree)
+        self.element_digests = {
+            tree.getpath(element): digest for element, digest in digests.items() if isinstance(element.tag, str)
+        }
+        self.section_digests = {}
+        section, section_digests = None, []
+        for child in list(etree) + [None]:
+            if child is not None and not isinstance(child, ET._Comment):
+                section_digests.append(digests[child])
+                continue
+            if section is not None:
+                self.section_digests[section] = hashlib.sha256("".join(section_digests).encode()).hexdigest()
+            section, section_digests = (get_comment_str(comment=child) if child is not None else None), []
+
+    @classmethod
+    def from_file(cls, xml_filepath: Path) -> "XmlDigest":
+        file_hash = ParsedFileCache.get_file_hash(path=xml_filepath)
+        with cls._lock:
+            xml_digest = cls._entries.get(file_hash)
+            if xml_digest is not None:
+                cls._entries.move_to_end(file_hash)
+                return xml_digest
+        xml_digest = cls(etree=xml_to_etree(xml_filepath=xml_filepath))
+        with cls._lock:
+            cls._entries[file_hash] = xml_digest
+            while len(cls._entries) > cls.max_entries:
+                cls._entries.popitem(last=False)
+        return xml_digest
+
+
 def xml_to_etree(xml_filepath: Path) -> ET._Element:
-    """ parses an xml-file to an etree. ETree can be used in function etree_to_dict """
+    """parses an xml-file to an etree. ETree can be used in function etree_to_dict"""
     assert isinstance(xml_filepath, Path), f"path {xml_filepath} must be a pathlib.Path"
-    etree = ET.parse(source=xml_filepath.as_posix()).getroot()
+    source = FileByteCache.get_source(path=xml_filepath)
+    source = source.as_posix() if isinstance(source, Path) else source
+    etree = ET.parse(source=source, base_url=xml_filepath.as_posix()).getroot()
     return etree
 
 
@@ -40,7 +126,7 @@ def etree_to_dict(
     section_start: str = None,
     section_end: str = None,
 ) -> Dict:
-    """ converts an etree to a dictionary """
+    """converts an etree to a dictionary"""
     assert isinstance(etree, ET._Comment) or isinstance(
         etree, ET._Element
     ), "etree must be either be a ET._Comment or ET._Element"
@@ -56,7 +142,7 @@ def etree_to_dict(
                 idx
                 for idx, child in enumerate(children)
                 if isinstance(child, ET._Comment)
-                if ET.tostring(child).decode("utf-8").strip() == section_start
+                if get_comment_str(comment=child) == section_start
             ][0]
         else:
             start = 0
@@ -65,7 +151,7 @@ def etree_to_dict(
                 idx
                 for idx, child in enumerate(children)
                 if isinstance(child, ET._Comment)
-                if ET.tostring(child).decode("utf-8").strip() == section_end
+                if get_comment_str(comment=child) == section_end
             ][0]
             if start < end:
                 children = children[start:end]
@@ -94,75 +180,98 @@ def etree_to_dict(
     return _dict
 
 
+@ParsedFileCache.cached_parser
 def xml_to_dict(xml_filepath: Path, section_start: str = None, section_end: str = None) -> Dict:
-    """ converts an xml-file to a dictionary """
+    """converts an xml-file to a dictionary"""
     etree = xml_to_etree(xml_filepath=xml_filepath)
     _dict = etree_to_dict(etree=etree, section_start=section_start, section_end=section_end)
     return _dict
 
 
+@ParsedFileCache.cached_parser
+def read_csv_as_str(filepath: Path) -> pd.DataFrame:
+    """Read a csv with all values as str (empty values become '')."""
+    source = FileByteCache.get_source(path=filepath)
+    return pd.read_csv(filepath_or_buffer=source, dtype=str, keep_default_na=False, encoding="utf-8")
+
+
+class FewsConfigDirectory:
+    """A top-level directory of a FEWS config (e.g. 'IdMapFiles') as a lazy attribute of FewsConfig.
+
+    The directory is only listed (non recursive, with os.scandir) on first access. Listings are cached per
+    directory and keyed on the directory's mtime, which changes when a file is added, removed or renamed. So
+    constructing a FewsConfig is nearly free, also for a large config on a network share, and a second FewsConfig
+    for the same (unchanged) config does not list any directory again.
+
+    Example: FewsConfig(path=...).IdMapFiles = {
+        'IdOPVLWATER': WindowsPath('.../FEWS_SA/config/IdMapFiles/IdOPVLWATER.xml'),
+        'IdOPVLWATER_HYMOS': WindowsPath('.../FEWS_SA/config/IdMapFiles/IdOPVLWATER_HYMOS.xml'),
+        etc..
+    }
+    """
+
+    # {directory path: (mtime_ns, {filename_no_suffix: file path})}
+    _listings = {}
+    _lock = threading.Lock()
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: "FewsConfig", owner) -> Dict[str, Path]:
+        if instance is None:
+            return self
+        return self.get_files(directory=instance.path / self.name)
+
+    @classmethod
+    def get_files(cls, directory: Path) -> Dict[str, Path]:
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        listing = cls._listings.get(directory)
+        if listing is not None and listing[0] == mtime_ns:
+            return listing[1]
+        logger.debug(f"listing fews config directory {directory}")
+        with os.scandir(directory) as entries:
+            files = {Path(entry.name).stem: directory / entry.name for entry in entries if not entry.is_dir()}
+        with cls._lock:
+            cls._listings[directory] = (mtime_ns, files)
+        return files
+
+
 class FewsConfig:
+    """A FEWS config directory. Each FEWS config dir (e.g. 'IdMapFiles') is a dict {filename_no_suffix: path}
+    that is only listed on first access (see FewsConfigDirectory)."""
 
     geo_datum = {"Rijks Driehoekstelsel": "epsg:28992"}
     Z_NODATA_VALUE = -9999
 
+    # FEWS config dir-structure
+    CoefficientSetsFiles = FewsConfigDirectory()
+    DisplayConfigFiles = FewsConfigDirectory()
+    FlagConversionsFiles = FewsConfigDirectory()
+    IconFiles = FewsConfigDirectory()
+    IdMapFiles = FewsConfigDirectory()
+    MapLayerFiles = FewsConfigDirectory()
+    ModuleConfigFiles = FewsConfigDirectory()
+    ModuleDatasetFiles = FewsConfigDirectory()
+    PiClientConfigFiles = FewsConfigDirectory()
+    RegionConfigFiles = FewsConfigDirectory()
+    ReportTemplateFiles = FewsConfigDirectory()
+    RootConfigFiles = FewsConfigDirectory()
+    SystemConfigFiles = FewsConfigDirectory()
+    UnitConversionsFiles = FewsConfigDirectory()
+    WorkflowFiles = FewsConfigDirectory()
+
     def __init__(self, path: Path):
         self.path = path
         self._location_sets = None
-
-        # FEWS config dir-structure
-        self.CoefficientSetsFiles = dict()
-        self.DisplayConfigFiles = dict()
-        self.FlagConversionsFiles = dict()
-        self.IconFiles = dict()
-        self.IdMapFiles = dict()
-        self.MapLayerFiles = dict()
-        self.ModuleConfigFiles = dict()
-        self.ModuleDatasetFiles = dict()
-        self.PiClientConfigFiles = dict()
-        self.RegionConfigFiles = dict()
-        self.ReportTemplateFiles = dict()
-        self.RootConfigFiles = dict()
-        self.SystemConfigFiles = dict()
-        self.UnitConversionsFiles = dict()
-        self.WorkflowFiles = dict()
-
-        # populate config dir-structure
         self._validate_constructor()
-        self._populate_files()
 
     def _validate_constructor(self):
         assert isinstance(self.path, Path), f"path {self.path} must be a pathlib.Path"
         assert self.path.is_dir(), f"path {self.path} must be an existing directory"
 
-    def _populate_files(self) -> None:
-        """Set all fews config filepaths (.xml, .shx, etc) on self.
-
-        Example result:
-            self.CoefficientSetsFiles = {
-                'BovenkantBuis': WindowsPath('.../FEWS_SA/config/CoefficientSetsFiles/BovenkantBuis.xml'),
-                'DebietParameters': WindowsPath('.../FEWS_SA/config/CoefficientSetsFiles/DebietParameters.xml')
-                },
-            self.DisplayConfigFiles = {
-                'GridDisplay': WindowsPath('../FEWS_SA/config/DisplayConfigFiles/GridDisplay.xml'),
-                'ManualForecastDisplay': WindowsPath('.../FEWS_SA/config/DisplayConfigFiles/ManualForecastDisplay.xml'),
-                'SystemMonitorDisplay': WindowsPath('.../FEWS_SA/config/DisplayConfigFiles/SystemMonitorDisplay.xml'),
-                etc..
-                },
-            etc..
-        """
-        for dirpath, dirnames, filenames in os.walk(self.path):
-            _dirpath = Path(dirpath)
-            if _dirpath == self.path:
-                continue
-            if _dirpath.name not in self.__dict__.keys():
-                continue
-            for filename in filenames:
-                filename_no_suffix = Path(filename).stem
-                full_path = _dirpath / filename
-                logger.debug(f"populate FewsConfig with property {_dirpath.name} for file {filename_no_suffix}")
-                self.__dict__[_dirpath.name].update({filename_no_suffix: full_path})
-
     @property
     def location_sets(self) -> Dict:
         if self._location_sets is not None:
@@ -201,16 +310,17 @@ class FewsConfig:
     @classmethod
     def add_geometry_column(
         cls,
-        gdf: gpd.GeoDataFrame,
+        gdf: "gpd.GeoDataFrame",
         filepath: Path,
         x_attrib: str,
         y_attrib: str,
         z_attrib: str = None,
-    ) -> gpd.GeoDataFrame:
+    ) -> "gpd.GeoDataFrame":
         """Add geometry column to geodataframe by merging geodataframe columns x, y, and z.
         If column z_attrib exists, then we fill empty cells ('') with z_value_default.
         If column z_attrib does not exists? then we use z_value_default -9999 for all rows.
         """
+        from shapely.geometry import Point  # noqa shapely comes with geopandas
 
         assert (x_attrib and y_attrib) in gdf.columns, f"x={x_attrib} and y={y_attrib} must be in df"
         if z_attrib:
@@ -249,10 +359,9 @@ class FewsConfig:
         except Exception as err:
             raise AssertionError(f"unexpected error for xyz, err={err}, file={filepath}")
 
-    def get_locations(self, location_set_key: str) -> Optional[gpd.GeoDataFrame]:
-        """Convert fews locationSet locations into geopandas df
-        args 'location_set_key' (str) is e.g. 'OPVLWATER_HOOFDLOC'.
-        """
+    def get_csv_file_meta(self, location_set_key: str) -> Optional[Dict]:
+        """Get csvFile of a locationSet, e.g. {'file': 'oppvlwater_hoofdloc', 'x': '%X%', 'y': '%Y%', etc..}.
+        args 'location_set_key' (str) is e.g. 'OPVLWATER_HOOFDLOC'."""
         # from initial creator (Daniel Tollenaar):
         # 1. Ik kan nu alleen locationsets direct uit CSV-files lezen, maar een locatieset kan ook
         #    onderdeel zijn van een subset (zie https://publicwiki.deltares.nl/display/FEWSDOC/02+LocationSets).
@@ -271,22 +380,86 @@ class FewsConfig:
         if not file:
             logger.warning(f"found location_set but not file in fews_config for location_set_key: {location_set_key}")
             return
+        return location_set["csvFile"]
+
+    def get_xyz_attribs(self, location_set_key: str) -> Tuple[str, str, str]:
+        """Get column names of x, y and z (empty string if the location set has no z), e.g. ('X', 'Y', 'Z')."""
+        csv_file_meta = self.get_csv_file_meta(location_set_key=location_set_key)
+        x_attrib = csv_file_meta["x"].replace("%", "")
+        y_attrib = csv_file_meta["y"].replace("%", "")
+        # z column does not always exist
+        z_attrib = csv_file_meta.get("z", "").replace("%", "")
+        return x_attrib, y_attrib, z_attrib
 
-        file = Path(file)
+    @classmethod
+    def get_xyz(cls, df: pd.DataFrame, x_attrib: str, y_attrib: str, z_attrib: str = None) -> pd.DataFrame:
+        """Get numeric coordinates of a locations df: a pd.DataFrame with columns X, Y and Z (float) and the same
+        index as df. If the location set has no z, then Z is Z_NODATA_VALUE (like the z of a geo_df geometry)."""
+        try:
+            xyz_df = pd.DataFrame(
+                data={
+                    "X": pd.to_numeric(df[x_attrib], errors="raise").astype(float),
+                    "Y": pd.to_numeric(df[y_attrib], errors="raise").astype(float),
+                    "Z": pd.to_numeric(df[z_attrib], errors="raise").astype(float) if z_attrib else cls.Z_NODATA_VALUE,
+                },
+                index=df.index,
+            )
+        except ValueError as err:
+            raise AssertionError(f"could not convert xyz to numbers, err={err}")
+        return xyz_df
+
+    def get_locations_df(self, location_set_key: str) -> Optional[pd.DataFrame]:
+        """Read fews locationSet locations into a plain pd.DataFrame: all columns are strings, like in the csv,
+        except for empty z values which become Z_NODATA_VALUE (like in get_locations()). No shapely geometries are
+        created (and geopandas/GDAL is not needed), use get_xyz() for numeric coordinates.
+        args 'location_set_key' (str) is e.g. 'OPVLWATER_HOOFDLOC'.
+        """
+        csv_file_meta = self.get_csv_file_meta(location_set_key=location_set_key)
+        if not csv_file_meta:
+            return
+        file = Path(csv_file_meta["file"])
         if not file.suffix:
             file = file.parent / (file.name + ".csv")
         filepath = self.path / "MapLayerFiles" / file
         assert filepath.is_file(), f"file {filepath} does not exist"
-        gdf = gpd.read_file(filename=filepath)
+        df = read_csv_as_str(filepath=filepath)
 
-        x_attrib = location_set["csvFile"]["x"].replace("%", "")
-        y_attrib = location_set["csvFile"]["y"].replace("%", "")
-        # z column does not always exist
-        z_attrib = location_set["csvFile"].get("z", "").replace("%", "")
+        x_attrib, y_attrib, z_attrib = self.get_xyz_attribs(location_set_key=location_set_key)
+        assert (x_attrib and y_attrib) in df.columns, f"x={x_attrib} and y={y_attrib} must be in df"
+        empty_xy_rows = list(df[(df[x_attrib] == "") | (df[y_attrib] == "")].index)
+        if empty_xy_rows:
+            raise AssertionError(f"found '' in xy for dataframe rows={empty_xy_rows} from file={filepath}")
+        if z_attrib:
+            empty_rows_z = len(df[df[z_attrib] == ""])
+            df[z_attrib].replace("", self.Z_NODATA_VALUE, inplace=True)
+            logger.debug(f"replaced {empty_rows_z} df rows column {z_attrib} from '' to {self.Z_NODATA_VALUE}")
+        # validate that all coordinates are numbers
+        self.get_xyz(df=df, x_attrib=x_attrib, y_attrib=y_attrib, z_attrib=z_attrib)
+        return df
+
+    def to_geo_df(self, df: pd.DataFrame, location_set_key: str) -> "gpd.GeoDataFrame":
+        """Convert a locations df (see get_locations_df) into a geopandas df with a geometry column (and crs)."""
+        import geopandas as gpd
+
+        csv_file_meta = self.get_csv_file_meta(location_set_key=location_set_key)
+        x_attrib, y_attrib, z_attrib = self.get_xyz_attribs(location_set_key=location_set_key)
         gdf = self.add_geometry_column(
-            gdf=gdf, filepath=filepath, x_attrib=x_attrib, y_attrib=y_attrib, z_attrib=z_attrib
+            gdf=gpd.GeoDataFrame(df.copy()),
+            filepath=Path(csv_file_meta["file"]),
+            x_attrib=x_attrib,
+            y_attrib=y_attrib,
+            z_attrib=z_attrib,
         )
-        geo_datum_found = location_set["csvFile"]["geoDatum"]
+        geo_datum_found = csv_file_meta["geoDatum"]
         crs = self.geo_datum.get(geo_datum_found, None)
         gdf.crs = crs if crs else None
         return gdf
+
+    def get_locations(self, location_set_key: str) -> Optional["gpd.GeoDataFrame"]:
+        """Convert fews locationSet locations into geopandas df
+        args 'location_set_key' (str) is e.g. 'OPVLWATER_HOOFDLOC'.
+        """
+        df = self.get_locations_df(location_set_key=location_set_key)
+        if df is None:
+            return
+        return self.to_geo_df(df=df, location_set_key=location_set_key)
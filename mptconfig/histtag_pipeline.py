@@ -0,0 +1,146 @@
+from pathlib import Path
+from typing import Iterator
+from typing import List
+
+import logging
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkedHisttags:
+    """Out-of-core alternative for MptConfigChecker.histtags (and mpt_histtags), for histtags csvs that do not fit
+    in memory (e.g. CAW exports per period). The csv is streamed in chunks of chunk_size rows. Each chunk is joined
+    (a hash join on externalLocation and externalParameter) to the idmaps and folded into running aggregates per
+    fews_locid:
+        - aggregates: total_min_start_dt (min), total_max_end_dt (max) and latest_serie (the serie with the last
+          total_max_end_dt, see utils.update_histtag), with fews_locid as index;
+        - matched_series: unique serie + idmap_file of all histtags that match an idmap;
+        - unmatched_path: csv to which the histtags that match no idmap are appended chunk by chunk.
+    Both aggregates and matched_series are bounded by the nr of idmaps, so peak memory depends on chunk_size and the
+    idmaps, not on the size of the histtags csv.
+
+    Example:
+        chunked_histtags = ChunkedHisttags(idmap_df=idmap_df, unmatched_path=Path("histtags_nomatch.csv"))
+        chunked_histtags.run(path=Path("histtags.csv"))
+        chunked_histtags.aggregates.loc["KW100011", "total_max_end_dt"]
+    """
+
+    columns = ["serie", "total_min_start_dt", "total_max_end_dt"]
+    date_columns = ["total_min_start_dt", "total_max_end_dt"]
+    idmap_columns = ["externalLocation", "externalParameter", "internalLocation", "idmap_file"]
+    unmatched_columns = ["UNKNOWN_SERIE", "STARTDATE", "ENDDATE"]
+
+    def __init__(self, idmap_df: pd.DataFrame, unmatched_path: Path, chunk_size: int = 100000):
+        self.idmap_df = idmap_df[self.idmap_columns].astype(str)
+        self.unmatched_path = unmatched_path
+        self.chunk_size = chunk_size
+        self.aggregates = None
+        self.matched_series = None
+        self.nr_rows = 0
+        self.nr_unmatched = 0
+        assert self.chunk_size >= 1, f"chunk_size {self.chunk_size} must be >= 1"
+        assert isinstance(self.unmatched_path, Path), f"unmatched_path {self.unmatched_path} must be a pathlib.Path"
+
+    @classmethod
+    def get_separator(cls, path: Path) -> str:
+        """Separator of the csv (comma or semi-colon), from its header only."""
+        with open(path, "r") as csv_file:
+            header = csv_file.readline().strip()
+        for separator in (",", ";"):
+            if sorted(column.strip().strip('"') for column in header.split(separator)) == sorted(cls.columns):
+                return separator
+        raise AssertionError(f"could not read csv {path} with separators ; and ,")
+
+    def read_chunks(self, path: Path) -> Iterator[pd.DataFrame]:
+        """Chunks of the histtags csv. The index of the chunks continues, so it is the row nr in the csv."""
+        chunks = pd.read_csv(
+            filepath_or_buffer=path,
+            sep=self.get_separator(path=path),
+            parse_dates=self.date_columns,
+            chunksize=self.chunk_size,
+        )
+        for chunk in chunks:
+            for date_column in self.date_columns:
+                if not chunk.empty and not pd.api.types.is_datetime64_dtype(chunk[date_column]):
+                    raise AssertionError(
+                        f"dtype_column {date_column} in {path} can not be converted to np.datetime64. "
+                        f"Check if values are dates."
+                    )
+            yield chunk
+
+    def _join(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Inner join of chunk and the idmaps: a row per histtag per matching idmap (see utils.idmap2tags)."""
+        series = chunk["serie"].astype(str)
+        assert series.str.contains("_", regex=False).all(), "each serie must be <ex_loc>_<ex_par>"
+        ex_loc_ex_par = series.str.split(pat="_", n=1, expand=True).reindex(columns=[0, 1])
+        keys = pd.DataFrame(
+            data={"row_nr": chunk.index, "externalLocation": ex_loc_ex_par[0], "externalParameter": ex_loc_ex_par[1]}
+        )
+        matched = keys.merge(self.idmap_df.reset_index(), on=["externalLocation", "externalParameter"], how="inner")
+        matched = matched.sort_values(by=["row_nr", "index"], kind="stable")
+        matched = matched.join(chunk[self.columns], on="row_nr")
+        return matched.rename(columns={"internalLocation": "fews_locid"})
+
+    def _fold(self, matched: pd.DataFrame) -> None:
+        """Fold matched histtags into the running aggregates (earlier rows win a tie on total_max_end_dt)."""
+        matched = matched.rename(columns={"serie": "latest_serie"})
+        columns = ["fews_locid", "total_min_start_dt", "total_max_end_dt", "latest_serie"]
+        aggregates = [self.aggregates.reset_index()] if self.aggregates is not None else []
+        df = pd.concat(aggregates + [matched[columns]], ignore_index=True)
+        grouper = df.groupby("fews_locid", sort=False)
+        folded = pd.concat(
+            [grouper["total_min_start_dt"].min(), grouper["total_max_end_dt"].max()],
+            axis=1,
+        )
+        latest = df.sort_values(by="total_max_end_dt", ascending=False, kind="stable", na_position="last")
+        latest = latest.drop_duplicates(subset="fews_locid", keep="first").set_index("fews_locid")
+        folded["latest_serie"] = latest["latest_serie"].reindex(folded.index)
+        self.aggregates = folded
+
+    def _append_unmatched(self, chunk: pd.DataFrame, matched: pd.DataFrame) -> None:
+        unmatched = chunk[~chunk.index.isin(matched["row_nr"])][self.columns]
+        unmatched.to_csv(self.unmatched_path, mode="a", header=False, index=True)
+        self.nr_unmatched += len(unmatched)
+
+    def run(self, path: Path) -> "ChunkedHisttags":
+        """Stream the histtags csv at path through the idmaps."""
+        self.unmatched_path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(columns=self.unmatched_columns).to_csv(self.unmatched_path, index=True)
+        self.aggregates = None
+        self.matched_series = pd.DataFrame(columns=["serie", "idmap_file"])
+        self.nr_rows = 0
+        self.nr_unmatched = 0
+        for chunk in self.read_chunks(path=path):
+            matched = self._join(chunk=chunk)
+            self._fold(matched=matched)
+            self.matched_series = pd.concat(
+                [self.matched_series, matched[["serie", "idmap_file"]]], ignore_index=True
+            ).drop_duplicates(ignore_index=True)
+            self._append_unmatched(chunk=chunk, matched=matched)
+            self.nr_rows += len(chunk)
+        logger.info(
+            f"streamed {self.nr_rows} histtags in chunks of {self.chunk_size} rows: {len(self.aggregates)} fews_locids,"
+            f" {self.nr_unmatched} histtags without idmap"
+        )
+        return self
+
+    def get_matched_series(self, idmap_files: List[str]) -> pd.Series:
+        """Unique series that match an idmap in one of idmap_files."""
+        is_in_files = self.matched_series["idmap_file"].isin(idmap_files)
+        return self.matched_series[is_in_files]["serie"].drop_duplicates()
+
+    def get_unmatched(self, ignored_series: pd.Series) -> pd.DataFrame:
+        """Histtags that match no idmap and are not in ignored_series (read back chunk by chunk), with the same index
+        (row nr in the histtags csv) and dtypes as a filter on MptConfigChecker.histtags."""
+        chunks = pd.read_csv(self.unmatched_path, index_col=0, parse_dates=["STARTDATE", "ENDDATE"], chunksize=100000)
+        df = pd.concat(
+            [chunk[~chunk["UNKNOWN_SERIE"].isin(values=ignored_series)] for chunk in chunks]
+            or [pd.DataFrame(columns=self.unmatched_columns)]
+        )
+        for date_column in ("STARTDATE", "ENDDATE"):
+            df[date_column] = pd.to_datetime(df[date_column])
+        df.index = df.index.astype("int64")
+        df.index.name = None
+        return df
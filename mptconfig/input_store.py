@@ -0,0 +1,193 @@
+from contextlib import closing
+from mptconfig import constants
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.fews_utilities import read_csv_as_str
+from mptconfig.result_cache import CheckResultCache
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import hashlib
+import logging
+import os
+import pandas as pd  # noqa pandas comes with geopandas
+import sqlite3
+
+
+logger = logging.getLogger(__name__)
+
+
+class InputStore:
+    """Optional on-disk SQLite database (stdlib sqlite3) with the inputs of the checks, as read from file:
+        - a table per idmap file (e.g. 'IdOPVLWATER') and a view 'idmaps' of all idmap files (column 'bestand');
+        - a table per location set (e.g. 'hoofdloc') and per validation csv (e.g. 'oppvlwater_watervalidatie');
+        - the tables 'histtags' and 'ignored_xy', 'ignored_histtag', etc.
+    Each column in index_columns (e.g. LOC_ID, internalLocation) gets an index. Only two checks read through the store
+    (see MptConfigChecker.input_store): check_double_idmaps (get_double_idmaps) and check_idmap_int_loc_in_csv
+    (get_int_locs_in_csvs) run as indexed SQL queries. All other checks keep using the in-memory DataFrames.
+
+    The database is rebuilt only if the input files (or the mptconfig code) changed, so it is reused between runs.
+    It is also handy for ad-hoc queries without a python session, e.g.:
+        sqlite3 data/output/inputs.sqlite "SELECT * FROM idmaps WHERE internalLocation = 'KW100011'"
+
+    Example:
+        checker = MptConfigChecker()
+        checker.run(input_store_path=Path("data/output/inputs.sqlite"))
+    """
+
+    index_columns = (
+        "LOC_ID",
+        "PAR_ID",
+        "internalLocation",
+        "externalLocation",
+        "internalParameter",
+        "externalParameter",
+        "serie",
+    )
+    meta_table = "meta"
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.is_reused = False
+        assert isinstance(self.db_path, Path), f"db_path {self.db_path} must be a pathlib.Path"
+
+    @staticmethod
+    def get_table_inputs(check_inputs: List[CheckInputChoices]) -> List[CheckInputChoices]:
+        """Inputs that are stored as tables (fews_config as a whole is not)."""
+        skip_inputs = (CheckInputChoices.fews_config, CheckInputChoices.validation_csvs_new)
+        return [check_input for check_input in check_inputs if check_input not in skip_inputs]
+
+    @staticmethod
+    def get_validation_csv_paths(checker) -> Dict[str, Path]:
+        validation_csv_paths = {
+            validation_csv.value: checker.fews_config.MapLayerFiles.get(validation_csv.value)
+            for validation_csv in constants.ValidationCsvChoices
+        }
+        return {name: path for name, path in validation_csv_paths.items() if path}
+
+    def get_fingerprint(self, checker, check_inputs: List[CheckInputChoices]) -> str:
+        """Sha256 of the mptconfig code and the files of the stored inputs."""
+        table_inputs = self.get_table_inputs(check_inputs=check_inputs)
+        sha256 = hashlib.sha256()
+        sha256.update(CheckResultCache.get_code_hash().encode())
+        input_hashes = CheckResultCache.get_input_hashes(checker=checker, check_inputs=table_inputs)
+        for check_input in table_inputs:
+            sha256.update(f"{check_input.value}{input_hashes[check_input]}".encode())
+        if set(table_inputs).intersection(CheckInputChoices.location_sets()):
+            for name, path in sorted(self.get_validation_csv_paths(checker=checker).items()):
+                sha256.update(f"{name}{CheckResultCache.get_file_hash(path=path)}".encode())
+        return sha256.hexdigest()
+
+    def get_stored_fingerprint(self) -> Optional[str]:
+        if not self.db_path.is_file():
+            return None
+        try:
+            meta_df = self.query(sql=f"SELECT value FROM {self.meta_table} WHERE key = 'fingerprint'")
+        except (pd.io.sql.DatabaseError, sqlite3.DatabaseError):
+            return None
+        return meta_df["value"].iloc[0] if not meta_df.empty else None
+
+    def _get_tables(self, checker, check_inputs: List[CheckInputChoices]) -> Dict[str, pd.DataFrame]:
+        tables = {}
+        for check_input in self.get_table_inputs(check_inputs=check_inputs):
+            if check_input == CheckInputChoices.idmaps:
+                for idmap_file in constants.IDMAP_FILES:
+                    tables[idmap_file] = pd.DataFrame(data=checker._get_idmaps(idmap_files=[idmap_file]))
+            elif check_input in CheckInputChoices.location_sets():
+                tables[check_input.value] = getattr(checker, check_input.value).df
+            else:
+                tables[check_input.value] = getattr(checker, check_input.value)
+        if set(tables).intersection(check_input.value for check_input in CheckInputChoices.location_sets()):
+            for name, path in self.get_validation_csv_paths(checker=checker).items():
+                tables[name] = read_csv_as_str(filepath=path)
+        return tables
+
+    def _write_table(self, connection: sqlite3.Connection, name: str, df: pd.DataFrame) -> None:
+        df = df.copy()
+        # sqlite has no categoricals: store their values
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype(object).where(df[column].notna(), None)
+        df.to_sql(name=name, con=connection, index=False)
+        for column in self.index_columns:
+            if column in df.columns:
+                connection.execute(f'CREATE INDEX "ix_{name}_{column}" ON "{name}" ("{column}")')
+
+    def load(self, checker, check_inputs: List[CheckInputChoices]) -> None:
+        """Store check_inputs of checker, unless the database already holds the same inputs. Load the store before
+        the checks run, as some checks mutate their inputs."""
+        fingerprint = self.get_fingerprint(checker=checker, check_inputs=check_inputs)
+        if self.get_stored_fingerprint() == fingerprint:
+            self.is_reused = True
+            logger.info(f"reusing input store {self.db_path}: input files did not change")
+            return
+        tables = self._get_tables(checker=checker, check_inputs=check_inputs)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a tmp file first, so that an interrupted load never leaves a half-filled database
+        tmp_path = self.db_path.with_name(self.db_path.name + ".tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        with closing(sqlite3.connect(tmp_path.as_posix())) as connection:
+            for name, df in tables.items():
+                self._write_table(connection=connection, name=name, df=df)
+            idmap_files = [idmap_file for idmap_file in constants.IDMAP_FILES if idmap_file in tables]
+            if idmap_files:
+                union = " UNION ALL ".join(f"SELECT '{name}' AS bestand, * FROM \"{name}\"" for name in idmap_files)
+                connection.execute(f"CREATE VIEW idmaps AS {union}")
+            pd.DataFrame(data={"key": ["fingerprint"], "value": [fingerprint]}).to_sql(
+                name=self.meta_table, con=connection, index=False
+            )
+            connection.commit()
+        os.replace(tmp_path, self.db_path)
+        self.is_reused = False
+        logger.info(f"created input store {self.db_path} with tables {sorted(tables)}")
+
+    def query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        """Run a query on a new (read-only) connection, so the store can be used from threads and processes."""
+        with closing(sqlite3.connect(f"file:{self.db_path.as_posix()}?mode=ro", uri=True)) as connection:
+            return pd.read_sql_query(sql=sql, con=connection, params=params)
+
+    def get_double_idmaps(self, idmap_file: str) -> List[Dict]:
+        """Idmaps that occur more than once in idmap_file. Per externalLocation only the last double is returned,
+        in order of the first double of that externalLocation."""
+        assert idmap_file in constants.IDMAP_FILES, f"unknown idmap_file {idmap_file}"
+        columns = ["internalLocation", "externalLocation", "internalParameter", "externalParameter"]
+        columns_sql = ", ".join(columns)
+        sql = f"""
+            WITH doubles AS (
+                SELECT idmap.rowid AS nr, idmap.*
+                FROM "{idmap_file}" AS idmap
+                JOIN (SELECT {columns_sql} FROM "{idmap_file}" GROUP BY {columns_sql} HAVING COUNT(*) > 1)
+                USING ({columns_sql})
+            ),
+            per_ex_loc AS (
+                SELECT externalLocation, MIN(nr) AS first_nr, MAX(nr) AS last_nr
+                FROM doubles
+                GROUP BY externalLocation
+            )
+            SELECT {", ".join(f"doubles.{column}" for column in columns)}
+            FROM per_ex_loc
+            JOIN doubles ON doubles.nr = per_ex_loc.last_nr
+            ORDER BY per_ex_loc.first_nr
+        """
+        return self.query(sql=sql).to_dict(orient="records")
+
+    def get_int_locs_in_csvs(self, idmap_file: str) -> pd.DataFrame:
+        """Per idmap (in idmap order): its internalLocation and whether it is a LOC_ID in the hoofdloc, subloc,
+        waterstandloc and mswloc csv (columns in_hoofd_csv, in_sub_csv, in_ow_csv, in_msw_csv)."""
+        assert idmap_file in constants.IDMAP_FILES, f"unknown idmap_file {idmap_file}"
+        loc_set_columns = {
+            "in_hoofd_csv": "hoofdloc",
+            "in_sub_csv": "subloc",
+            "in_ow_csv": "waterstandloc",
+            "in_msw_csv": "mswloc",
+        }
+        exists = ",\n".join(
+            f'EXISTS (SELECT 1 FROM "{table}" WHERE "{table}".LOC_ID = idmap.internalLocation) AS {column}'
+            for column, table in loc_set_columns.items()
+        )
+        sql = f'SELECT idmap.internalLocation, {exists} FROM "{idmap_file}" AS idmap ORDER BY idmap.rowid'
+        df = self.query(sql=sql)
+        df[list(loc_set_columns)] = df[list(loc_set_columns)].astype(bool)
+        return df
@@ -0,0 +1,183 @@
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+import functools
+import json
+import logging
+import pandas as pd  # noqa pandas comes with geopandas
+import threading
+import time
+import tracemalloc
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_nr_rows(value) -> Optional[int]:
+    """Get nr rows of a (cached) input or result, e.g. a pd.DataFrame, an ExcelSheet, a LocationSet (its df) or a
+    list."""
+    if value is None:
+        return None
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if hasattr(value, "nr_rows"):
+        return value.nr_rows
+    if hasattr(value, "df"):
+        return len(value.df)
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    return None
+
+
+class PerformanceRecorder:
+    """Collects performance measurements of checks and (cached) inputs: wall time, cpu time, peak memory (only if
+    trace_memory=True as tracemalloc slows down python), rows in/out and cache hits/misses per input.
+
+    Cpu time is measured per thread. Peak memory is measured per process, so with concurrent checks in threads it
+    is the peak of all running checks."""
+
+    columns = [
+        "name",
+        "kind",
+        "wall_time_s",
+        "cpu_time_s",
+        "peak_memory_mb",
+        "rows_in",
+        "rows_out",
+        "cache_hits",
+        "cache_misses",
+    ]
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.records = []
+        self.cache_hits = Counter()
+        self.cache_misses = Counter()
+        self._lock = threading.Lock()
+        self._peak_stack = []
+
+    def __getstate__(self) -> Dict:
+        # a lock can not be pickled (MptConfigChecker is pickled when checks run in a process pool)
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def count_cache(self, name: str, is_hit: bool) -> None:
+        with self._lock:
+            if is_hit:
+                self.cache_hits[name] += 1
+            else:
+                self.cache_misses[name] += 1
+
+    def __start_peak(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._peak_stack:
+            # an outer measurement keeps its own peak since we reset the peak now
+            self._peak_stack[-1]["peak"] = max(self._peak_stack[-1]["peak"], peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            # python >= 3.9. Without it the peak since tracemalloc.start() is used (an upper bound)
+            tracemalloc.reset_peak()
+        self._peak_stack.append({"start": current, "peak": current})
+
+    def __stop_peak(self) -> float:
+        frame = self._peak_stack.pop()
+        frame["peak"] = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+        if self._peak_stack:
+            self._peak_stack[-1]["peak"] = max(self._peak_stack[-1]["peak"], frame["peak"])
+        else:
+            tracemalloc.stop()
+        return round((frame["peak"] - frame["start"]) / 1024**2, 3)
+
+    @contextmanager
+    def measure(self, name: str, kind: str) -> Iterator[Dict]:
+        """Measure a block of code. The yielded record can be updated with e.g. rows_in and rows_out."""
+        record = dict.fromkeys(self.columns)
+        record.update({"name": name, "kind": kind})
+        trace_memory = self.trace_memory and threading.current_thread() is threading.main_thread()
+        if trace_memory:
+            self.__start_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        finally:
+            record["wall_time_s"] = round(time.perf_counter() - wall_start, 3)
+            record["cpu_time_s"] = round(time.thread_time() - cpu_start, 3)
+            if trace_memory:
+                record["peak_memory_mb"] = self.__stop_peak()
+            with self._lock:
+                self.records.append(record)
+            logger.debug(f"{kind} {name} took {record['wall_time_s']}s")
+
+    def merge(self, other: "PerformanceRecorder") -> None:
+        """Add measurements of another recorder, e.g. from a check that ran in a child process."""
+        with self._lock:
+            self.records.extend(other.records)
+            self.cache_hits.update(other.cache_hits)
+            self.cache_misses.update(other.cache_misses)
+
+    def to_df(self) -> pd.DataFrame:
+        """One row per measurement. Inputs that were only read from cache get a row without timings."""
+        records = [record.copy() for record in self.records]
+        measured_inputs = [record["name"] for record in records if record["kind"] == "input"]
+        for name in sorted(set(self.cache_hits).union(self.cache_misses).difference(measured_inputs)):
+            records.append({"name": name, "kind": "input"})
+        for record in records:
+            if record["kind"] == "input":
+                record["cache_hits"] = self.cache_hits[record["name"]]
+                record["cache_misses"] = self.cache_misses[record["name"]]
+        df = pd.DataFrame(data=records, columns=self.columns)
+        # nullable integers, so that e.g. a check without cache_hits does not turn the column into floats
+        count_columns = ["rows_in", "rows_out", "cache_hits", "cache_misses"]
+        df[count_columns] = df[count_columns].astype("Int64")
+        df["peak_memory_mb"] = df["peak_memory_mb"].astype(float)
+        return df
+
+    def to_json(self, path: Path) -> None:
+        df = self.to_df()
+        with open(path, "w") as json_file:
+            json.dump(json.loads(df.to_json(orient="records")), json_file, indent=2)
+        logger.info(f"created performance file {path}")
+
+
+def instrumented_input(cache_attribute: str):
+    """Decorator for a MptConfigChecker caching property: count cache hits and misses and measure a cache miss.
+
+    Example:
+        @property
+        @instrumented_input(cache_attribute="_histtags")
+        def histtags(self) -> pd.DataFrame:
+            ...
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self):
+            performance = self.performance
+            is_hit = getattr(self, cache_attribute) is not None
+            performance.count_cache(name=func.__name__, is_hit=is_hit)
+            if is_hit:
+                return func(self)
+            with performance.measure(name=func.__name__, kind="input") as record:
+                result = func(self)
+                record["rows_out"] = get_nr_rows(value=result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def get_rows_out(results: List) -> int:
+    return sum(get_nr_rows(value=result) or 0 for result in results)
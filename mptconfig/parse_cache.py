@@ -0,0 +1,111 @@
+from mptconfig.prefetch import FileByteCache
+from pathlib import Path
+from typing import Dict
+from typing import Tuple
+
+import functools
+import hashlib
+import inspect
+import logging
+import pickle
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class ParsedFileCache:
+    """Content addressed cache of parsed input files, shared by all MptConfigCheckers in a process. It is used in
+    batch mode (see mptconfig/batch.py), where several configs often hold byte-identical files (e.g. the same
+    histtags csv or idmap xml): such a file is parsed once and each config gets its own copy of the result.
+
+    Results are keyed by (sha256 of file content, parser, parser arguments) and stored pickled: unpickling is much
+    faster than parsing xml or csv, it gives each caller an independent copy and entries can be passed to another
+    process as is. The cache is disabled by default, so a normal run does not keep parsed files in memory twice.
+
+    Example:
+        @ParsedFileCache.cached_parser
+        def xml_to_dict(xml_filepath: Path, ...) -> Dict:
+            ...
+    """
+
+    # {file path: (mtime_ns, size, sha256)}
+    _file_hashes = {}
+    # {(sha256, parser name, parser arguments): pickled result}
+    _entries = {}
+    _lock = threading.Lock()
+    is_enabled = False
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def get_file_hash(cls, path: Path) -> str:
+        """Sha256 of file content. It is cached per (path, mtime, size), so an unchanged file is read only once.
+        Returns 'missing' if path does not exist."""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return "missing"
+        file_hash = cls._file_hashes.get(path)
+        if file_hash is not None and file_hash[:2] == (stat.st_mtime_ns, stat.st_size):
+            return file_hash[2]
+        sha256 = hashlib.sha256()
+        content = FileByteCache.get_content(path=path)
+        if content is not None:
+            # already prefetched: do not read the file again
+            sha256.update(content)
+        else:
+            with open(path, "rb") as binary_file:
+                for chunk in iter(lambda: binary_file.read(2**20), b""):
+                    sha256.update(chunk)
+        with cls._lock:
+            cls._file_hashes[path] = (stat.st_mtime_ns, stat.st_size, sha256.hexdigest())
+        return sha256.hexdigest()
+
+    @classmethod
+    def enable(cls, entries: Dict[Tuple, bytes] = None) -> None:
+        """Enable the cache, optionally with entries from another process (see export). Entries are unpickled when
+        they are used, so only pass entries from a trusted source (ConfigBundle verifies their sha256)."""
+        with cls._lock:
+            cls._entries.update(entries or {})
+            cls.is_enabled = True
+
+    @classmethod
+    def disable(cls) -> None:
+        with cls._lock:
+            cls._entries = {}
+            cls.is_enabled = False
+            cls.hits = 0
+            cls.misses = 0
+
+    @classmethod
+    def export(cls, file_hashes: set = None) -> Dict[Tuple, bytes]:
+        """Get entries (default all, or only of files with the given hashes) to enable the cache in another
+        process."""
+        with cls._lock:
+            return {key: value for key, value in cls._entries.items() if not file_hashes or key[0] in file_hashes}
+
+    @classmethod
+    def cached_parser(cls, func):
+        """Decorator for a function that parses a file. The first argument of func must be the file path."""
+        signature = inspect.signature(func)
+        path_argument = next(iter(signature.parameters))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not cls.is_enabled:
+                return func(*args, **kwargs)
+            arguments = signature.bind(*args, **kwargs).arguments
+            path = Path(arguments.pop(path_argument))
+            key = (cls.get_file_hash(path=path), func.__qualname__, repr(sorted(arguments.items())))
+            pickled = cls._entries.get(key)
+            if pickled is not None:
+                cls.hits += 1
+                return pickle.loads(pickled)
+            cls.misses += 1
+            result = func(*args, **kwargs)
+            with cls._lock:
+                cls._entries[key] = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            return result
+
+        return wrapper
@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Union
+
+import io
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class FileByteCache:
+    """In-memory cache of raw file content, shared by all parsers in a process. Our inputs live on network shares
+    (D:/WIS_6.0_*, H:/DATA/...) where each file open costs a round-trip. Opening them one by one, lazily when a
+    property is first touched, makes a cold start take nr_files x latency. With prefetch() all files are read
+    concurrently in a thread pool (reading a file releases the GIL), so a cold start is bounded by bandwidth.
+
+    Parsers (xml_to_dict, read_csv_as_str, pd_read_csv_expect_columns, ..) read from get_source(path): a BytesIO
+    if the file is cached, otherwise the path itself. The cache is only filled within prefetched(), so edited files
+    are never read stale from memory outside of one run.
+
+    Example:
+        with FileByteCache.prefetched(paths=[Path("D:/.../LocationSets.xml"), ..]):
+            xml_to_dict(xml_filepath=Path("D:/.../LocationSets.xml"))  # parsed from memory
+    """
+
+    # {file path: file content}
+    _entries = {}
+    _lock = threading.Lock()
+    hits = 0
+    misses = 0
+    max_workers = 16
+
+    @classmethod
+    def _read(cls, path: Path) -> Union[bytes, None]:
+        try:
+            return path.read_bytes()
+        except (FileNotFoundError, IsADirectoryError, PermissionError) as err:
+            # the parser raises its usual error when it opens the path itself
+            logger.debug(f"could not prefetch {path}, err={err}")
+            return None
+
+    @classmethod
+    def prefetch(cls, paths: List[Path], max_workers: int = None) -> Dict:
+        """Read files (that are not cached yet) concurrently into the cache. Returns stats, e.g.
+        {'nr_files': 12, 'nr_bytes': 1048576, 'wall_time_s': 0.05}."""
+        start = time.perf_counter()
+        paths = sorted(set(path for path in paths if path not in cls._entries))
+        nr_bytes = 0
+        if paths:
+            with ThreadPoolExecutor(max_workers=min(max_workers or cls.max_workers, len(paths))) as executor:
+                for path, content in zip(paths, executor.map(cls._read, paths)):
+                    if content is None:
+                        continue
+                    with cls._lock:
+                        cls._entries[path] = content
+                    nr_bytes += len(content)
+        stats = {"nr_files": len(paths), "nr_bytes": nr_bytes, "wall_time_s": round(time.perf_counter() - start, 3)}
+        logger.info(f"prefetched {stats}")
+        return stats
+
+    @classmethod
+    def get_content(cls, path: Path) -> Union[bytes, None]:
+        """Cached content of path, None if it is not cached."""
+        return cls._entries.get(Path(path))
+
+    @classmethod
+    def get_source(cls, path: Path) -> Union[io.BytesIO, Path]:
+        """Something to parse path from: a new BytesIO of the cached content, or path if it is not cached."""
+        content = cls._entries.get(Path(path))
+        with cls._lock:
+            if content is None:
+                cls.misses += 1
+                return path
+            cls.hits += 1
+        return io.BytesIO(content)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._entries = {}
+            cls.hits = 0
+            cls.misses = 0
+
+    @classmethod
+    @contextmanager
+    def prefetched(cls, paths: List[Path] = None, max_workers: int = None) -> Iterator[None]:
+        """Prefetch paths (if any) and empty the cache afterwards. More files can be prefetched within."""
+        try:
+            if paths:
+                cls.prefetch(paths=paths, max_workers=max_workers)
+            yield
+        finally:
+            logger.debug(f"file byte cache hits={cls.hits}, misses={cls.misses}")
+            cls.clear()
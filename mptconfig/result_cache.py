@@ -0,0 +1,125 @@
+from mptconfig.excel import ExcelSheet
+from mptconfig.parse_cache import ParsedFileCache
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import hashlib
+import logging
+import pickle
+
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = Path(__file__).parent
+
+
+class CheckResultCache:
+    """Persistent (on disk) cache of check results: the excel sheets of each check, keyed by a fingerprint.
+
+    The fingerprint of a check is a sha256 hash of:
+        - the mptconfig source code (so a code change invalidates all results);
+        - the content of the files of the check's inputs (see MptConfigChecker.get_input_paths);
+        - the fingerprints of the checks it depends on (e.g. check_s_loc_consistency updates hoofdloc.df, so checks
+          that run after it and read hoofdloc depend on the inputs of check_s_loc_consistency too).
+    So if only ignored_xy.csv is edited, only the checks that read ignored_xy (and the checks that depend on them)
+    are run again.
+
+    Checks that mutate shared state (e.g. check_validation_rules creates new validation csvs) are never cached as
+    their side effect is needed. File hashes are cached in memory per (path, mtime, size), so an unchanged file
+    is read only once per process.
+    """
+
+    _code_hash = None
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.hits = []
+        self.misses = []
+
+    @classmethod
+    def get_file_hash(cls, path: Path) -> str:
+        return ParsedFileCache.get_file_hash(path=path)
+
+    @classmethod
+    def get_code_hash(cls) -> str:
+        if cls._code_hash is not None:
+            return cls._code_hash
+        sha256 = hashlib.sha256()
+        for path in sorted(PACKAGE_DIR.glob("*.py")):
+            sha256.update(path.name.encode())
+            sha256.update(cls.get_file_hash(path=path).encode())
+        cls._code_hash = sha256.hexdigest()
+        return cls._code_hash
+
+    @classmethod
+    def get_input_hashes(cls, checker, check_inputs: List) -> Dict:
+        """Get per check input a list with (path, sha256) of the files it is read from."""
+        return {
+            check_input: [
+                (str(path), cls.get_file_hash(path=path)) for path in checker.get_input_paths(check_input=check_input)
+            ]
+            for check_input in check_inputs
+        }
+
+    @classmethod
+    def get_fingerprints(cls, checker, dependencies: Dict, input_hashes: Dict = None) -> Dict:
+        """Get fingerprint per check. Argument dependencies is {check: set of checks it depends on} (registry
+        order, see CheckScheduler.get_dependencies). Argument input_hashes (see get_input_hashes) is optional."""
+        if input_hashes is None:
+            check_inputs = set(check_input for check in dependencies for check_input in check.value.inputs)
+            input_hashes = cls.get_input_hashes(checker=checker, check_inputs=list(check_inputs))
+        fingerprints = {}
+        for check, earlier_checks in dependencies.items():
+            sha256 = hashlib.sha256()
+            sha256.update(cls.get_code_hash().encode())
+            sha256.update(check.name.encode())
+            for check_input in check.value.inputs:
+                sha256.update(repr(input_hashes[check_input]).encode())
+            for earlier_check in sorted(earlier_checks, key=lambda x: x.name):
+                sha256.update(fingerprints[earlier_check].encode())
+            fingerprints[check] = sha256.hexdigest()
+        return fingerprints
+
+    def get_path(self, check) -> Path:
+        return self.cache_dir / f"{check.name}.pkl"
+
+    @staticmethod
+    def is_cacheable(check) -> bool:
+        return not check.value.mutates
+
+    def load(self, check, fingerprint: str) -> Optional[List[ExcelSheet]]:
+        """Get the stored sheets of a check if they were created with the same fingerprint (otherwise None)."""
+        if not self.is_cacheable(check=check):
+            return None
+        path = self.get_path(check=check)
+        cached = None
+        if path.is_file():
+            try:
+                with open(path, "rb") as pickle_file:
+                    cached = pickle.load(pickle_file)
+            except Exception as err:
+                # a corrupt (or incompatible) cache file is just a cache miss
+                logger.warning(f"could not read cached result {path}, err={err}")
+        if cached and cached["fingerprint"] == fingerprint:
+            self.hits.append(check.name)
+            logger.info(f"using cached result of {check.name}")
+            return cached["sheets"]
+        self.misses.append(check.name)
+        return None
+
+    def save(self, check, fingerprint: str, sheets: List[ExcelSheet]) -> None:
+        if not self.is_cacheable(check=check):
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.get_path(check=check)
+        # write to a tmp file first, so that an interrupted run does not leave a corrupt cache file
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as pickle_file:
+            pickle.dump({"fingerprint": fingerprint, "sheets": sheets}, pickle_file)
+        tmp_path.replace(path)
+
+    @property
+    def stats(self) -> Dict:
+        return {"hits": len(self.hits), "misses": len(self.misses), "hit_checks": sorted(self.hits)}
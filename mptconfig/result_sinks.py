@@ -0,0 +1,127 @@
+from abc import ABC
+from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from mptconfig.excel import ExcelSheet
+from mptconfig.excel import ExcelSheetCollector
+from mptconfig.excel import ExcelWriter
+from pathlib import Path
+from typing import Dict
+from typing import List
+
+import json
+import logging
+import pandas as pd  # noqa pandas comes with geopandas
+import re
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResultSink(ABC):
+    """Write each ExcelSheet in ExcelSheetCollector to a separate file in output_dir (in parallel threads).
+
+    Besides the sheet files a manifest (json) is written. The manifest holds per sheet its content dict (name, type,
+    color, nr_rows, description: see ExcelSheet.to_content_dict()) and the file name. Sheets are listed in the same
+    order as the tabs in the excel file. Subclasses define a file_extension and implement _write_df."""
+
+    file_extension = None
+    manifest_file_name = "manifest.json"
+    max_workers = 4
+
+    def __init__(self, results: ExcelSheetCollector, output_dir: Path):
+        self.results = results
+        self.output_dir = output_dir
+        assert isinstance(self.results, ExcelSheetCollector), "results is not a ExcelSheetCollector"
+        assert self.results.has_sheets, "cannot create result files as no checks have been executed (so no sheets)"
+        assert isinstance(self.output_dir, Path), f"output_dir {self.output_dir} must be a pathlib.Path"
+
+    @abstractmethod
+    def _write_df(self, df: pd.DataFrame, path: Path) -> None:
+        pass
+
+    def get_sheet_path(self, sheet: ExcelSheet) -> Path:
+        """Sheet names contain spaces, e.g. 'idmap section error' results in 'idmap_section_error.csv'."""
+        file_name = re.sub(pattern=r"[^A-Za-z0-9_\-]+", repl="_", string=sheet.name)
+        return self.output_dir / f"{file_name}.{self.file_extension}"
+
+    def _write_sheet(self, sheet: ExcelSheet) -> Dict:
+        path = self.get_sheet_path(sheet=sheet)
+        assert not path.exists(), f"result file should not already exist {path}"
+        self._write_df(df=sheet.df, path=path)
+        return {**sheet.to_content_dict(), "file": path.name}
+
+    def write(self) -> Path:
+        """Write all sheets and the manifest. Returns path to the manifest."""
+        logger.info(f"creating {self.file_extension} result files in {self.output_dir}")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if not self.results.has_content_sheet:
+            self.results.create_content_sheet()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # executor.map() preserves the order of the sheets and re-raises exceptions from the threads
+            manifest_sheets = list(executor.map(self._write_sheet, self.results.ordered_sheets))
+        manifest = {"file_extension": self.file_extension, "sheets": manifest_sheets}
+        manifest_path = self.output_dir / self.manifest_file_name
+        with open(manifest_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        logger.info(f"created {len(manifest_sheets)} {self.file_extension} result files in {self.output_dir}")
+        return manifest_path
+
+
+class CsvResultSink(ResultSink):
+    file_extension = "csv"
+
+    def _write_df(self, df: pd.DataFrame, path: Path) -> None:
+        df.to_csv(path_or_buf=path, index=False)
+
+
+class JsonLinesResultSink(ResultSink):
+    file_extension = "jsonl"
+
+    def _write_df(self, df: pd.DataFrame, path: Path) -> None:
+        df.to_json(path_or_buf=path, orient="records", lines=True, date_format="iso")
+
+
+class ParquetResultSink(ResultSink):
+    """Requires optional dependency pyarrow (or fastparquet)."""
+
+    file_extension = "parquet"
+
+    def _write_df(self, df: pd.DataFrame, path: Path) -> None:
+        # parquet columns must have one type, so object columns with e.g. both str and int values become str
+        df = df.copy()
+        for column in df.columns:
+            if df[column].dtype == "O":
+                df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+        df.columns = [str(column) for column in df.columns]
+        df.to_parquet(path=path, index=False)
+
+
+class ResultSinkChoices(Enum):
+    xlsx = "xlsx"
+    parquet = "parquet"
+    csv = "csv"
+    jsonl = "jsonl"
+
+    @property
+    def sink_class(self):
+        mapping = {
+            self.xlsx: ExcelWriter,
+            self.parquet: ParquetResultSink,
+            self.csv: CsvResultSink,
+            self.jsonl: JsonLinesResultSink,
+        }
+        return mapping[self]
+
+
+def write_results(results: ExcelSheetCollector, result_sinks: List[ResultSinkChoices], result_xlsx: Path) -> None:
+    """Write results to all result_sinks. Columnar result files are written to a directory per sink next to the
+    result_xlsx, e.g. 'result_20210101_120000/csv/idmap_section_error.csv'."""
+    assert result_sinks, "at least one result sink is required"
+    for sink in result_sinks:
+        assert isinstance(sink, ResultSinkChoices), f"result sink {sink} must be a ResultSinkChoices"
+        if sink == ResultSinkChoices.xlsx:
+            sink.sink_class(results=results, result_xlsx=result_xlsx).write()
+            continue
+        output_dir = result_xlsx.parent / result_xlsx.stem / sink.value
+        sink.sink_class(results=results, output_dir=output_dir).write()
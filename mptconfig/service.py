@@ -0,0 +1,212 @@
+from enum import Enum
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from mptconfig.check_registry import CheckChoices
+from mptconfig.excel import ExcelSheet
+from mptconfig.excel import ExcelSheetTypeChoices
+from mptconfig.watcher import CheckWatcher
+from socketserver import ThreadingMixIn
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Type
+from urllib.parse import unquote
+from urllib.parse import urlparse
+
+import json
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class _NotFoundError(Exception):
+    """An unknown check or sheet was asked for (http 404)."""
+
+
+class CheckService:
+    """Local HTTP service (stdlib http.server) that keeps the parsed inputs and results of one MptConfigChecker in
+    memory (see CheckWatcher), so that other tools can ask questions without a cold MptConfigChecker.run().
+
+    Endpoints (all responses are json, sheets as {name, type, color, nr_rows, description, rows}):
+        GET  /health              -> {"status": "ok", "nr_checks": 16}
+        GET  /checks              -> per check its name, sheet names and inputs
+        POST /checks/<check name> -> run one check again (e.g. /checks/double_idmaps) and return its sheets
+        GET  /sheets              -> content (name, type, nr_rows, ..) of all result sheets
+        GET  /sheets/<sheet name> -> one result sheet (e.g. /sheets/idmaps%20double)
+        GET  /locations/<loc id>  -> per output check sheet the rows of this location (e.g. /locations/KW100111)
+        POST /reload              -> read changed input files again and re-run the affected checks
+
+    Requests are handled one at a time (a lock around the checker), as checks share (and mutate) their inputs.
+    An unknown endpoint, check or sheet gives status 404, a check that is not served 400 and any other error 500.
+    Results are not written to file: use main.py for that.
+
+    Example:
+        service = CheckService(port=8765)
+        service.serve()  # until ctrl+c
+        curl http://localhost:8765/locations/KW100111
+    """
+
+    # columns of the output check sheets that hold a location id
+    location_columns = ("internalLocation", "externalLocation", "LOC_ID", "locationId", "int_locs")
+
+    def __init__(
+        self,
+        checks: List[CheckChoices] = None,
+        host: str = "localhost",
+        port: int = 8765,
+        path_constants: Type[Enum] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.watcher = CheckWatcher(checks=checks, write_results=False, path_constants=path_constants)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @staticmethod
+    def sheet_to_dict(sheet: ExcelSheet) -> Dict:
+        # to_json converts NaN to null and timestamps to iso strings
+        rows = json.loads(sheet.df.to_json(orient="records", date_format="iso"))
+        return {**sheet.to_content_dict(), "rows": rows}
+
+    def get_sheets(self) -> Dict[str, ExcelSheet]:
+        return {sheet.name: sheet for sheet in self.watcher.get_sheets()}
+
+    def get_sheet(self, sheet_name: str) -> ExcelSheet:
+        try:
+            return self.get_sheets()[sheet_name]
+        except KeyError:
+            raise _NotFoundError(f"sheet {sheet_name}")
+
+    def get_checks(self) -> List[Dict]:
+        return [
+            {
+                "name": check.name,
+                "sheet_names": list(check.value.sheet_names),
+                "inputs": [check_input.value for check_input in check.value.inputs],
+            }
+            for check in self.watcher.checks
+        ]
+
+    def run_check(self, check_name: str) -> Dict:
+        """Run check check_name (and the checks that mutate its inputs) again on the inputs in memory."""
+        try:
+            check = CheckChoices[check_name]
+        except KeyError:
+            raise _NotFoundError(f"check {check_name}")
+        assert check in self.watcher.checks, f"check {check_name} is not served"
+        start = time.perf_counter()
+        rerun_checks = self.watcher.rerun(checks={check})
+        return {
+            "check": check.name,
+            "rerun_checks": [rerun_check.name for rerun_check in rerun_checks],
+            "wall_time_s": round(time.perf_counter() - start, 3),
+            "sheets": [self.sheet_to_dict(sheet=sheet) for sheet in self.watcher.sheets[check]],
+        }
+
+    def get_location(self, loc_id: str) -> Dict:
+        """Rows of all output check sheets in which loc_id is in one of the location_columns."""
+        sheets = {}
+        for sheet in self.watcher.get_sheets():
+            if sheet.sheet_type != ExcelSheetTypeChoices.output_check or sheet.df.empty:
+                continue
+            columns = [column for column in self.location_columns if column in sheet.df.columns]
+            if not columns:
+                continue
+            is_location = sheet.df[columns].astype(str).eq(loc_id).any(axis=1)
+            if is_location.any():
+                rows = sheet.df[is_location].to_json(orient="records", date_format="iso")
+                sheets[sheet.name] = json.loads(rows)
+        return {"location": loc_id, "nr_rows": sum(len(rows) for rows in sheets.values()), "sheets": sheets}
+
+    def reload(self) -> Dict:
+        """Read the changed input files again and re-run the affected checks (see CheckWatcher.poll)."""
+        start = time.perf_counter()
+        rerun_checks = self.watcher.poll()
+        return {
+            "rerun_checks": [check.name for check in rerun_checks],
+            "wall_time_s": round(time.perf_counter() - start, 3),
+            "sheets": [sheet.to_content_dict() for check in rerun_checks for sheet in self.watcher.sheets[check]],
+        }
+
+    def handle(self, method: str, path: str) -> Tuple[int, Dict]:
+        """Route a request to its endpoint. Returns http status code and json response."""
+        parts = [unquote(part) for part in urlparse(path).path.strip("/").split("/")]
+        endpoint, argument = parts[0], "/".join(parts[1:])
+        routes = {
+            ("GET", "health", False): lambda: {"status": "ok", "nr_checks": len(self.watcher.checks)},
+            ("GET", "checks", False): self.get_checks,
+            ("POST", "checks", True): lambda: self.run_check(check_name=argument),
+            ("GET", "sheets", False): lambda: [sheet.to_content_dict() for sheet in self.get_sheets().values()],
+            ("GET", "sheets", True): lambda: self.sheet_to_dict(sheet=self.get_sheet(sheet_name=argument)),
+            ("GET", "locations", True): lambda: self.get_location(loc_id=argument),
+            ("POST", "reload", False): self.reload,
+        }
+        route = routes.get((method, endpoint, bool(argument)))
+        if route is None:
+            return 404, {"error": f"unknown endpoint {method} {path}"}
+        try:
+            with self._lock:
+                return 200, route()
+        except _NotFoundError as err:
+            return 404, {"error": f"not found: {err}"}
+        except AssertionError as err:
+            return 400, {"error": str(err)}
+        except Exception as err:
+            logger.exception(f"{method} {path} failed")
+            return 500, {"error": f"{type(err).__name__}: {err}"}
+
+    def start(self) -> Tuple[str, int]:
+        """Run all checks once (this loads all inputs) and start serving in a background thread. Returns the
+        address, e.g. ('localhost', 8765). With port=0 a free port is chosen."""
+        self.watcher.run_once()
+        self._server = _ThreadingHTTPServer((self.host, self.port), _CheckServiceRequestHandler)
+        self._server.service = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.host, self.port = self._server.server_address[:2]
+        logger.info(f"serving {len(self.watcher.checks)} checks on http://{self.host}:{self.port}")
+        return self.host, self.port
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def serve(self) -> None:
+        """Start and serve until ctrl+c."""
+        self.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.info("stopped check service")
+        finally:
+            self.stop()
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer is not available in python 3.6
+    daemon_threads = True
+
+
+class _CheckServiceRequestHandler(BaseHTTPRequestHandler):
+    def _respond(self, method: str) -> None:
+        status, response = self.server.service.handle(method=method, path=self.path)
+        body = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa N802 method name is defined by BaseHTTPRequestHandler
+        self._respond(method="GET")
+
+    def do_POST(self) -> None:  # noqa N802 method name is defined by BaseHTTPRequestHandler
+        self._respond(method="POST")
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
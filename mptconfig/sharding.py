@@ -0,0 +1,142 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from mptconfig.check_registry import CheckChoices
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.excel import ExcelSheet
+from mptconfig.instrumentation import get_rows_out
+from mptconfig.instrumentation import PerformanceRecorder
+from typing import List
+from typing import Tuple
+
+import logging
+import os
+import pandas as pd  # noqa pandas comes with geopandas
+import pickle
+
+
+logger = logging.getLogger(__name__)
+
+# column with the (shard independent) sort key of a result row, e.g. (loc_set nr, row nr)
+shard_rank = "shard_rank"
+
+# a range [start, end) of caw codes (compared as str). The first shard has start=None, the last end=None
+CawShard = namedtuple("CawShard", ["nr", "start", "end"])
+
+
+def get_caw_codes(loc_ids: pd.Series) -> pd.Series:
+    """Caw code per location id, e.g. '1000' for 'KW100011' and 'OW100001'."""
+    return loc_ids.astype(str).str[2:-2]
+
+
+def get_caw_shards(caw_codes: pd.Series, nr_shards: int) -> List[CawShard]:
+    """Split the caw code range into (at most) nr_shards consecutive shards with about the same nr of rows. All
+    rows of a caw object (e.g. a hoofdloc, its sublocs and their idmaps) are in the same shard."""
+    assert nr_shards >= 1, f"nr_shards {nr_shards} must be >= 1"
+    counts = caw_codes.value_counts().sort_index()
+    cumulative = counts.cumsum()
+    starts = []
+    for nr in range(1, nr_shards):
+        position = cumulative.searchsorted(cumulative.iloc[-1] * nr / nr_shards, side="right") if len(counts) else 0
+        if 0 < position < len(counts) and counts.index[position] not in starts:
+            starts.append(counts.index[position])
+    bounds = [None] + starts + [None]
+    return [CawShard(nr=nr, start=bounds[nr], end=bounds[nr + 1]) for nr in range(len(bounds) - 1)]
+
+
+def filter_caw_shard(df: pd.DataFrame, loc_id_column: str, caw_shard: CawShard = None) -> pd.DataFrame:
+    """Rows of df whose location id (in loc_id_column) is in caw_shard. All rows if caw_shard is None."""
+    if caw_shard is None:
+        return df
+    caw_codes = get_caw_codes(loc_ids=df[loc_id_column])
+    is_in_shard = pd.Series(data=True, index=df.index)
+    if caw_shard.start is not None:
+        is_in_shard &= caw_codes >= caw_shard.start
+    if caw_shard.end is not None:
+        is_in_shard &= caw_codes < caw_shard.end
+    return df[is_in_shard]
+
+
+def merge_shard_rows(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Merge the result rows of one or more shards into the order of an unsharded run: a stable sort on column
+    shard_rank, which is dropped afterwards."""
+    # an empty frame has object columns, which would turn e.g. bool columns of the other frames into object
+    df = pd.concat([frame for frame in frames if not frame.empty] or frames[:1], ignore_index=True)
+    order = sorted(range(len(df)), key=df[shard_rank].iat.__getitem__)
+    return df.iloc[order].drop(columns=shard_rank).reset_index(drop=True)
+
+
+class ShardedCheckRunner:
+    """Run the per location part of a check (see CheckChoices.shard_method_name) per caw code shard in a process
+    pool. Most location checks loop in python over locations that are independent across caw objects (identified by
+    LOC_ID[2:-2]), so they scale with the nr of processes.
+
+    Each shard gets a pickled snapshot of the (warmed) checker with checker.caw_shard set. A shard only loops over
+    its own idmaps, location set rows and validation rows, but looks up in the full inputs, so lookups across shards
+    (e.g. waterstand and peilschaal ids, ignore lists) are shared. The rows of all shards are merged in the check
+    (sorted on a rank column that does not depend on the shards), so results equal those of an unsharded run.
+
+    Example:
+        runner = ShardedCheckRunner(checker=checker, nr_shards=4)
+        sheets = runner.run_check(check=CheckChoices.location_set_errors)
+        runner.close()
+    """
+
+    def __init__(self, checker, nr_shards: int, max_workers: int = None):
+        self.checker = checker
+        self.nr_shards = nr_shards
+        self.max_workers = max_workers if max_workers else min(self.nr_shards, os.cpu_count() or 1)
+        self._executor = None
+        assert self.nr_shards >= 1, f"nr_shards {self.nr_shards} must be >= 1"
+        assert self.max_workers >= 1, f"max_workers {self.max_workers} must be >= 1"
+
+    def get_shards(self, check: CheckChoices) -> List[CawShard]:
+        """Shards with about the same nr of location set and idmap rows (of the inputs that check reads)."""
+        loc_ids = [
+            getattr(self.checker, check_input.value).df["LOC_ID"]
+            for check_input in check.value.inputs
+            if check_input in CheckInputChoices.location_sets()
+        ]
+        if CheckInputChoices.idmaps in check.value.inputs:
+            loc_ids.append(self.checker._get_idmap_df(idmap_files=["IdOPVLWATER"])["internalLocation"])
+        caw_codes = pd.concat([get_caw_codes(loc_ids=ids) for ids in loc_ids], ignore_index=True)
+        return get_caw_shards(caw_codes=caw_codes, nr_shards=self.nr_shards)
+
+    def run_check(self, check: CheckChoices) -> List[ExcelSheet]:
+        """Run check with its per location part (shard_method_name) run per shard in the process pool."""
+        assert check.shard_method_name, f"check {check.name} can not be sharded"
+        shards = self.get_shards(check=check)
+        checker_snapshot = pickle.dumps(self.checker)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        futures = [
+            self._executor.submit(_get_shard_rows, checker_snapshot, check.name, check.shard_method_name, caw_shard)
+            for caw_shard in shards
+        ]
+        # in shard order, future.result() re-raises an exception from the process
+        shard_rows = []
+        for future in futures:
+            rows, performance = future.result()
+            shard_rows.append(rows)
+            self.checker.performance.merge(other=performance)
+        logger.info(f"ran {check.name} in {len(shards)} shards")
+        result = getattr(self.checker, check.value.method_name)(shard_rows=shard_rows)
+        return list(result) if isinstance(result, tuple) else [result]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def _get_shard_rows(
+    checker_snapshot: bytes, check_name: str, method_name: str, caw_shard: CawShard
+) -> Tuple[object, PerformanceRecorder]:
+    """Get the result rows of one shard in a child process (this must be a module level function). Returns the rows
+    and the performance measurements that were made in the child process."""
+    checker = pickle.loads(checker_snapshot)
+    checker.performance = PerformanceRecorder(trace_memory=checker.performance.trace_memory)
+    checker.caw_shard = caw_shard
+    with checker.performance.measure(name=f"{check_name} shard {caw_shard.nr}", kind="shard") as record:
+        rows = getattr(checker, method_name)()
+        record["rows_out"] = get_rows_out(results=list(rows) if isinstance(rows, tuple) else [rows])
+    return rows, checker.performance
@@ -0,0 +1,96 @@
+"""
+Benchmark the MptConfigChecker on synthetic configs (see synthetic_config.py) of increasing scale.
+
+For each scale a synthetic FEWS_SA tree is written and MptConfigChecker.run() runs all checks one by one
+(max_workers=1, so that timings do not depend on the nr of cpus). The timings of each check and input come from
+MptConfigChecker.performance. Per check we also report the scaling exponent between consecutive scales:
+    exponent = log(time_2 / time_1) / log(scale_2 / scale_1)
+An exponent around 1 means linear, an exponent around 2 means quadratic.
+
+Usage:
+    python -m mptconfig.tests.benchmark --scales 1 2 4 --output benchmark.json
+"""
+from mptconfig.checker import MptConfigChecker
+from mptconfig.tests.synthetic_config import SyntheticConfig
+from pathlib import Path
+from typing import Dict
+from typing import List
+
+import argparse
+import json
+import logging
+import math
+import pandas as pd  # noqa pandas comes with geopandas
+import tempfile
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# timings below this are too noisy to derive a scaling exponent from
+MIN_WALL_TIME_EXPONENT = 0.05
+
+
+def run_scale(scale: float, root_dir: Path, seed: int = 1) -> pd.DataFrame:
+    """Run all checks on a synthetic config of the given scale. Returns one row per check/input plus the full run."""
+    synthetic = SyntheticConfig(root_dir=root_dir, scale=scale, seed=seed).write()
+    checker = MptConfigChecker(path_constants=synthetic.path_constants)
+    start = time.perf_counter()
+    checker.run(max_workers=1)
+    run_wall_time_s = round(time.perf_counter() - start, 3)
+    df = checker.performance.to_df()
+    run_record = {"name": "run", "kind": "run", "wall_time_s": run_wall_time_s}
+    df = pd.concat([df, pd.DataFrame(data=[run_record])], ignore_index=True)
+    df.insert(loc=0, column="scale", value=scale)
+    logger.info(f"scale {scale} ({synthetic.nr_kunstwerken} kunstwerken): run took {run_wall_time_s}s")
+    return df
+
+
+def get_scaling_exponents(df: pd.DataFrame) -> pd.DataFrame:
+    """Per name (check, input, run) and per 2 consecutive scales the scaling exponent of the wall time."""
+    data = []
+    scales = sorted(df["scale"].unique())
+    for name, name_df in df.groupby("name", sort=False):
+        wall_times = name_df.groupby("scale")["wall_time_s"].sum()
+        for scale_1, scale_2 in zip(scales[:-1], scales[1:]):
+            time_1, time_2 = wall_times.get(scale_1), wall_times.get(scale_2)
+            is_measurable = time_1 and time_2 and min(time_1, time_2) >= MIN_WALL_TIME_EXPONENT
+            exponent = math.log(time_2 / time_1) / math.log(scale_2 / scale_1) if is_measurable else None
+            data.append({"name": name, "scale_1": scale_1, "scale_2": scale_2, "exponent": exponent})
+    return pd.DataFrame(data=data, columns=["name", "scale_1", "scale_2", "exponent"])
+
+
+def run_benchmark(scales: List[float], root_dir: Path = None) -> Dict[str, pd.DataFrame]:
+    assert scales and all(scale > 0 for scale in scales), f"scales {scales} must be > 0"
+    scales = sorted(scales)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root_dir = root_dir if root_dir else Path(tmp_dir)
+        timings = pd.concat(
+            [run_scale(scale=scale, root_dir=root_dir / f"scale_{scale}") for scale in scales], ignore_index=True
+        )
+    return {"timings": timings, "exponents": get_scaling_exponents(df=timings)}
+
+
+def write_benchmark(benchmark: Dict[str, pd.DataFrame], path: Path) -> None:
+    data = {name: json.loads(df.to_json(orient="records")) for name, df in benchmark.items()}
+    with open(path, "w") as json_file:
+        json.dump(data, json_file, indent=2)
+    logger.info(f"created benchmark file {path}")
+
+
+def parse_args(args: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark mptconfig checks on synthetic configs")
+    parser.add_argument("--scales", nargs="+", type=float, default=[1, 2, 4], help="scale factors (1 = HDSR 2021)")
+    parser.add_argument("--output", type=Path, default=Path("benchmark.json"), help="json file with the results")
+    parser.add_argument("--root-dir", type=Path, default=None, help="keep synthetic configs here (default tmp dir)")
+    return parser.parse_args(args=args)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    arguments = parse_args()
+    result = run_benchmark(scales=arguments.scales, root_dir=arguments.root_dir)
+    write_benchmark(benchmark=result, path=arguments.output)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(result["timings"][["scale", "name", "kind", "wall_time_s", "rows_in", "rows_out"]])
+        print(result["exponents"].dropna())
@@ -1,8 +1,10 @@
 from enum import Enum
+from mptconfig.bundle import ConfigBundle
 from mptconfig.constants import BASE_DIR
 from mptconfig.constants import D_DRIVE
 from mptconfig.constants import PathNamedTuple
 from pathlib import Path
+from typing import Iterator
 from unittest.mock import patch
 
 import logging
@@ -16,6 +18,10 @@ logger = logging.getLogger(__name__)
 TEST_DATA_DIR = BASE_DIR / "mptconfig" / "tests" / "data"
 D_WIS_60_REFERENTIE_201902 = D_DRIVE / "WIS_6.0_REFERENTIE_201902_MPTCHECKER_TEST_INPUT" / "FEWS_SA" / "config"
 D_WIS_60_REFERENTIE_202002 = D_DRIVE / "WIS_6.0_REFERENTIE_202002_MPTCHECKER_TEST_INPUT" / "FEWS_SA" / "config"
+# if a bundle (see ConfigBundle) of a reference config exists, tests run from that bundle instead of from D:. Create
+# one on a machine with D: by calling ConfigBundle.create(path=BUNDLE_REFERENTIE_201902) within the fixture below
+BUNDLE_REFERENTIE_201902 = TEST_DATA_DIR / "bundles" / "WIS_6.0_REFERENTIE_201902_MPTCHECKER_TEST_INPUT.zip"
+BUNDLE_REFERENTIE_202002 = TEST_DATA_DIR / "bundles" / "WIS_6.0_REFERENTIE_202002_MPTCHECKER_TEST_INPUT.zip"
 # we use a tempdir, so that all files that are created during test are deleted after a test run
 TMP_OUTPUT_DIR = Path(tempfile.tempdir)
 
@@ -126,16 +132,25 @@ class PatchedPathConstants2(Enum):
     )
 
 
+def _patch_path_constants(path_constants: Enum, bundle_path: Path) -> Iterator[Enum]:
+    target = "mptconfig.constants.PathConstants"
+    logger.debug(f"patching {target}")
+    with patch(target=target, new=path_constants) as patched:
+        if not bundle_path.is_file():
+            yield patched
+            return
+        with ConfigBundle(path=bundle_path).opened() as bundle_path_constants:
+            with patch(target=target, new=bundle_path_constants) as bundle_patched:
+                yield bundle_patched
+
+
 @pytest.fixture(autouse=False, scope="function")
 def patched_path_constants_1():
     """Ideally we test with unit tests. Since we are in a hurry (and lack of time) we
     test now with integration tests. This means that we use a reference FEWS-config, that does not
     change over time. This means that the paths defined in "mptconfig.constants.PathConstants" are
     patched with paths to files/dirs of which the content does not change over time (PatchedPathConstants1)."""
-    target = "mptconfig.constants.PathConstants"
-    logger.debug(f"patching {target}")
-    with patch(target=target, new=PatchedPathConstants1) as patched:
-        yield patched
+    yield from _patch_path_constants(path_constants=PatchedPathConstants1, bundle_path=BUNDLE_REFERENTIE_201902)
 
 
 @pytest.fixture(autouse=False, scope="function")
@@ -144,7 +159,4 @@ def patched_path_constants_2():
     test now with integration tests. This means that we use a reference FEWS-config, that does not
     change over time. This means that the paths defined in "mptconfig.constants.PathConstants" are
     patched with paths to files/dirs of which the content does not change over time (PatchedPathConstants2)."""
-    target = "mptconfig.constants.PathConstants"
-    logger.debug(f"patching {target}")
-    with patch(target=target, new=PatchedPathConstants2) as patched:
-        yield patched
+    yield from _patch_path_constants(path_constants=PatchedPathConstants2, bundle_path=BUNDLE_REFERENTIE_202002)
@@ -0,0 +1,41 @@
+from mptconfig import constants
+from mptconfig.fews_utilities import FewsConfig
+from mptconfig.tests.synthetic_config import SyntheticConfig
+
+import pandas as pd  # noqa pandas comes with geopandas
+import pytest
+
+
+@pytest.fixture
+def fews_config(tmp_path) -> FewsConfig:
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    return FewsConfig(path=synthetic.config_dir)
+
+
+@pytest.mark.parametrize(
+    "location_set_class",
+    [constants.HoofdLocationSet, constants.SubLocationSet, constants.WaterstandLocationSet],
+)
+def test_locationset_df_is_geo_df_without_geometry(fews_config, location_set_class):
+    loc_set = location_set_class(fews_config=fews_config)
+    df = loc_set.df
+    assert type(df) == pd.DataFrame and "geometry" not in df.columns
+    geo_df = loc_set.geo_df
+    assert geo_df.crs == "epsg:28992"
+    pd.testing.assert_frame_equal(geo_df.drop(columns="geometry"), df, check_like=False)
+
+    # numeric coordinates are the same as the coordinates of the shapely geometries
+    xyz_df = loc_set.get_xyz()
+    assert xyz_df.index.equals(df.index)
+    assert (xyz_df["X"] == geo_df.geometry.x).all()
+    assert (xyz_df["Y"] == geo_df.geometry.y).all()
+    assert all(xyz_df["Z"] == [point.z for point in geo_df.geometry])
+
+
+def test_locationset_df_empty_z(fews_config):
+    hoofdloc = constants.HoofdLocationSet(fews_config=fews_config)
+    # most synthetic hoofdlocs have an empty Z in the csv
+    assert (hoofdloc.df["Z"] == FewsConfig.Z_NODATA_VALUE).sum() > 0
+    assert set(hoofdloc.get_xyz()["Z"]) == {FewsConfig.Z_NODATA_VALUE, 0.3}
+    # sublocs have no Z column
+    assert set(constants.SubLocationSet(fews_config=fews_config).get_xyz()["Z"]) == {FewsConfig.Z_NODATA_VALUE}
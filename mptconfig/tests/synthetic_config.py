@@ -0,0 +1,545 @@
+"""
+Synthetic FEWS_SA config generator.
+
+The integration tests in this package run against two reference configs on D:/ (see fixtures.py). These configs do
+not exist on a Linux CI box, and they have a fixed size. This module writes a FEWS_SA config tree (plus histtags csv
+and ignore csvs) that the MptConfigChecker can fully run on, at a configurable scale factor:
+    scale=1     -> roughly the size of the HDSR config in 2021 (see BASE_NR_KUNSTWERKEN etc.)
+    scale=100   -> 100x as many msw stations and unknown histtags. The nr of kunstwerken (and so the nr of sublocs,
+                   waterstanden, idmaps, histtags, validation rows, etc.) is limited by the nr of 4-digit CAW
+                   codes (~7200, so roughly scale=24)
+
+Usage:
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=1)
+    synthetic.write()
+    MptConfigChecker(path_constants=synthetic.path_constants).run()
+"""
+from enum import Enum
+from mptconfig.constants import PathNamedTuple
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import csv
+import logging
+import random
+
+
+logger = logging.getLogger(__name__)
+
+# nr of kunstwerken (hoofdlocaties) in the HDSR config (2021). Each kunstwerk has 3 sublocs and 2 waterstanden.
+BASE_NR_KUNSTWERKEN = 300
+BASE_NR_MSW = 20
+BASE_NR_UNKNOWN_HISTTAGS = 40
+
+FEWS_NAMESPACE = 'xmlns="http://www.wldelft.nl/fews" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+
+SUBLOC_TYPES = ("pompvijzel", "schuif", "debietmeter")
+
+# ex_par -> int_par per subloc type (the first item of each tuple is the ex_par without sequence number)
+SUBLOC_IDMAPS = {
+    "pompvijzel": [("Q", "Q.G.0"), ("FQ", "F.0"), ("IB", "IB.0"), ("HR", "H.R.0")],
+    "schuif": [("ES", "ES.0"), ("SP", "POS.0"), ("SS", "Hh.0"), ("HR", "H.R.0")],
+    "debietmeter": [("Q", "Q.G.0")],
+}
+HOOFDLOC_IDMAPS = [("HS", "H.S.0"), ("QR", "Q.R.0"), ("QS", "Q.S.0")]
+
+VALIDATION_CSV_ATTRIBUTES = {
+    "oppvlwater_kunstvalidatie_debiet": ["Q_HMAX", "Q_SMAX", "Q_SMIN", "Q_HMIN"],
+    "oppvlwater_watervalidatie": [
+        "HARDMAX",
+        "WIN_SMAX",
+        "OV_SMAX",
+        "ZOM_SMAX",
+        "WIN_SMIN",
+        "OV_SMIN",
+        "ZOM_SMIN",
+        "HARDMIN",
+    ],
+    "oppvlwater_kunstvalidatie_kroos": ["H_HMAX", "H_HMIN"],
+    "oppvlwater_kunstvalidatie_freq": ["FRQ_HMAX", "FRQ_HMIN"],
+    "oppvlwater_kunstvalidatie_hefh": ["HEF_HMAX", "HEF_HMIN"],
+    "oppvlwater_kunstvalidatie_kruinh": ["KR_HMAX", "KR_HMIN"],
+    "oppvlwater_kunstvalidatie_schuifp": ["PERC_HMAX", "PERC_SMAX", "PERC_SMIN", "PERC_HMIN"],
+    "oppvlwater_kunstvalidatie_schuifp2": ["PERC2_HMAX", "PERC2_SMAX", "PERC2_SMIN", "PERC2_HMIN"],
+    "oppvlwater_kunstvalidatie_streef1": ["HS1_HMAX", "HS1_HMIN"],
+    "oppvlwater_kunstvalidatie_streef2": ["HS2_HMAX", "HS2_HMIN"],
+    "oppvlwater_kunstvalidatie_streef3": ["HS3_HMAX", "HS3_HMIN"],
+    "oppvlwater_kunstvalidatie_stuur1": ["HR1_HMAX", "HR1_HMIN"],
+    "oppvlwater_kunstvalidatie_stuur2": ["HR2_HMAX", "HR2_HMIN"],
+    "oppvlwater_kunstvalidatie_stuur3": ["HR3_HMAX", "HR3_HMIN"],
+    "oppvlwater_kunstvalidatie_toert": ["TT_HMAX", "TT_HMIN"],
+}
+
+LOCATION_SET_VALIDATION_CSVS = {
+    "OPVLWATER_HOOFDLOC": ["oppvlwater_kunstvalidatie_streef1", "oppvlwater_kunstvalidatie_streef2"],
+    "OPVLWATER_SUBLOC": [
+        "oppvlwater_kunstvalidatie_debiet",
+        "oppvlwater_kunstvalidatie_freq",
+        "oppvlwater_kunstvalidatie_hefh",
+        "oppvlwater_kunstvalidatie_schuifp",
+        "oppvlwater_kunstvalidatie_stuur1",
+    ],
+    "OPVLWATER_WATERSTANDEN_AUTO": ["oppvlwater_watervalidatie"],
+}
+
+PARAMETER_GROUPS = {
+    "Debiet": ["Q.G.0", "Q.R.0", "Q.S.0"],
+    "Waterhoogte": ["H.G.0", "H.S.0", "H.R.0", "Hh.0"],
+    "Pomp": ["F.0", "IB.0", "ES.0", "POS.0"],
+    "Grondwater": ["GW.G.0", "WQ.G.0"],
+}
+
+
+class SyntheticConfig:
+    """Write a synthetic, but valid, FEWS_SA config tree and matching input csvs to root_dir."""
+
+    def __init__(self, root_dir: Path, scale: float = 1, seed: int = 1, subloc_errors: bool = True):
+        assert isinstance(root_dir, Path), f"root_dir {root_dir} must be a pathlib.Path"
+        assert scale > 0, f"scale {scale} must be > 0"
+        self.root_dir = root_dir
+        self.scale = scale
+        self.random = random.Random(seed)
+        # without subloc errors check_s_loc_consistency passes and a new hoofdloc csv is written
+        self.subloc_errors = subloc_errors
+        self.nr_kunstwerken = max(4, int(BASE_NR_KUNSTWERKEN * scale))
+        self.nr_msw = max(2, int(BASE_NR_MSW * scale))
+        self.nr_unknown_histtags = max(2, int(BASE_NR_UNKNOWN_HISTTAGS * scale))
+        if self.nr_kunstwerken > len(self.caw_codes):
+            # a LOC_ID (e.g. KW123410) holds a 4-digit CAW code, so the nr of kunstwerken is limited
+            logger.warning(f"scale {scale}: nr kunstwerken is limited to {len(self.caw_codes)} (4-digit CAW codes)")
+            self.nr_kunstwerken = len(self.caw_codes)
+
+    @property
+    def config_dir(self) -> Path:
+        return self.root_dir / "FEWS_SA" / "config"
+
+    @property
+    def input_dir(self) -> Path:
+        return self.root_dir / "input"
+
+    @property
+    def output_dir(self) -> Path:
+        return self.root_dir / "output"
+
+    @property
+    def caw_codes(self) -> List[str]:
+        """4-digit CAW codes. We skip codes that start with 76 (MSW) or have an 8 on the 2nd digit (split series)."""
+        return [str(code) for code in range(1000, 10000) if not str(code).startswith("76") and str(code)[1] != "8"]
+
+    @property
+    def path_constants(self) -> Enum:
+        """An Enum with the same members as mptconfig.constants.PathConstants, pointing to the synthetic tree."""
+        paths = {
+            "result_xlsx": (True, False, self.output_dir / "result.xlsx"),
+            "histtags_csv": (True, True, self.input_dir / "histtags.csv"),
+            "fews_config": (False, True, self.config_dir),
+            "output_dir": (False, True, self.output_dir),
+            "ignored_ex_loc": (True, True, self.input_dir / "ignored_ex_loc.csv"),
+            "ignored_histtag": (True, True, self.input_dir / "ignored_histtag.csv"),
+            "ignored_time_series_error": (True, True, self.input_dir / "ignored_time_series_error.csv"),
+            "ignored_ts800": (True, True, self.input_dir / "ignored_ts800.csv"),
+            "ignored_xy": (True, True, self.input_dir / "ignored_xy.csv"),
+        }
+        members = {
+            name: PathNamedTuple(is_file=is_file, should_exist=should_exist, path=path, description=f"synthetic {name}")
+            for name, (is_file, should_exist, path) in paths.items()
+        }
+        return Enum("SyntheticPathConstants", members)
+
+    def write(self) -> "SyntheticConfig":
+        logger.info(f"writing synthetic config (scale={self.scale}) to {self.root_dir}")
+        for directory in ("RegionConfigFiles", "IdMapFiles", "MapLayerFiles"):
+            (self.config_dir / directory).mkdir(parents=True, exist_ok=True)
+        self.input_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        kunstwerken = self._create_kunstwerken()
+        self._write_location_sets_xml()
+        self._write_parameters_xml()
+        self._write_location_csvs(kunstwerken=kunstwerken)
+        self._write_validation_csvs(kunstwerken=kunstwerken)
+        self._write_idmaps(kunstwerken=kunstwerken)
+        self._write_histtags(kunstwerken=kunstwerken)
+        self._write_ignore_csvs(kunstwerken=kunstwerken)
+        return self
+
+    def _create_kunstwerken(self) -> List[Dict]:
+        kunstwerken = []
+        for idx, caw_code in enumerate(self.caw_codes[: self.nr_kunstwerken]):
+            x = 120000 + self.random.randint(0, 30000)
+            y = 440000 + self.random.randint(0, 30000)
+            kunstwerken.append(
+                {
+                    "caw_code": caw_code,
+                    "caw_name": f"GEMAAL {idx}",
+                    "x": x,
+                    "y": y,
+                    "systeem": self.random.choice(["", "AMSTERDAM RIJN KANAAL", "KROMME RIJN"]),
+                    "rayon": self.random.choice(["Noord", "Zuid", "West"]),
+                    "kompas": self.random.choice(["", "ja"]),
+                    # every 10th kunstwerk has an inconsistent subloc xy (reported in check_s_loc_consistency)
+                    "xy_error": self.subloc_errors and idx % 10 == 9,
+                    # every 20th kunstwerk is unmeasured (dummy dates)
+                    "unmeasured": idx % 20 == 19,
+                }
+            )
+        return kunstwerken
+
+    @staticmethod
+    def _write_csv(path: Path, columns: List[str], rows: List[Dict]) -> None:
+        with open(path, mode="w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=columns)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+
+    @staticmethod
+    def _write_xml(path: Path, content: str) -> None:
+        with open(path, mode="w", encoding="utf-8") as xml_file:
+            xml_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            xml_file.write(content)
+
+    @staticmethod
+    def _dates(kunstwerk: Dict) -> Tuple[str, str]:
+        if kunstwerk["unmeasured"]:
+            return "19000101", "22221111"
+        return "19970101", "21000101"
+
+    def _write_location_sets_xml(self) -> None:
+        location_sets = {
+            "OPVLWATER_HOOFDLOC": ("oppvlwater_hoofdloc", True, ["ALLE_TYPES", "SYSTEEM", "RAYON", "KOMPAS"]),
+            "OPVLWATER_SUBLOC": ("oppvlwater_subloc", False, ["TYPE", "ALLE_TYPES", "FUNCTIE", "SYSTEEM", "RAYON"]),
+            "OPVLWATER_WATERSTANDEN_AUTO": ("oppvlwater_waterstanden", True, ["HIST_TAG", "SYSTEEM", "RAYON"]),
+            "MSW_STATIONS": ("msw_stations", False, []),
+            "OPVLWATER_PEILSCHALEN": ("oppvlwater_peilschalen", False, ["RAYON"]),
+        }
+        parts = [f"<locationSets {FEWS_NAMESPACE}>"]
+        for set_id, (csv_file, has_z, attributes) in location_sets.items():
+            parts.append(f'  <locationSet id="{set_id}">')
+            parts.append("    <csvFile>")
+            parts.append(f"      <file>{csv_file}</file>")
+            parts.append("      <geoDatum>Rijks Driehoekstelsel</geoDatum>")
+            parts.append("      <id>%LOC_ID%</id>")
+            parts.append("      <name>%LOC_NAME%</name>")
+            if set_id == "OPVLWATER_SUBLOC":
+                parts.append("      <parentLocationId>%PAR_ID%</parentLocationId>")
+            if set_id != "MSW_STATIONS":
+                parts.append("      <startDateTime>%START%</startDateTime>")
+                parts.append("      <endDateTime>%EIND%</endDateTime>")
+            parts.append("      <x>%X%</x>")
+            parts.append("      <y>%Y%</y>")
+            if has_z:
+                parts.append("      <z>%Z%</z>")
+            for attribute in attributes:
+                parts.append(f'      <attribute id="{attribute}"><text>%{attribute}%</text></attribute>')
+            for validation_csv in LOCATION_SET_VALIDATION_CSVS.get(set_id, []):
+                parts.append("      <attributeFile>")
+                parts.append(f"        <csvFile>{validation_csv}.csv</csvFile>")
+                parts.append("        <id>%LOC_ID%</id>")
+                parts.append("        <startDateTime>%STARTDATE%</startDateTime>")
+                parts.append("        <endDateTime>%ENDDATE%</endDateTime>")
+                for attribute in VALIDATION_CSV_ATTRIBUTES[validation_csv]:
+                    parts.append(f'        <attribute id="{attribute}"><number>%{attribute}%</number></attribute>')
+                parts.append("      </attributeFile>")
+            parts.append("    </csvFile>")
+            parts.append("  </locationSet>")
+        parts.append("</locationSets>\n")
+        self._write_xml(path=self.config_dir / "RegionConfigFiles" / "LocationSets.xml", content="\n".join(parts))
+
+    def _write_parameters_xml(self) -> None:
+        parts = [f"<parameters {FEWS_NAMESPACE}>", "  <parameterGroups>"]
+        for group_id, parameters in PARAMETER_GROUPS.items():
+            parts.append(f'    <parameterGroup id="{group_id}">')
+            parts.append("      <parameterType>instantaneous</parameterType>")
+            for parameter in parameters:
+                parts.append(f'      <parameter id="{parameter}"><shortName>{parameter}</shortName></parameter>')
+            parts.append("    </parameterGroup>")
+        parts.append("  </parameterGroups>")
+        parts.append("</parameters>\n")
+        self._write_xml(path=self.config_dir / "RegionConfigFiles" / "Parameters.xml", content="\n".join(parts))
+
+    def _write_location_csvs(self, kunstwerken: List[Dict]) -> None:
+        hoofdlocs, sublocs, waterstanden, peilschalen = [], [], [], []
+        for kw in kunstwerken:
+            caw_code = kw["caw_code"]
+            start, end = self._dates(kunstwerk=kw)
+            loc_name = f"{kw['caw_name']}_{caw_code}-K_POLDER"
+            all_types = "/".join(sorted(SUBLOC_TYPES))
+            hoofdlocs.append(
+                {
+                    "LOC_ID": f"KW{caw_code}10",
+                    "LOC_NAME": loc_name,
+                    "X": kw["x"],
+                    "Y": kw["y"],
+                    # like the HDSR config, most hoofdlocs have no Z value
+                    "Z": "0.3" if int(caw_code) % 3 == 0 else "",
+                    "START": start,
+                    "EIND": end,
+                    "ALLE_TYPES": all_types,
+                    "SYSTEEM": kw["systeem"],
+                    "RAYON": kw["rayon"],
+                    "KOMPAS": kw["kompas"],
+                }
+            )
+            for ow_nr in (1, 2):
+                waterstanden.append(
+                    {
+                        "LOC_ID": f"OW{caw_code}0{ow_nr}",
+                        "LOC_NAME": f"{kw['caw_name']}_{caw_code}-w_{'boven' if ow_nr == 1 else 'beneden'}",
+                        "X": kw["x"] + ow_nr,
+                        "Y": kw["y"] + ow_nr,
+                        "Z": "0.5",
+                        "START": start,
+                        "EIND": end,
+                        "PEILSCHAAL": f"PS{caw_code}0{ow_nr}",
+                        "HIST_TAG": "",
+                        "SYSTEEM": kw["systeem"],
+                        "RAYON": kw["rayon"],
+                    }
+                )
+                peilschalen.append(
+                    {
+                        "LOC_ID": f"PS{caw_code}0{ow_nr}",
+                        "LOC_NAME": f"peilschaal {caw_code} {ow_nr}",
+                        "X": kw["x"] + ow_nr,
+                        "Y": kw["y"] + ow_nr,
+                        "START": start,
+                        "EIND": end,
+                        "RAYON": kw["rayon"],
+                    }
+                )
+            for sub_nr, sub_type in enumerate(SUBLOC_TYPES, start=1):
+                if sub_type == "debietmeter":
+                    sub_name = f"{loc_name}-{sub_type}"
+                else:
+                    sub_name = f"{loc_name}-{sub_type}1_hoofd"
+                xy_offset = sub_nr if kw["xy_error"] else 0
+                sublocs.append(
+                    {
+                        "LOC_ID": f"KW{caw_code}1{sub_nr}",
+                        "PAR_ID": f"KW{caw_code}10",
+                        "LOC_NAME": sub_name,
+                        "X": kw["x"] + xy_offset,
+                        "Y": kw["y"],
+                        "START": start,
+                        "EIND": end,
+                        "TYPE": sub_type,
+                        "ALLE_TYPES": all_types,
+                        "FUNCTIE": "hoofd",
+                        "SYSTEEM": kw["systeem"],
+                        "RAYON": kw["rayon"],
+                        "KOMPAS": kw["kompas"],
+                        "HBOV": f"OW{caw_code}01",
+                        "HBEN": f"OW{caw_code}02",
+                        "HBOVPS": "",
+                        "HBENPS": "",
+                    }
+                )
+        msw_stations = [
+            {"LOC_ID": f"KW76{idx:04d}", "LOC_NAME": f"MSW station {idx}", "X": 130000 + idx, "Y": 450000 + idx}
+            for idx in range(self.nr_msw)
+        ]
+        map_layer_dir = self.config_dir / "MapLayerFiles"
+        for filename, rows in (
+            ("oppvlwater_hoofdloc", hoofdlocs),
+            ("oppvlwater_subloc", sublocs),
+            ("oppvlwater_waterstanden", waterstanden),
+            ("oppvlwater_peilschalen", peilschalen),
+            ("msw_stations", msw_stations),
+        ):
+            self._write_csv(path=map_layer_dir / f"{filename}.csv", columns=list(rows[0].keys()), rows=rows)
+
+    def _write_validation_csvs(self, kunstwerken: List[Dict]) -> None:
+        rows_per_csv = {filename: [] for filename in VALIDATION_CSV_ATTRIBUTES.keys()}
+        for idx, kw in enumerate(kunstwerken):
+            caw_code = kw["caw_code"]
+            loc_ids = {
+                "oppvlwater_kunstvalidatie_streef1": [f"KW{caw_code}10"],
+                "oppvlwater_kunstvalidatie_debiet": [f"KW{caw_code}13"],
+                "oppvlwater_kunstvalidatie_freq": [f"KW{caw_code}11"],
+                "oppvlwater_kunstvalidatie_hefh": [f"KW{caw_code}12"],
+                "oppvlwater_kunstvalidatie_schuifp": [f"KW{caw_code}12"],
+                "oppvlwater_kunstvalidatie_stuur1": [f"KW{caw_code}11", f"KW{caw_code}12"],
+                "oppvlwater_watervalidatie": [f"OW{caw_code}01", f"OW{caw_code}02"],
+            }
+            if idx % 7 == 0:
+                # a too_many error: streef2 attributes without a H2.S. internal parameter
+                loc_ids["oppvlwater_kunstvalidatie_streef2"] = [f"KW{caw_code}10"]
+            for filename, ids in loc_ids.items():
+                for loc_id in ids:
+                    row = {"LOC_ID": loc_id, "STARTDATE": "19000101", "ENDDATE": "21000101"}
+                    for attribute in VALIDATION_CSV_ATTRIBUTES[filename]:
+                        row[attribute] = self._validation_value(attribute=attribute, idx=idx)
+                    rows_per_csv[filename].append(row)
+        map_layer_dir = self.config_dir / "MapLayerFiles"
+        for filename, rows in rows_per_csv.items():
+            columns = ["LOC_ID", "STARTDATE", "ENDDATE"] + VALIDATION_CSV_ATTRIBUTES[filename]
+            self._write_csv(path=map_layer_dir / f"{filename}.csv", columns=columns, rows=rows)
+
+    @staticmethod
+    def _validation_value(attribute: str, idx: int) -> str:
+        """hmin <= smin < smax <= hmax (and WIN <= OV <= ZOM). Every 13th row has hmin > hmax (a 'value' error)."""
+        values = {"HMIN": -2.0, "SMIN": -1.0, "SMAX": 1.0, "HMAX": 2.0}
+        season_offset = {"WIN": 0.0, "OV": 0.1, "ZOM": 0.2}
+        if attribute in ("HARDMIN", "HARDMAX"):
+            return str(values[attribute.replace("HARD", "H")])
+        prefix, suffix = attribute.rsplit("_", 1)
+        value = values[suffix] + season_offset.get(prefix, 0.0)
+        if idx % 13 == 12 and suffix in ("HMIN", "HMAX"):
+            value = -value
+        return str(value)
+
+    def _kunstwerk_idmaps(self, kw: Dict, old_caw_id: bool) -> Tuple[List[Dict], List[Dict]]:
+        """Returns (kunstwerk maps, waterstand maps) for one kunstwerk."""
+        caw_code = kw["caw_code"]
+        ex_loc = caw_code[1:] if old_caw_id else caw_code
+        kw_maps = [
+            {"ex_loc": ex_loc, "ex_par": f"{ex_par}1", "int_loc": f"KW{caw_code}10", "int_par": int_par}
+            for ex_par, int_par in HOOFDLOC_IDMAPS
+        ]
+        for sub_nr, sub_type in enumerate(SUBLOC_TYPES, start=1):
+            for ex_par, int_par in SUBLOC_IDMAPS[sub_type]:
+                kw_maps.append(
+                    {
+                        "ex_loc": ex_loc,
+                        "ex_par": f"{ex_par}{sub_nr}",
+                        "int_loc": f"KW{caw_code}1{sub_nr}",
+                        "int_par": int_par,
+                    }
+                )
+        ow_maps = [
+            {"ex_loc": ex_loc, "ex_par": "HB1", "int_loc": f"OW{caw_code}01", "int_par": "H.G.0"},
+            {"ex_loc": ex_loc, "ex_par": "HO1", "int_loc": f"OW{caw_code}02", "int_par": "H.G.0"},
+        ]
+        return kw_maps, ow_maps
+
+    @staticmethod
+    def _maps_to_xml(maps: List[Dict]) -> List[str]:
+        return [
+            f'  <map externalLocation="{_map["ex_loc"]}" externalParameter="{_map["ex_par"]}" '
+            f'internalLocation="{_map["int_loc"]}" internalParameter="{_map["int_par"]}"/>'
+            for _map in maps
+        ]
+
+    def _write_idmap_xml(self, filename: str, sections: List[Tuple[str, List[Dict]]]) -> None:
+        parts = [f'<idMap version="1.1" {FEWS_NAMESPACE}>']
+        for comment, maps in sections:
+            if comment:
+                parts.append(f"  {comment}")
+            parts.extend(self._maps_to_xml(maps=maps))
+        parts.append("</idMap>\n")
+        self._write_xml(path=self.config_dir / "IdMapFiles" / f"{filename}.xml", content="\n".join(parts))
+
+    def _write_idmaps(self, kunstwerken: List[Dict]) -> None:
+        # the first 10% of kunstwerken still have an old (3-digit) CAW id
+        nr_old = max(2, len(kunstwerken) // 10)
+        old_kw, old_ow, new_kw, new_ow = [], [], [], []
+        for idx, kw in enumerate(kunstwerken):
+            kw_maps, ow_maps = self._kunstwerk_idmaps(kw=kw, old_caw_id=idx < nr_old)
+            if idx < nr_old:
+                old_kw.extend(kw_maps)
+                old_ow.extend(ow_maps)
+            else:
+                new_kw.extend(kw_maps)
+                new_ow.extend(ow_maps)
+        msw_maps = [
+            {"ex_loc": f"{7600 + idx % 100}", "ex_par": "H", "int_loc": f"KW76{idx:04d}", "int_par": "H.G.0"}
+            for idx in range(self.nr_msw)
+        ]
+        self._write_idmap_xml(
+            filename="IdOPVLWATER",
+            sections=[
+                ("<!--KUNSTWERK SUBLOCS (old CAW id)-->", old_kw),
+                ("<!--WATERSTANDSLOCATIES (old CAW id)-->", old_ow),
+                ("<!--MSW (old CAW id)-->", []),
+                ("<!--KUNSTWERK SUBLOCS (new CAW id)-->", new_kw),
+                ("<!--WATERSTANDSLOCATIES (new CAW id)-->", new_ow),
+                ("<!--MSW (new CAW id)-->", msw_maps),
+            ],
+        )
+        hymos_kw = [dict(_map, ex_loc=f"H{_map['int_loc'][2:6]}") for _map in new_kw[:2]]
+        hymos_ow = [dict(_map, ex_loc=f"H{_map['int_loc'][2:6]}") for _map in new_ow[:2]]
+        self._write_idmap_xml(
+            filename="IdOPVLWATER_HYMOS",
+            sections=[
+                ("", hymos_kw),
+                ("<!--WATERSTANDSLOCATIES-->", hymos_ow),
+                ("<!--OVERIG-->", []),
+            ],
+        )
+        for filename, int_par in (("IdHDSR_NSC", "H.G.0"), ("IdOPVLWATER_WQ", "WQ.G.0"), ("IdGrondwaterCAW", "GW.G.0")):
+            maps = [
+                {"ex_loc": f"{9000 + idx}", "ex_par": f"X{idx}", "int_loc": f"{filename[:4]}{idx}", "int_par": int_par}
+                for idx in range(2)
+            ]
+            self._write_idmap_xml(filename=filename, sections=[("", maps)])
+
+    def _write_histtags(self, kunstwerken: List[Dict]) -> None:
+        """Write a histtags csv: one row per ex_loc+ex_par in the IdOPVLWATER, plus some unknown series."""
+        nr_old = max(2, len(kunstwerken) // 10)
+        rows = []
+        for idx, kw in enumerate(kunstwerken):
+            if kw["unmeasured"]:
+                continue
+            kw_maps, ow_maps = self._kunstwerk_idmaps(kw=kw, old_caw_id=idx < nr_old)
+            series = sorted({f"{_map['ex_loc']}_{_map['ex_par']}" for _map in kw_maps + ow_maps})
+            for serie in series:
+                start_year = 1997 + self.random.randint(0, 10)
+                rows.append(
+                    {
+                        "serie": serie,
+                        "total_min_start_dt": f"{start_year}-03-27 13:15:00",
+                        "total_max_end_dt": f"2020-09-30 23:{self.random.randint(10, 59)}:00",
+                    }
+                )
+        for idx in range(self.nr_unknown_histtags):
+            rows.append(
+                {
+                    "serie": f"{10000 + idx}_HR{idx % 3 + 1}",
+                    "total_min_start_dt": "2018-03-27 13:15:00",
+                    "total_max_end_dt": "2018-12-31 23:30:00",
+                }
+            )
+        self._write_csv(
+            path=self.input_dir / "histtags.csv", columns=["serie", "total_min_start_dt", "total_max_end_dt"], rows=rows
+        )
+
+    def _write_ignore_csvs(self, kunstwerken: List[Dict]) -> None:
+        self._write_csv(
+            path=self.input_dir / "ignored_ex_loc.csv",
+            columns=["externalLocation", "internalLocation"],
+            rows=[{"externalLocation": 2805, "internalLocation": "KW280511"}],
+        )
+        self._write_csv(
+            path=self.input_dir / "ignored_histtag.csv",
+            columns=["UNKNOWN_SERIE", "STARTDATE", "ENDDATE"],
+            rows=[
+                {"UNKNOWN_SERIE": f"#{10000 + idx}_HR{idx % 3 + 1}", "STARTDATE": "20180327", "ENDDATE": "20181231"}
+                for idx in range(0, self.nr_unknown_histtags, 2)
+            ],
+        )
+        self._write_csv(
+            path=self.input_dir / "ignored_time_series_error.csv",
+            columns=["fout", "internalLocation", "mail datum", "reden om te ignoren (obv mailwisseling met CAW)"],
+            rows=[
+                {
+                    "fout": "pompvijzel zonder stuurpeil",
+                    "internalLocation": f"KW{kunstwerken[0]['caw_code']}11",
+                    "mail datum": "20200101",
+                    "reden om te ignoren (obv mailwisseling met CAW)": "synthetic",
+                }
+            ],
+        )
+        self._write_csv(
+            path=self.input_dir / "ignored_ts800.csv",
+            columns=["externalLocation", "internalLocation"],
+            rows=[{"externalLocation": 1800, "internalLocation": "KW180011"}],
+        )
+        xy_errors = [kw for kw in kunstwerken if kw["xy_error"]]
+        self._write_csv(
+            path=self.input_dir / "ignored_xy.csv",
+            columns=["internalLocation", "x", "y"],
+            rows=[{"internalLocation": f"KW{kw['caw_code']}10", "x": kw["x"], "y": kw["y"]} for kw in xy_errors[::2]],
+        )
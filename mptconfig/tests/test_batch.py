@@ -0,0 +1,45 @@
+from mptconfig import constants
+from mptconfig.batch import BatchConfigNamedTuple
+from mptconfig.batch import ConfigBatch
+from mptconfig.check_registry import CheckChoices
+from mptconfig.tests.synthetic_config import SyntheticConfig
+from pathlib import Path
+
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+def test_batch_two_configs(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path / "synthetic", scale=0.05).write()
+    path_constants = synthetic.path_constants
+    # the 2nd config only has another ignored_xy, so all other input files are shared with the 1st config
+    ignored_xy_csv = tmp_path / "ignored_xy.csv"
+    ignored_xy_csv.write_text(path_constants.ignored_xy.value.path.read_text() + "KW999999,1,1\n")
+    ignored_paths = {
+        path_constant.name: path_constant.value.path
+        for path_constant in path_constants
+        if path_constant.name.startswith("ignored_")
+    }
+    configs = [
+        BatchConfigNamedTuple(
+            name=name,
+            fews_config=path_constants.fews_config.value.path,
+            histtags_csv=path_constants.histtags_csv.value.path,
+            ignored_paths=dict(ignored_paths, **extra_ignored_paths),
+        )
+        for name, extra_ignored_paths in (("config_1", {}), ("config_2", {"ignored_xy": ignored_xy_csv}))
+    ]
+    checks = [CheckChoices.histtags_nomatch, CheckChoices.s_loc_consistency, CheckChoices.location_set_errors]
+    path_constants_before = constants.PathConstants
+    batch = ConfigBatch(configs=configs, output_dir=tmp_path / "batch", checks=checks, max_workers=1)
+    summary_df = batch.run()
+    # each config gets its own path constants, PathConstants itself is never changed
+    assert constants.PathConstants is path_constants_before
+
+    assert summary_df["status"].to_list() == ["ok", "ok"]
+    # shared files (histtags csv, location sets) were parsed once before the configs ran
+    assert (summary_df["parse_cache_hits"] > 0).all()
+    for config, result_xlsx in zip(configs, summary_df["result_xlsx"]):
+        assert Path(result_xlsx).is_file() and Path(result_xlsx).parent.name == config.name
+    nr_rows_df = pd.read_excel(tmp_path / "batch" / "batch_summary.xlsx", sheet_name="batch nr rows")
+    assert nr_rows_df.columns.to_list()[-2:] == ["config_1", "config_2"]
+    assert len(nr_rows_df) == len([sheet_name for check in checks for sheet_name in check.value.sheet_names])
@@ -0,0 +1,90 @@
+from mptconfig import constants
+from mptconfig.bundle import ConfigBundle
+from mptconfig.checker import MptConfigChecker
+from mptconfig.parse_cache import ParsedFileCache
+from mptconfig.tests.synthetic_config import SyntheticConfig
+from pathlib import Path
+
+import hashlib
+import json
+import pandas as pd  # noqa pandas comes with geopandas
+import pytest
+import shutil
+import zipfile
+
+
+def test_config_bundle(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path / "synthetic", scale=0.05).write()
+    bundle_path = tmp_path / "bundle.zip"
+    checker = MptConfigChecker(path_constants=synthetic.path_constants)
+    checker.run(max_workers=1)
+    ConfigBundle.create(path=bundle_path, path_constants=synthetic.path_constants)
+    assert not ParsedFileCache.is_enabled
+    manifest = ConfigBundle(path=bundle_path).manifest
+    assert "fews_config/RegionConfigFiles/LocationSets.xml" in manifest["files"]
+    assert manifest["paths"]["ignored_xy"] == "ignored_xy/ignored_xy.csv"
+    assert len(manifest["parsed"]) > 0 and all(len(parsed["sha256"]) == 64 for parsed in manifest["parsed"])
+
+    # run from the bundle only (to other output files)
+    shutil.rmtree(synthetic.config_dir)
+    synthetic.path_constants.result_xlsx.value.path.unlink()
+    original_path_constants = constants.PathConstants
+    with ConfigBundle(path=bundle_path, path_constants=synthetic.path_constants).opened() as path_constants:
+        assert path_constants.fews_config.value.path.is_dir()
+        # output paths are those of the given path constants, PathConstants itself is not changed
+        assert path_constants.result_xlsx.value.path == synthetic.path_constants.result_xlsx.value.path
+        assert constants.PathConstants is original_path_constants
+        bundle_checker = MptConfigChecker(path_constants=path_constants)
+        bundle_checker.run(max_workers=1)
+        # nothing is parsed again
+        assert ParsedFileCache.misses == 0 and ParsedFileCache.hits > 0
+    assert not ParsedFileCache.is_enabled
+    for sheet in checker.results.output_check_sheets:
+        pd.testing.assert_frame_equal(sheet.df, bundle_checker.results[sheet.name].df)
+
+
+def _write_changed_bundle(bundle_path: Path, changed_path: Path, change_manifest) -> Path:
+    """Copy of the bundle with a manifest that is changed by change_manifest(manifest)."""
+    manifest = ConfigBundle(path=bundle_path).manifest
+    change_manifest(manifest)
+    with zipfile.ZipFile(bundle_path) as zip_file, zipfile.ZipFile(changed_path, mode="w") as changed_file:
+        for member in zip_file.namelist():
+            content = zip_file.read(member)
+            if member == ConfigBundle.manifest_name:
+                content = json.dumps(manifest)
+            changed_file.writestr(member, content)
+        if "../outside.csv" in manifest["files"]:
+            changed_file.writestr("../outside.csv", b"")
+    return changed_path
+
+
+def test_config_bundle_corrupt(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path / "synthetic", scale=0.05).write()
+    bundle_path = tmp_path / "bundle.zip"
+    ConfigBundle.create(path=bundle_path, path_constants=synthetic.path_constants)
+
+    def corrupt_file(manifest):
+        manifest["files"]["ignored_xy/ignored_xy.csv"]["sha256"] = "0" * 64
+
+    def corrupt_parsed(manifest):
+        manifest["parsed"][0]["sha256"] = "0" * 64
+
+    def outside_target_dir(manifest):
+        manifest["files"]["../outside.csv"] = {"sha256": hashlib.sha256(b"").hexdigest(), "size": 0}
+
+    for change_manifest, match in [
+        (corrupt_file, "corrupt"),
+        (corrupt_parsed, "corrupt"),
+        (outside_target_dir, "outside the target dir"),
+    ]:
+        changed_path = _write_changed_bundle(
+            bundle_path=bundle_path,
+            changed_path=tmp_path / f"{change_manifest.__name__}.zip",
+            change_manifest=change_manifest,
+        )
+        target_dir = tmp_path / change_manifest.__name__ / "target"
+        with pytest.raises(AssertionError, match=match):
+            with ConfigBundle(path=changed_path, path_constants=synthetic.path_constants).opened(target_dir=target_dir):
+                pass
+        assert not (target_dir.parent / "outside.csv").exists()
+        assert not ParsedFileCache.is_enabled
@@ -0,0 +1,140 @@
+from mptconfig.check_registry import CheckChoices
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.check_registry import CheckScheduler
+from mptconfig.checker import MptConfigChecker
+from mptconfig.excel import ExcelSheet
+from mptconfig.excel import ExcelSheetTypeChoices
+from mptconfig.instrumentation import PerformanceRecorder
+from mptconfig.tests.synthetic_config import SyntheticConfig
+
+import pandas as pd  # noqa pandas comes with geopandas
+import pytest
+import random
+import time
+
+
+def test_check_registry_matches_checker():
+    sheet_names = [sheet_name for check in CheckChoices for sheet_name in check.value.sheet_names]
+    assert len(sheet_names) == len(set(sheet_names)), "sheet names must be unique"
+    for check in CheckChoices:
+        assert callable(getattr(MptConfigChecker, check.value.method_name))
+        for check_input in check.value.inputs + check.value.mutates:
+            assert isinstance(check_input, CheckInputChoices)
+            assert check_input == CheckInputChoices.idmaps or hasattr(MptConfigChecker, check_input.value)
+
+
+def test_check_scheduler_dependencies():
+    dependencies = CheckScheduler(checker=None, checks=list(CheckChoices)).get_dependencies()
+    # checks that only read independent inputs do not have to wait
+    assert dependencies[CheckChoices.double_idmaps] == set()
+    assert dependencies[CheckChoices.idmap_sections] == set()
+    # check_dates_loc_sets adds columns to location sets that are read by check_idmap_int_loc_in_csv
+    assert dependencies[CheckChoices.dates_loc_sets] == {CheckChoices.idmap_int_loc_in_csv}
+    # check_s_loc_consistency updates hoofdloc
+    assert dependencies[CheckChoices.ex_par_missing] == {CheckChoices.dates_loc_sets, CheckChoices.s_loc_consistency}
+    assert CheckChoices.s_loc_consistency in dependencies[CheckChoices.location_set_errors]
+    assert dependencies[CheckChoices.validation_rules] == {CheckChoices.dates_loc_sets, CheckChoices.s_loc_consistency}
+
+
+class FakeChecker:
+    """Has the same check methods as MptConfigChecker, but each check only sleeps a random time."""
+
+    def __init__(self):
+        self.warmed_inputs = []
+        self.finished_checks = []
+        self.performance = PerformanceRecorder()
+        for check in CheckChoices:
+            setattr(self, check.value.method_name, self.create_check(check=check))
+
+    def warm_input(self, check_input: CheckInputChoices) -> None:
+        self.warmed_inputs.append(check_input)
+
+    def get_input_nr_rows(self, check_input: CheckInputChoices) -> int:
+        return 1
+
+    def create_check(self, check: CheckChoices):
+        def run_check():
+            time.sleep(random.uniform(0, 0.02))
+            self.finished_checks.append(check)
+            sheets = tuple(
+                ExcelSheet(
+                    name=sheet_name,
+                    description=f"description of {sheet_name}",
+                    df=pd.DataFrame(),
+                    sheet_type=ExcelSheetTypeChoices.output_check,
+                )
+                for sheet_name in check.value.sheet_names
+            )
+            return sheets if len(sheets) > 1 else sheets[0]
+
+        return run_check
+
+
+def test_check_scheduler_run_threads():
+    checker = FakeChecker()
+    scheduler = CheckScheduler(checker=checker, checks=list(CheckChoices), max_workers=4)
+    sheets = scheduler.run()
+    # sheet order is the registry order, regardless of which check finished first
+    assert [sheet.name for sheet in sheets] == [name for check in CheckChoices for name in check.value.sheet_names]
+    assert CheckInputChoices.validation_csvs_new not in checker.warmed_inputs
+    for check, dependencies in scheduler.get_dependencies().items():
+        finished_before = checker.finished_checks[: checker.finished_checks.index(check)]
+        assert dependencies.issubset(finished_before)
+    performance_df = checker.performance.to_df()
+    assert sorted(performance_df["name"]) == sorted(check.name for check in CheckChoices)
+    assert (performance_df["kind"] == "check").all()
+
+
+def test_check_scheduler_run_subset():
+    checker = FakeChecker()
+    checks = [CheckChoices.location_set_errors, CheckChoices.double_idmaps]
+    sheets = CheckScheduler(checker=checker, checks=checks, max_workers=1).run()
+    assert [sheet.name for sheet in sheets] == ["idmaps double", "loc_set error"]
+    assert CheckInputChoices.histtags not in checker.warmed_inputs
+
+
+def test_check_choices_select():
+    assert CheckChoices.select() == list(CheckChoices)
+    assert CheckChoices.select(only=["location_set_errors", "double_idmaps"]) == [
+        CheckChoices.double_idmaps,
+        CheckChoices.location_set_errors,
+    ]
+    skipped = CheckChoices.select(skip=["double_idmaps"])
+    assert len(skipped) == len(CheckChoices) - 1 and CheckChoices.double_idmaps not in skipped
+    with pytest.raises(AssertionError):
+        CheckChoices.select(only=["check_double_idmaps"])
+    with pytest.raises(AssertionError):
+        CheckChoices.select(only=["double_idmaps"], skip=["double_idmaps"])
+
+
+def test_check_input_choices_read_by():
+    check_inputs = CheckInputChoices.read_by(checks=[CheckChoices.double_idmaps])
+    assert check_inputs == [CheckInputChoices.idmaps]
+    assert [check_input.path_constant_name for check_input in check_inputs] == ["fews_config"]
+    check_inputs = CheckInputChoices.read_by(checks=[CheckChoices.histtags_nomatch])
+    assert [check_input.path_constant_name for check_input in check_inputs] == [
+        "fews_config",
+        "histtags_csv",
+        "ignored_histtag",
+    ]
+
+
+def test_check_scheduler_run_processes(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    checkers = []
+    for use_processes in (False, True):
+        result_xlsx = synthetic.path_constants.result_xlsx.value.path
+        if result_xlsx.is_file():
+            result_xlsx.unlink()
+        checker = MptConfigChecker(path_constants=synthetic.path_constants)
+        # not all checks, so the new csvs are not written (twice)
+        checker.run(
+            checks=CheckChoices.select(skip=["location_set_errors"]), max_workers=2, use_processes=use_processes
+        )
+        checkers.append(checker)
+    for sheet in checkers[0].results.output_check_sheets:
+        pd.testing.assert_frame_equal(sheet.df, checkers[1].results[sheet.name].df)
+    # the checks that ran in a process pool have their measurements too
+    assert sorted(checkers[1].performance.to_df().query("kind == 'check'")["name"]) == sorted(
+        check.name for check in CheckChoices if check != CheckChoices.location_set_errors
+    )
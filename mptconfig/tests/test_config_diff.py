@@ -0,0 +1,56 @@
+from mptconfig.check_registry import CheckChoices
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.config_diff import ConfigDiff
+from mptconfig.config_diff import diff_frames
+from mptconfig.tests.synthetic_config import SyntheticConfig
+
+import pandas as pd  # noqa pandas comes with geopandas
+import re
+import shutil
+
+
+def test_diff_frames():
+    old_df = pd.DataFrame(data={"LOC_ID": ["A", "B", "C"], "TYPE": ["pomp", "schuif", "pomp"], "X": [1, 2, 3]})
+    new_df = pd.DataFrame(data={"LOC_ID": ["A", "B", "D"], "TYPE": ["pomp", "vijzel", "pomp"], "X": [1, 2, 4]})
+    diff_df = diff_frames(old_df=old_df, new_df=new_df, key_columns=["LOC_ID"])
+    assert diff_df.fillna("").values.tolist() == [
+        ["C", "removed", "", "", ""],
+        ["D", "added", "", "", ""],
+        ["B", "changed", "TYPE", "schuif", "vijzel"],
+    ]
+    assert diff_frames(old_df=old_df, new_df=old_df.copy(), key_columns=["LOC_ID"]).empty
+
+
+def test_config_diff(tmp_path):
+    old_config_dir = SyntheticConfig(root_dir=tmp_path / "old", scale=0.05).write().config_dir
+    new_config_dir = tmp_path / "new"
+    shutil.copytree(src=old_config_dir, dst=new_config_dir)
+    assert ConfigDiff(old_config_path=old_config_dir, new_config_path=new_config_dir).diff_df.empty
+
+    # only the layout changed
+    idmap_xml = new_config_dir / "IdMapFiles" / "IdOPVLWATER.xml"
+    idmap_xml.write_text(re.sub(pattern=r"^( +)", repl=r"\1\1", string=idmap_xml.read_text(), flags=re.MULTILINE))
+    assert ConfigDiff(old_config_path=old_config_dir, new_config_path=new_config_dir).diff_df.empty
+
+    idmap_xml = new_config_dir / "IdMapFiles" / "IdHDSR_NSC.xml"
+    idmap_xml.write_text(idmap_xml.read_text().replace('internalLocation="IdHD0"', 'internalLocation="IdHD9"'))
+    subloc_csv = new_config_dir / "MapLayerFiles" / "oppvlwater_subloc.csv"
+    subloc_df = pd.read_csv(subloc_csv, dtype=str, keep_default_na=False)
+    subloc_df.loc[0, "RAYON"] = "Noord"
+    subloc_df.to_csv(subloc_csv, index=False)
+    (new_config_dir / "RegionConfigFiles" / "Extra.xml").write_text("<extra/>")
+
+    config_diff = ConfigDiff(old_config_path=old_config_dir, new_config_path=new_config_dir)
+    diff_df = config_diff.diff_df.fillna("")
+    assert diff_df.values.tolist() == [
+        ["idmap", "IdHDSR_NSC", "9000|X0", "changed", "internalLocation", "IdHD0", "IdHD9"],
+        ["location", "sublocaties", subloc_df.loc[0, "LOC_ID"], "changed", "RAYON", "Zuid", "Noord"],
+        ["file", "RegionConfigFiles", "Extra.xml", "added", "", "", ""],
+    ]
+    assert config_diff.changed_loc_ids == {"IdHD0", "IdHD9", subloc_df.loc[0, "LOC_ID"]}
+    assert CheckInputChoices.hoofdloc not in config_diff.changed_inputs
+    affected_checks = config_diff.get_affected_checks()
+    # check_dates_loc_sets only reads location sets, of which only subloc changed
+    assert CheckChoices.dates_loc_sets in affected_checks
+    assert config_diff.get_affected_checks(checks=[CheckChoices.double_idmaps]) == [CheckChoices.double_idmaps]
+    assert config_diff.to_excel_sheet().nr_rows == 3
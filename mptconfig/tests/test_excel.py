@@ -0,0 +1,50 @@
+from mptconfig.excel import ExcelSheet
+from mptconfig.excel import ExcelSheetCollector
+from mptconfig.excel import ExcelSheetTypeChoices
+from mptconfig.excel import ExcelWriter
+
+import numpy as np
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+def test_get_df_column_widths():
+    df = pd.DataFrame(data={"LOC_ID": ["KW100111", "KW1001"], "X": [1.5, np.nan], "long_column_name": ["a", None]})
+    assert ExcelWriter.get_df_column_widths(df=df) == [4, 8, 3, 16]
+    assert ExcelWriter.get_df_column_widths(df=df.iloc[0:0]) == [4, 6, 1, 16]
+
+
+def test_excel_writer_write(tmp_path):
+    results = ExcelSheetCollector()
+    check_df = pd.DataFrame(
+        data={
+            "LOC_ID": ["KW100111", "KW100112", "KW100113"],
+            "X": [137319, 137320, np.nan],
+            "START": pd.to_datetime(["1997-01-01", "2013-05-05", None]),
+            "SUB_LOCS": ["KW100111,KW100112", None, "=SUM(A1)"],
+        }
+    )
+    results.add_sheet(
+        excelsheet=ExcelSheet(
+            name="some check",
+            description="some check description",
+            df=check_df,
+            sheet_type=ExcelSheetTypeChoices.output_check,
+        )
+    )
+    results.add_sheet(
+        excelsheet=ExcelSheet(
+            name="some empty check",
+            description="some empty check description",
+            df=pd.DataFrame(columns=["LOC_ID", "X"]),
+            sheet_type=ExcelSheetTypeChoices.output_check,
+        )
+    )
+    result_xlsx = tmp_path / "result.xlsx"
+    ExcelWriter(results=results, result_xlsx=result_xlsx).write()
+
+    excel = pd.read_excel(result_xlsx, sheet_name=None, index_col=0)
+    assert list(excel.keys()) == ["content", "some check", "some empty check"]
+    assert excel["content"]["nr_rows"].tolist() == [3, 0]
+    assert excel["content"]["color"].tolist() == ["red", "green"]
+    pd.testing.assert_frame_equal(excel["some check"], check_df, check_dtype=False)
+    assert excel["some empty check"].empty
@@ -1,11 +1,17 @@
 from mptconfig import constants
 from mptconfig.checker import MptConfigChecker
+from mptconfig.fews_utilities import elements_equal
 from mptconfig.fews_utilities import FewsConfig
+from mptconfig.fews_utilities import FewsConfigDirectory
+from mptconfig.fews_utilities import xml_to_etree
+from mptconfig.fews_utilities import XmlDigest
 from mptconfig.tests.fixtures import patched_path_constants_1
 from mptconfig.tests.fixtures import patched_path_constants_2
 from pathlib import Path
+from unittest.mock import patch
 
 import mptconfig.tests.fixtures
+import os
 
 
 # silence flake8 errors
@@ -37,3 +43,65 @@ def test_fews_config_with_patched_paths_2(patched_path_constants_2, tmpdir):
     assert fews_config.path == Path(tmpdir)
     checker = MptConfigChecker()
     assert checker.fews_config.path == mptconfig.tests.fixtures.D_WIS_60_REFERENTIE_202002
+
+
+def test_fews_config_directories_are_listed_lazily(tmp_path):
+    id_map_dir = tmp_path / "IdMapFiles"
+    id_map_dir.mkdir()
+    (id_map_dir / "IdOPVLWATER.xml").write_text("<idMap/>")
+    (id_map_dir / "subdir").mkdir()
+    fews_config = FewsConfig(path=tmp_path)
+    assert id_map_dir not in FewsConfigDirectory._listings, "FewsConfig() must not list directories"
+    assert fews_config.IdMapFiles == {"IdOPVLWATER": id_map_dir / "IdOPVLWATER.xml"}
+    assert fews_config.MapLayerFiles == {}, "a not existing config dir has no files"
+
+    # a listing is cached as long as the directory mtime does not change
+    mtime_ns, files = FewsConfigDirectory._listings[id_map_dir]
+    assert FewsConfig(path=tmp_path).IdMapFiles is files
+    (id_map_dir / "IdOPVLWATER_HYMOS.xml").write_text("<idMap/>")
+    os.utime(id_map_dir, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+    assert sorted(fews_config.IdMapFiles.keys()) == ["IdOPVLWATER", "IdOPVLWATER_HYMOS"]
+
+
+def test_xml_digest(tmp_path):
+    xml = (
+        "<idMap>\n"
+        "  <!--KUNSTWERKEN-->\n"
+        '  <map externalLocation="1" internalLocation="KW1"/>\n'
+        '  <map externalLocation="2" internalLocation="KW2"/>\n'
+        "  <!--WATERSTANDSLOCATIES-->\n"
+        '  <map externalLocation="1" internalLocation="KW1"/>\n'
+        "</idMap>\n"
+    )
+    xml_path = tmp_path / "idmap.xml"
+    xml_path.write_text(xml)
+    reformatted_path = tmp_path / "reformatted.xml"
+    reformatted_path.write_text(
+        xml.replace("  ", "    ").replace(
+            'externalLocation="2" internalLocation="KW2"', 'internalLocation="KW2" externalLocation="2"'
+        )
+    )
+    xml_digest = XmlDigest.from_file(xml_filepath=xml_path)
+    assert XmlDigest.from_file(xml_filepath=xml_path) is xml_digest
+    assert XmlDigest.from_file(xml_filepath=reformatted_path).digest == xml_digest.digest
+    # elements_equal does not ignore layout
+    assert elements_equal(xml_to_etree(xml_filepath=xml_path), xml_to_etree(xml_filepath=xml_path))
+    assert not elements_equal(xml_to_etree(xml_filepath=xml_path), xml_to_etree(xml_filepath=reformatted_path))
+    assert xml_digest.element_digests["/idMap/map[1]"] == xml_digest.element_digests["/idMap/map[3]"]
+    assert list(xml_digest.section_digests) == ["<!--KUNSTWERKEN-->", "<!--WATERSTANDSLOCATIES-->"]
+
+    xml_path.write_text(xml.replace('internalLocation="KW2"', 'internalLocation="KW3"'))
+    changed_digest = XmlDigest.from_file(xml_filepath=xml_path)
+    assert changed_digest.digest != xml_digest.digest
+    assert changed_digest.section_digests["<!--KUNSTWERKEN-->"] != xml_digest.section_digests["<!--KUNSTWERKEN-->"]
+    assert (
+        changed_digest.section_digests["<!--WATERSTANDSLOCATIES-->"]
+        == xml_digest.section_digests["<!--WATERSTANDSLOCATIES-->"]
+    )
+
+    # only the most recently used digests are kept
+    other_path = tmp_path / "other.xml"
+    other_path.write_text("<idMap/>")
+    with patch.object(target=XmlDigest, attribute="max_entries", new=1):
+        other_digest = XmlDigest.from_file(xml_filepath=other_path)
+        assert list(XmlDigest._entries.values()) == [other_digest]
@@ -0,0 +1,58 @@
+from mptconfig.checker import MptConfigChecker
+from mptconfig.histtag_pipeline import ChunkedHisttags
+from mptconfig.tests.synthetic_config import SyntheticConfig
+
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+def test_chunked_histtags(tmp_path):
+    histtags_csv = tmp_path / "histtags.csv"
+    histtags_csv.write_text(
+        "serie;total_min_start_dt;total_max_end_dt\n"
+        "1000_HO1;2010-01-01;2015-01-01\n"
+        "9999_HO1;2011-01-01;2012-01-01\n"
+        "1000_Q1;2009-01-01;2020-01-01\n"
+        "1001_HO1;2012-01-01;2013-01-01\n"
+        "1000_HO1;2008-01-01;2014-01-01\n"
+    )
+    idmap_df = pd.DataFrame(
+        data={
+            "externalLocation": ["1000", "1000", "1001", "1001"],
+            "externalParameter": ["HO1", "Q1", "HO1", "HO1"],
+            "internalLocation": ["KW100011", "KW100011", "OW100101", "OW100102"],
+            "idmap_file": ["IdOPVLWATER", "IdOPVLWATER", "IdOPVLWATER", "IdOPVLWATER_HYMOS"],
+        }
+    )
+    chunked_histtags = ChunkedHisttags(idmap_df=idmap_df, unmatched_path=tmp_path / "nomatch.csv", chunk_size=2)
+    chunked_histtags.run(path=histtags_csv)
+    assert chunked_histtags.nr_rows == 5
+    aggregates = chunked_histtags.aggregates
+    assert sorted(aggregates.index) == ["KW100011", "OW100101", "OW100102"]
+    assert aggregates.loc["KW100011", "total_min_start_dt"] == pd.Timestamp("2008-01-01")
+    assert aggregates.loc["KW100011", "total_max_end_dt"] == pd.Timestamp("2020-01-01")
+    assert aggregates.loc["KW100011", "latest_serie"] == "1000_Q1"
+    assert aggregates.loc["OW100102", "latest_serie"] == "1001_HO1"
+    assert sorted(chunked_histtags.get_matched_series(idmap_files=["IdOPVLWATER_HYMOS"])) == ["1001_HO1"]
+
+    unmatched = chunked_histtags.get_unmatched(ignored_series=pd.Series(data=[], dtype=object))
+    assert unmatched.index.to_list() == [1]
+    assert unmatched["UNKNOWN_SERIE"].to_list() == ["9999_HO1"]
+    assert pd.api.types.is_datetime64_dtype(unmatched["ENDDATE"])
+    assert chunked_histtags.get_unmatched(ignored_series=pd.Series(data=["9999_HO1"])).empty
+
+
+def test_chunked_histtags_run(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    checkers = []
+    for histtag_chunk_size in (None, 10):
+        result_xlsx = synthetic.path_constants.result_xlsx.value.path
+        if result_xlsx.is_file():
+            result_xlsx.unlink()
+        checker = MptConfigChecker(histtag_chunk_size=histtag_chunk_size, path_constants=synthetic.path_constants)
+        checker.run(max_workers=1)
+        checkers.append(checker)
+    assert checkers[0]._chunked_histtags is None
+    assert checkers[1]._histtags is None
+    for sheet in checkers[0].results.output_check_sheets:
+        pd.testing.assert_frame_equal(sheet.df, checkers[1].results[sheet.name].df)
+    pd.testing.assert_frame_equal(checkers[0].mpt_histtags_new, checkers[1].mpt_histtags_new)
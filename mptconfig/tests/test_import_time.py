@@ -0,0 +1,37 @@
+from mptconfig.constants import BASE_DIR
+from typing import Dict
+
+import subprocess
+import sys
+
+
+# these are only imported when a location set is loaded or when the result files are written
+DEFERRED_MODULES = ("geopandas", "shapely", "fiona", "pyproj", "openpyxl", "xlsxwriter")
+# import time of mptconfig.checker without pandas (which it really needs). It is about 0.1 sec, but CI can be slow
+IMPORT_TIME_BUDGET_SECONDS = 1
+
+
+def get_import_times(module: str) -> Dict[str, float]:
+    """Import module in a new python process. Returns {imported module: cumulative import time in seconds}."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR.as_posix(),
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    # each line looks like 'import time:      1051 |     411446 |   mptconfig.checker'
+    import_times = {}
+    for line in completed.stderr.splitlines():
+        _, cumulative_us, imported_module = line.split("|")
+        if cumulative_us.strip().isdigit():
+            import_times[imported_module.strip()] = int(cumulative_us) / 10**6
+    return import_times
+
+
+def test_import_checker_defers_heavy_modules():
+    import_times = get_import_times(module="mptconfig.checker")
+    imported_top_level = {module.split(".")[0] for module in import_times}
+    assert not imported_top_level.intersection(DEFERRED_MODULES)
+    import_time_without_pandas = import_times["mptconfig.checker"] - import_times.get("pandas", 0)
+    assert import_time_without_pandas < IMPORT_TIME_BUDGET_SECONDS
@@ -0,0 +1,66 @@
+from contextlib import closing
+from mptconfig.checker import MptConfigChecker
+from mptconfig.input_store import InputStore
+from mptconfig.tests.synthetic_config import SyntheticConfig
+
+import pandas as pd  # noqa pandas comes with geopandas
+import sqlite3
+
+
+def write_tables(db_path, tables):
+    store = InputStore(db_path=db_path)
+    with closing(sqlite3.connect(db_path.as_posix())) as connection:
+        for name, df in tables.items():
+            store._write_table(connection=connection, name=name, df=df)
+        connection.commit()
+    return store
+
+
+def test_input_store_queries(tmp_path):
+    idmaps = [
+        {"externalLocation": "1", "externalParameter": "HB1", "internalLocation": "KW1", "internalParameter": "H.1"},
+        {"externalLocation": "2", "externalParameter": "HB1", "internalLocation": "KW2", "internalParameter": "H.1"},
+        {"externalLocation": "2", "externalParameter": "Q1", "internalLocation": "KW2", "internalParameter": "Q.1"},
+        {"externalLocation": "1", "externalParameter": "HB1", "internalLocation": "KW1", "internalParameter": "H.1"},
+        {"externalLocation": "2", "externalParameter": "Q1", "internalLocation": "KW2", "internalParameter": "Q.1"},
+        {"externalLocation": "2", "externalParameter": "HB1", "internalLocation": "KW2", "internalParameter": "H.1"},
+        {"externalLocation": "3", "externalParameter": "HB1", "internalLocation": "OW3", "internalParameter": "H.1"},
+    ]
+    tables = {
+        "IdOPVLWATER": pd.DataFrame(data=idmaps),
+        "hoofdloc": pd.DataFrame(data={"LOC_ID": pd.Categorical(["KW1"])}),
+        "subloc": pd.DataFrame(data={"LOC_ID": ["KW1", "KW2"]}),
+        "waterstandloc": pd.DataFrame(data={"LOC_ID": ["OW9"]}),
+        "mswloc": pd.DataFrame(data={"LOC_ID": []}),
+    }
+    store = write_tables(db_path=tmp_path / "inputs.sqlite", tables=tables)
+
+    # same as the python implementation in MptConfigChecker.check_double_idmaps
+    idmap_doubles = [idmap for idmap in idmaps if idmaps.count(idmap) > 1]
+    idmap_doubles = list({idmap["externalLocation"]: idmap for idmap in idmap_doubles}.values())
+    assert store.get_double_idmaps(idmap_file="IdOPVLWATER") == idmap_doubles
+
+    df = store.get_int_locs_in_csvs(idmap_file="IdOPVLWATER")
+    assert df["internalLocation"].to_list() == [idmap["internalLocation"] for idmap in idmaps]
+    assert df.iloc[0][["in_hoofd_csv", "in_sub_csv", "in_ow_csv", "in_msw_csv"]].to_list() == [True, True, False, False]
+    assert not df.iloc[-1][["in_hoofd_csv", "in_sub_csv", "in_ow_csv", "in_msw_csv"]].any()
+
+
+def test_input_store_run(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    db_path = tmp_path / "inputs.sqlite"
+    checkers = []
+    for input_store_path in (None, db_path, db_path):
+        result_xlsx = synthetic.path_constants.result_xlsx.value.path
+        if result_xlsx.is_file():
+            result_xlsx.unlink()
+        checker = MptConfigChecker(path_constants=synthetic.path_constants)
+        checker.run(max_workers=1, input_store_path=input_store_path)
+        checkers.append(checker)
+    assert not checkers[1].input_store.is_reused
+    assert checkers[2].input_store.is_reused
+    for sheet in checkers[0].results.output_check_sheets:
+        for checker in checkers[1:]:
+            pd.testing.assert_frame_equal(sheet.df, checker.results[sheet.name].df)
+    idmaps_df = checkers[2].input_store.query(sql="SELECT * FROM idmaps WHERE bestand = ?", params=("IdOPVLWATER",))
+    assert len(idmaps_df) == len(checkers[0]._get_idmaps(idmap_files=["IdOPVLWATER"]))
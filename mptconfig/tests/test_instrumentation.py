@@ -0,0 +1,73 @@
+from mptconfig.instrumentation import get_nr_rows
+from mptconfig.instrumentation import instrumented_input
+from mptconfig.instrumentation import PerformanceRecorder
+
+import json
+import pandas as pd  # noqa pandas comes with geopandas
+import pickle
+
+
+class FakeChecker:
+    def __init__(self):
+        self.performance = PerformanceRecorder()
+        self._histtags = None
+
+    @property
+    @instrumented_input(cache_attribute="_histtags")
+    def histtags(self) -> pd.DataFrame:
+        if self._histtags is not None:
+            return self._histtags
+        self._histtags = pd.DataFrame(data={"serie": ["a", "b", "c"]})
+        return self._histtags
+
+
+def test_instrumented_input_cache_hits():
+    checker = FakeChecker()
+    for _ in range(3):
+        assert len(checker.histtags) == 3
+    assert checker.performance.cache_hits["histtags"] == 2
+    assert checker.performance.cache_misses["histtags"] == 1
+    df = checker.performance.to_df()
+    assert len(df) == 1, "only the cache miss (loading histtags) is measured"
+    record = df.iloc[0]
+    assert (record["name"], record["kind"], record["rows_out"]) == ("histtags", "input", 3)
+    assert (record["cache_hits"], record["cache_misses"]) == (2, 1)
+    assert record["wall_time_s"] >= 0 and record["cpu_time_s"] >= 0
+    assert pd.isna(record["peak_memory_mb"]), "memory is not traced by default"
+
+
+def test_performance_recorder_trace_memory():
+    performance = PerformanceRecorder(trace_memory=True)
+    with performance.measure(name="outer_check", kind="check") as outer_record:
+        with performance.measure(name="inner_input", kind="input"):
+            inner_data = list(range(200000))
+        outer_record["rows_out"] = len(inner_data)
+        del inner_data
+    inner, outer = performance.records
+    assert inner["name"] == "inner_input" and inner["peak_memory_mb"] > 1
+    # the peak of the inner measurement counts for the outer measurement too
+    assert outer["peak_memory_mb"] >= inner["peak_memory_mb"]
+    assert outer["rows_out"] == 200000
+
+
+def test_performance_recorder_merge_and_json(tmp_path):
+    performance = PerformanceRecorder()
+    with performance.measure(name="double_idmaps", kind="check"):
+        pass
+    # a recorder is pickled when checks run in child processes
+    child_performance = pickle.loads(pickle.dumps(performance))
+    child_performance.count_cache(name="histtags", is_hit=True)
+    performance.merge(other=child_performance)
+    json_path = tmp_path / "result_performance.json"
+    performance.to_json(path=json_path)
+    with open(json_path) as json_file:
+        records = json.load(json_file)
+    assert [record["name"] for record in records] == ["double_idmaps", "double_idmaps", "histtags"]
+    assert records[-1]["cache_hits"] == 1 and records[-1]["wall_time_s"] is None
+
+
+def test_get_nr_rows():
+    assert get_nr_rows(value=pd.DataFrame(data={"a": [1, 2]})) == 2
+    assert get_nr_rows(value=[1, 2, 3]) == 3
+    assert get_nr_rows(value=None) is None
+    assert get_nr_rows(value=object()) is None
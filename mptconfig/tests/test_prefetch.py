@@ -0,0 +1,32 @@
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.checker import MptConfigChecker
+from mptconfig.fews_utilities import xml_to_dict
+from mptconfig.prefetch import FileByteCache
+from mptconfig.tests.synthetic_config import SyntheticConfig
+
+import io
+
+
+def test_file_byte_cache(tmp_path):
+    xml_path = tmp_path / "test.xml"
+    xml_path.write_text("<root><child>1</child></root>")
+    with FileByteCache.prefetched(paths=[xml_path, tmp_path / "missing.xml"]):
+        assert isinstance(FileByteCache.get_source(path=xml_path), io.BytesIO)
+        # a missing file is not cached: its parser raises the usual error
+        assert FileByteCache.get_source(path=tmp_path / "missing.xml") == tmp_path / "missing.xml"
+        # parsers read from memory
+        xml_path.unlink()
+        assert xml_to_dict(xml_filepath=xml_path) == {"root": {"child": "1"}}
+    assert FileByteCache.get_content(path=xml_path) is None
+
+
+def test_prefetch_inputs(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    checker = MptConfigChecker(path_constants=synthetic.path_constants)
+    with FileByteCache.prefetched():
+        checker.prefetch_inputs(check_inputs=[CheckInputChoices.subloc, CheckInputChoices.ignored_xy])
+        for path in checker.get_input_paths(check_input=CheckInputChoices.subloc):
+            assert FileByteCache.get_content(path=path) == path.read_bytes()
+        ignored_xy_csv = synthetic.path_constants.ignored_xy.value.path
+        assert FileByteCache.get_content(path=ignored_xy_csv) == ignored_xy_csv.read_bytes()
+        assert FileByteCache.get_content(path=synthetic.path_constants.histtags_csv.value.path) is None
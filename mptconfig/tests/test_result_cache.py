@@ -0,0 +1,44 @@
+from mptconfig.check_registry import CheckChoices
+from mptconfig.checker import MptConfigChecker
+from mptconfig.tests.synthetic_config import SyntheticConfig
+
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+def run_checker(synthetic: SyntheticConfig, cache_dir) -> MptConfigChecker:
+    result_xlsx = synthetic.path_constants.result_xlsx.value.path
+    if result_xlsx.is_file():
+        # the checker does not overwrite a result file
+        result_xlsx.unlink()
+    checker = MptConfigChecker(path_constants=synthetic.path_constants)
+    checker.run(max_workers=1, result_cache_dir=cache_dir)
+    return checker
+
+
+def test_result_cache(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    cache_dir = tmp_path / "result_cache"
+    cacheable_checks = [check.name for check in CheckChoices if not check.value.mutates]
+
+    first_checker = run_checker(synthetic=synthetic, cache_dir=cache_dir)
+    assert first_checker.result_cache.stats["hits"] == 0
+    assert sorted(first_checker.result_cache.misses) == sorted(cacheable_checks)
+
+    second_checker = run_checker(synthetic=synthetic, cache_dir=cache_dir)
+    assert second_checker.result_cache.stats["hit_checks"] == sorted(cacheable_checks)
+    for name in [sheet_name for check in CheckChoices for sheet_name in check.value.sheet_names]:
+        pd.testing.assert_frame_equal(first_checker.results[name].df, second_checker.results[name].df)
+    performance_df = second_checker.performance.to_df()
+    checks_df = performance_df[performance_df["kind"] == "check"]
+    assert sorted(checks_df[checks_df["cache_hits"] == 1]["name"]) == sorted(cacheable_checks)
+
+    # edit ignored_xy: re-run check_location_set_errors (reads ignored_xy) and the checks that read hoofdloc after
+    # check_s_loc_consistency (reads ignored_xy) has updated hoofdloc
+    ignored_xy_csv = synthetic.path_constants.ignored_xy.value.path
+    ignored_xy_csv.write_text(ignored_xy_csv.read_text() + "KW999999,1,1\n")
+    third_checker = run_checker(synthetic=synthetic, cache_dir=cache_dir)
+    assert sorted(third_checker.result_cache.misses) == [
+        CheckChoices.ex_par_errors_int_loc_missing.name,
+        CheckChoices.ex_par_missing.name,
+        CheckChoices.location_set_errors.name,
+    ]
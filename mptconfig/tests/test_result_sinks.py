@@ -0,0 +1,84 @@
+from mptconfig.excel import ExcelSheet
+from mptconfig.excel import ExcelSheetCollector
+from mptconfig.excel import ExcelSheetTypeChoices
+from mptconfig.result_sinks import CsvResultSink
+from mptconfig.result_sinks import JsonLinesResultSink
+from mptconfig.result_sinks import ParquetResultSink
+from mptconfig.result_sinks import ResultSink
+from mptconfig.result_sinks import ResultSinkChoices
+from mptconfig.result_sinks import write_results
+
+import json
+import pandas as pd  # noqa pandas comes with geopandas
+import pytest
+
+
+def create_results() -> ExcelSheetCollector:
+    results = ExcelSheetCollector()
+    results.add_sheet(
+        excelsheet=ExcelSheet(
+            name="idmap section error",
+            description="some check description",
+            df=pd.DataFrame(data={"LOC_ID": ["KW100111", "KW100112"], "X": [137319, "137320"]}),
+            sheet_type=ExcelSheetTypeChoices.output_check,
+        )
+    )
+    results.add_sheet(
+        excelsheet=ExcelSheet(
+            name="mpt_histtags_new",
+            description="some output_no_check description",
+            df=pd.DataFrame(data={"LOC_ID": ["KW100111"]}),
+            sheet_type=ExcelSheetTypeChoices.output_no_check,
+        )
+    )
+    return results
+
+
+def load_manifest(manifest_path) -> dict:
+    with open(manifest_path) as manifest_file:
+        return json.load(manifest_file)
+
+
+@pytest.mark.parametrize("sink_class", [CsvResultSink, JsonLinesResultSink])
+def test_result_sink_write(sink_class, tmp_path):
+    results = create_results()
+    manifest_path = sink_class(results=results, output_dir=tmp_path).write()
+    manifest = load_manifest(manifest_path=manifest_path)
+
+    # manifest sheets have the same order and content as the excel content sheet
+    content_sheet = results["content"]
+    assert [sheet["name"] for sheet in manifest["sheets"]] == [sheet.name for sheet in results.ordered_sheets]
+    for manifest_sheet, content in zip(manifest["sheets"][1:], content_sheet.df.to_dict(orient="records")):
+        assert manifest_sheet == {**content, "file": manifest_sheet["file"]}
+    assert manifest["sheets"][-1]["file"] == f"idmap_section_error.{sink_class.file_extension}"
+    assert manifest["sheets"][-1]["color"] == "red"
+    assert manifest["sheets"][-1]["nr_rows"] == 2
+
+    if sink_class == CsvResultSink:
+        df = pd.read_csv(tmp_path / "idmap_section_error.csv")
+    else:
+        df = pd.read_json(tmp_path / "idmap_section_error.jsonl", orient="records", lines=True)
+    assert df["LOC_ID"].tolist() == ["KW100111", "KW100112"]
+
+
+def test_parquet_result_sink_write(tmp_path):
+    pytest.importorskip("pyarrow")
+    manifest_path = ParquetResultSink(results=create_results(), output_dir=tmp_path).write()
+    assert len(load_manifest(manifest_path=manifest_path)["sheets"]) == 3
+    df = pd.read_parquet(tmp_path / "idmap_section_error.parquet")
+    assert df["X"].tolist() == ["137319", "137320"]
+
+
+def test_write_results_without_xlsx(tmp_path):
+    result_xlsx = tmp_path / "result_20210101_120000.xlsx"
+    write_results(results=create_results(), result_sinks=[ResultSinkChoices.csv], result_xlsx=result_xlsx)
+    assert not result_xlsx.exists()
+    assert (tmp_path / "result_20210101_120000" / "csv" / "manifest.json").is_file()
+
+
+def test_result_sink_without_writer(tmp_path):
+    class NoWriterResultSink(ResultSink):
+        file_extension = "txt"
+
+    with pytest.raises(TypeError):
+        NoWriterResultSink(results=create_results(), output_dir=tmp_path)
@@ -0,0 +1,33 @@
+from mptconfig.checker import MptConfigChecker
+
+import numpy as np  # noqa numpy comes with geopandas
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+def test_get_caw_loc_names():
+    loc_names = pd.Series(
+        data=[
+            "GEMAAL 0_1000-K_POLDER-pompvijzel1",
+            "STUW 0_2000-K_A-stuw_1000-K_B",  # caw code of PAR_ID is not the first one
+            "no caw code",
+        ],
+        index=[3, 5, 7],
+    )
+    par_ids = pd.Series(data=["KW100010", "KW100010", "KW100010"], index=[3, 5, 7])
+    caw_loc_names = MptConfigChecker._get_caw_loc_names(loc_names=loc_names, par_ids=par_ids)
+    assert caw_loc_names[3] == "GEMAAL 0_1000-K_POLDER"
+    assert caw_loc_names[5] == "_1000-K_B"
+    assert np.isnan(caw_loc_names[7])
+
+
+def test_get_ignored_xy_index():
+    checker = MptConfigChecker()
+    checker._ignored_xy = pd.DataFrame(
+        data={"internalLocation": ["KW1000", "KW10001.", "KW2"], "x": [1, 2, 3], "y": [4, 5, 6]}
+    )
+    loc_ids = pd.Series(data=["KW100010", "KW200010", "KW300010"])
+    ignored_index = checker._get_ignored_xy_index(loc_ids=loc_ids)
+    # like re.match the first matching row wins
+    assert ignored_index[0] == 0
+    assert ignored_index[1] == 2
+    assert np.isnan(ignored_index[2])
@@ -0,0 +1,54 @@
+from mptconfig.service import CheckService
+from mptconfig.tests.synthetic_config import SyntheticConfig
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request
+from urllib.request import urlopen
+
+import json
+import pytest
+
+
+def request(address, path, method="GET"):
+    with urlopen(Request(url=f"http://{address[0]}:{address[1]}{path}", method=method)) as response:
+        return json.loads(response.read())
+
+
+def test_service(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    service = CheckService(port=0, path_constants=synthetic.path_constants)
+    address = service.start()
+    try:
+        assert request(address, "/health")["status"] == "ok"
+        assert "double_idmaps" in [check["name"] for check in request(address, "/checks")]
+        assert not synthetic.path_constants.result_xlsx.value.path.exists(), "service does not write results"
+
+        sheet = request(address, f"/sheets/{quote('ex_par error')}")
+        assert sheet["nr_rows"] == len(sheet["rows"]) > 0
+        loc_id = sheet["rows"][0]["internalLocation"]
+        location = request(address, f"/locations/{loc_id}")
+        assert sheet["rows"][0] in location["sheets"]["ex_par error"]
+        assert request(address, "/locations/KW999999")["nr_rows"] == 0
+
+        response = request(address, "/checks/timeseries_logic", method="POST")
+        assert response["rerun_checks"] == ["dates_loc_sets", "timeseries_logic"]
+        assert [sheet["name"] for sheet in response["sheets"]] == ["time_series error"]
+
+        assert request(address, "/reload", method="POST")["rerun_checks"] == []
+        ignored_ts800_csv = synthetic.path_constants.ignored_ts800.value.path
+        ignored_ts800_csv.write_text(ignored_ts800_csv.read_text() + "9999,KW999999\n")
+        assert request(address, "/reload", method="POST")["rerun_checks"] == ["dates_loc_sets", "timeseries_logic"]
+
+        for path, method in (("/sheets/unknown", "GET"), ("/checks/unknown", "POST"), ("/unknown", "GET")):
+            with pytest.raises(HTTPError) as err:
+                request(address, path, method=method)
+            assert err.value.code == 404
+        # an error inside a check is no 404, but a 500 with the error
+        with patch.object(target=service.watcher, attribute="rerun", side_effect=KeyError("LOC_ID")):
+            with pytest.raises(HTTPError) as err:
+                request(address, "/checks/timeseries_logic", method="POST")
+            assert err.value.code == 500
+            assert "KeyError" in json.loads(err.value.read())["error"]
+    finally:
+        service.stop()
@@ -0,0 +1,58 @@
+from mptconfig.checker import MptConfigChecker
+from mptconfig.sharding import CawShard
+from mptconfig.sharding import filter_caw_shard
+from mptconfig.sharding import get_caw_shards
+from mptconfig.sharding import merge_shard_rows
+from mptconfig.sharding import shard_rank
+from mptconfig.tests.synthetic_config import SyntheticConfig
+
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+def test_get_caw_shards():
+    caw_codes = pd.Series(data=["1000"] * 4 + ["1001"] * 2 + ["1002"] * 2 + ["2000"] * 4)
+    shards = get_caw_shards(caw_codes=caw_codes, nr_shards=3)
+    assert shards == [
+        CawShard(nr=0, start=None, end="1001"),
+        CawShard(nr=1, start="1001", end="2000"),
+        CawShard(nr=2, start="2000", end=None),
+    ]
+    # a caw object is never split, so there can be less shards than asked for
+    assert get_caw_shards(caw_codes=pd.Series(data=["1000"] * 3), nr_shards=3) == [CawShard(nr=0, start=None, end=None)]
+
+
+def test_filter_caw_shard():
+    df = pd.DataFrame(data={"LOC_ID": ["KW100011", "KW100111", "OW100102", "KW200011"]})
+    assert filter_caw_shard(df=df, loc_id_column="LOC_ID") is df
+    shard = CawShard(nr=1, start="1001", end="2000")
+    assert filter_caw_shard(df=df, loc_id_column="LOC_ID", caw_shard=shard)["LOC_ID"].to_list() == [
+        "KW100111",
+        "OW100102",
+    ]
+
+
+def test_merge_shard_rows():
+    frames = [
+        pd.DataFrame(data={"a": [True, False], shard_rank: [(1, 0), (0, 2)]}),
+        pd.DataFrame(data={"a": [], shard_rank: []}),
+        pd.DataFrame(data={"a": [True], shard_rank: [(0, 1)]}),
+    ]
+    df = merge_shard_rows(frames=frames)
+    assert df["a"].to_list() == [True, False, True]
+    assert df["a"].dtype == bool
+    assert shard_rank not in df.columns
+
+
+def test_sharded_run(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    checkers = []
+    for nr_shards in (None, 3):
+        result_xlsx = synthetic.path_constants.result_xlsx.value.path
+        if result_xlsx.is_file():
+            result_xlsx.unlink()
+        checker = MptConfigChecker(path_constants=synthetic.path_constants)
+        checker.run(max_workers=1, nr_shards=nr_shards)
+        checkers.append(checker)
+    for sheet in checkers[0].results.output_check_sheets:
+        pd.testing.assert_frame_equal(sheet.df, checkers[1].results[sheet.name].df)
+    assert any(record["kind"] == "shard" for record in checkers[1].performance.records)
@@ -0,0 +1,47 @@
+from mptconfig.checker import MptConfigChecker
+from mptconfig.fews_utilities import FewsConfig
+from mptconfig.tests.benchmark import run_benchmark
+from mptconfig.tests.synthetic_config import SyntheticConfig
+
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+def test_synthetic_config_write(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    fews_config = FewsConfig(path=synthetic.config_dir)
+    assert sorted(fews_config.IdMapFiles.keys()) == [
+        "IdGrondwaterCAW",
+        "IdHDSR_NSC",
+        "IdOPVLWATER",
+        "IdOPVLWATER_HYMOS",
+        "IdOPVLWATER_WQ",
+    ]
+    hoofdloc_df = pd.read_csv(synthetic.config_dir / "MapLayerFiles" / "oppvlwater_hoofdloc.csv")
+    subloc_df = pd.read_csv(synthetic.config_dir / "MapLayerFiles" / "oppvlwater_subloc.csv")
+    assert len(hoofdloc_df) == synthetic.nr_kunstwerken == 15
+    assert len(subloc_df) == 3 * synthetic.nr_kunstwerken
+    assert set(subloc_df["PAR_ID"]) == set(hoofdloc_df["LOC_ID"])
+    assert len(pd.read_csv(synthetic.input_dir / "histtags.csv")) > len(subloc_df)
+
+
+def test_synthetic_config_run(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05, subloc_errors=False).write()
+    checker = MptConfigChecker(path_constants=synthetic.path_constants)
+    checker.run(max_workers=1)
+    assert checker.results["s_locs not consistent"].nr_rows == 0
+    assert checker.results["validation error"].nr_rows > 0
+    assert (synthetic.output_dir / "result.xlsx").is_file()
+    # without subloc errors a new hoofdloc csv is created
+    assert (synthetic.output_dir / "hoofdlocaties.csv").is_file()
+
+
+def test_run_benchmark(tmp_path):
+    benchmark = run_benchmark(scales=[0.04, 0.02], root_dir=tmp_path)
+    timings = benchmark["timings"]
+    assert sorted(timings["scale"].unique()) == [0.02, 0.04]
+    assert "timeseries_logic" in timings["name"].values
+    run_timings = timings[timings["kind"] == "run"]
+    assert len(run_timings) == 2 and (run_timings["wall_time_s"] > 0).all()
+    exponents = benchmark["exponents"]
+    assert set(exponents["name"]) == set(timings["name"])
+    assert (exponents["scale_1"] == 0.02).all() and (exponents["scale_2"] == 0.04).all()
@@ -1,6 +1,8 @@
 from datetime import date
 from mptconfig.constants import ENDDATE_UNMEASURED_LOC
 from mptconfig.constants import STARTDATE_UNMEASURED_LOC
+from mptconfig.utils import equal_dataframes
+from mptconfig.utils import get_df_fingerprint
 from mptconfig.utils import is_unmeasured_location
 from mptconfig.utils import update_h_locs_start_end
 
@@ -131,3 +133,18 @@ def test_is_unmeasured_location():
         func=lambda x: is_unmeasured_location(startdate=x["STARTDATE"], enddate=x["ENDDATE"]), axis=1
     )
     assert df["is_unmeasured"].to_list() == [True, False]
+
+
+def test_get_df_fingerprint():
+    df = pd.DataFrame(data={"LOC_ID": ["KW1", "KW2", "KW3"], "X": [1.0, 2.0, np.nan]})
+    assert get_df_fingerprint(df=df) == get_df_fingerprint(df=df.copy())
+    shuffled_df = df.iloc[[2, 0, 1]][["X", "LOC_ID"]]
+    assert get_df_fingerprint(df=shuffled_df) != get_df_fingerprint(df=df)
+    assert get_df_fingerprint(df=shuffled_df, ordered=False) == get_df_fingerprint(df=df, ordered=False)
+    assert equal_dataframes(expected_df=df, test_df=shuffled_df)
+    # values, index and dtypes count
+    assert not equal_dataframes(expected_df=df, test_df=df.replace("KW3", "KW4"))
+    assert not equal_dataframes(expected_df=df, test_df=df.set_axis([1, 2, 3], axis=0))
+    assert not equal_dataframes(expected_df=df, test_df=df.astype({"X": object}))
+    # unhashable values (e.g. lists) are hashed as str
+    assert get_df_fingerprint(df=pd.DataFrame(data={"a": [["KW1"], ["KW2"]]})) > 0
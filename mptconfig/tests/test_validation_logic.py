@@ -1,4 +1,9 @@
+from mptconfig.checker_helpers import ValidationRuleTables
+from mptconfig.constants import HoofdLocationSet
 from mptconfig.constants import ValidationLogic
+from pathlib import Path
+
+import pandas as pd  # noqa pandas comes with geopandas
 
 
 def test_get_validation_logic():
@@ -43,3 +48,28 @@ def test_get_validation_logic():
         ("smax_ov", "<=", "hmax"),
         ("smax_zom", "<=", "hmax"),
     ]
+
+
+def test_validation_rule_tables():
+    idmap_df = pd.DataFrame(
+        data={
+            "internalLocation": ["KW101310", "KW101310", "KW101310", "KW101320"],
+            "internalParameter": ["H2.S.0", "H.S.0", "H.S.0", "Q.B.0"],
+        }
+    )
+    tables = ValidationRuleTables(idmap_df=idmap_df)
+    assert tables.get_int_pars(int_loc="KW101310") == ("H.S.0", "H2.S.0")
+    assert tables.get_int_pars(int_loc="KW999999") == ()
+    assert (
+        tables.get_validation_csv_name(int_par="H2.S.0", loc_type="waterstand") == "oppvlwater_kunstvalidatie_streef2"
+    )
+    assert tables.get_validation_csv_name(int_par="H2.S.0", loc_type="stuw") == ""
+    assert tables.get_validation_csv_name(int_par="Q.B.0", loc_type="waterstand") == ""
+
+    hoofdloc = HoofdLocationSet(fews_config_path=Path("not_read"))
+    attribs = tables.get_attribs(loc_set=hoofdloc, int_pars=("H.S.0", "H2.S.0"))
+    assert attribs.required == ["HS1_HMAX", "HS1_HMIN", "HS2_HMAX", "HS2_HMIN"]
+    assert attribs.not_allowed == ["HS3_HMAX", "HS3_HMIN"]
+    assert attribs.rules == [{"hmax": "HS1_HMAX", "hmin": "HS1_HMIN"}, {"hmax": "HS2_HMAX", "hmin": "HS2_HMIN"}]
+    assert tables.get_attribs(loc_set=hoofdloc, int_pars=("H.S.0", "H2.S.0")) is attribs
+    assert tables.hloc_sloc_statements == ValidationLogic.get_hloc_sloc_validation_logic()
@@ -0,0 +1,33 @@
+from mptconfig.vocabulary import IdVocabulary
+
+import pandas as pd  # noqa pandas comes with geopandas
+import pickle
+
+
+def test_vocabulary_shared_dtype():
+    vocabulary = IdVocabulary()
+    loc_df = vocabulary.categorize(
+        df=pd.DataFrame(data={"LOC_ID": ["KW100111", "KW100110"], "TYPE": ["pomp", "schuif"], "X": [1, 2]})
+    )
+    idmap_df = vocabulary.categorize(
+        df=pd.DataFrame(
+            data={
+                "externalLocation": ["1001", "1001"],
+                "externalParameter": ["Q1", "HS1"],
+                "internalLocation": ["KW100111", "KW100199"],
+                "internalParameter": ["Q.G.0", "H.S.0"],
+            }
+        )
+    )
+    assert isinstance(loc_df["TYPE"].dtype, pd.CategoricalDtype)
+    assert loc_df["X"].dtype == "int64", "columns without vocabulary are not changed"
+    # the vocabulary has grown, so loc_df has an older dtype until it is categorized again
+    assert loc_df["LOC_ID"].dtype != idmap_df["internalLocation"].dtype
+    loc_df = vocabulary.categorize(df=loc_df)
+    assert loc_df["LOC_ID"].dtype == idmap_df["internalLocation"].dtype == idmap_df["externalLocation"].dtype
+    assert list(loc_df["LOC_ID"].cat.categories) == ["1001", "KW100110", "KW100111", "KW100199"]
+    assert idmap_df["internalLocation"].isin(loc_df["LOC_ID"]).to_list() == [True, False]
+    assert loc_df.sort_values(by="LOC_ID")["LOC_ID"].to_list() == ["KW100110", "KW100111"]
+    # a vocabulary is pickled along with MptConfigChecker when checks run in a process pool
+    vocabulary = pickle.loads(pickle.dumps(vocabulary))
+    assert vocabulary.get_dtype(column="internalParameter") == idmap_df["internalParameter"].dtype
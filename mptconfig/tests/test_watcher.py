@@ -0,0 +1,40 @@
+from mptconfig.check_registry import CheckChoices
+from mptconfig.checker import MptConfigChecker
+from mptconfig.tests.synthetic_config import SyntheticConfig
+from mptconfig.watcher import CheckWatcher
+
+import pandas as pd  # noqa pandas comes with geopandas
+
+
+def test_watcher_reruns_affected_checks(tmp_path):
+    synthetic = SyntheticConfig(root_dir=tmp_path, scale=0.05).write()
+    result_xlsx = synthetic.path_constants.result_xlsx.value.path
+    watcher = CheckWatcher(path_constants=synthetic.path_constants)
+    watcher.run_once()
+    assert result_xlsx.is_file()
+    assert watcher.poll() == [], "nothing changed"
+
+    # the file changed, but its content did not (empty lines are skipped)
+    ignored_ts800_csv = synthetic.path_constants.ignored_ts800.value.path
+    ignored_ts800_csv.write_text(ignored_ts800_csv.read_text() + "\n\n")
+    assert watcher.poll() == []
+
+    # ignored_ts800 is only read by check_timeseries_logic, which also reads subloc (mutated by
+    # check_dates_loc_sets), so check_dates_loc_sets runs again on a freshly read subloc
+    ignored_ts800_csv.write_text(ignored_ts800_csv.read_text() + "9999,KW999999\n")
+    assert watcher.poll() == [CheckChoices.dates_loc_sets, CheckChoices.timeseries_logic]
+    assert result_xlsx.is_file()
+    assert watcher.poll() == []
+
+    ignored_xy_csv = synthetic.path_constants.ignored_xy.value.path
+    ignored_xy_csv.write_text(ignored_xy_csv.read_text() + "KW999999,1,1\n")
+    rerun_checks = watcher.poll()
+    assert CheckChoices.s_loc_consistency in rerun_checks
+    assert CheckChoices.idmap_sections not in rerun_checks
+
+    # the watcher results equal those of a full run on the edited config
+    result_xlsx.unlink()
+    checker = MptConfigChecker(path_constants=synthetic.path_constants)
+    checker.run(max_workers=1)
+    for sheet in watcher.get_sheets():
+        pd.testing.assert_frame_equal(sheet.df, checker.results[sheet.name].df)
@@ -1,4 +1,6 @@
 from mptconfig import constants
+from mptconfig.parse_cache import ParsedFileCache
+from mptconfig.prefetch import FileByteCache
 from pathlib import Path
 from typing import Dict
 from typing import List
@@ -7,6 +9,7 @@ from typing import TypeVar
 from typing import Union
 
 import datetime
+import hashlib
 import logging
 import numpy as np  # noqa numpy comes with geopandas
 import pandas as pd  # noqa pandas comes with geopandas
@@ -140,21 +143,41 @@ def sort_validation_attribs(rule: Dict) -> Dict[str, list]:
     return result
 
 
+def get_df_fingerprint(df: pd.DataFrame, ordered: bool = True) -> int:
+    """64-bit fingerprint of a pd.DataFrame: its column names, dtypes, index and values (rows are hashed with
+    pd.util.hash_pandas_object, the row hashes are hashed with blake2b). With ordered=False the order of rows and
+    columns does not count, e.g. to compare check results (see equal_dataframes)."""
+    if not ordered:
+        df = df.sort_index(axis=1)
+    header = pd.util.hash_array(
+        vals=np.array([f"{column}|{dtype}" for column, dtype in df.dtypes.items()], dtype=object)
+    )
+    try:
+        row_hashes = pd.util.hash_pandas_object(obj=df, index=True).values
+    except TypeError:
+        # unhashable values (e.g. lists) are hashed as str
+        row_hashes = pd.util.hash_pandas_object(obj=df.astype(str), index=True).values
+    if not ordered:
+        row_hashes = np.sort(row_hashes)
+    content = np.concatenate([header, row_hashes]).astype(np.uint64).tobytes()
+    return int.from_bytes(hashlib.blake2b(content, digest_size=8).digest(), byteorder="little")
+
+
 def equal_dataframes(expected_df: pd.DataFrame, test_df: pd.DataFrame) -> bool:
-    """A helper function to ensure that a dataframe check result equals an expected dataframe. """
-    # ensure ordered dfs (index and column)
-    test_df = test_df.sort_index().sort_index(axis=1)
-    expected_df = expected_df.sort_index().sort_index(axis=1)
-    return expected_df.equals(test_df)
+    """A helper function to ensure that a dataframe check result equals an expected dataframe (regardless the order
+    of index and columns), by comparing fingerprints instead of sorting and comparing both dataframes."""
+    return get_df_fingerprint(df=expected_df, ordered=False) == get_df_fingerprint(df=test_df, ordered=False)
 
 
+@ParsedFileCache.cached_parser
 def pd_read_csv_expect_columns(path: Path, expected_columns: List[str], parse_dates: List[str] = None) -> pd.DataFrame:
     """Flexible pd.read_csv that tries two separators: comma and semi-colon. It verifies the
     panda dataframe column names."""
     assert path.is_file()
     separators = (None, ";") if parse_dates else (",", ";")
     for separator in separators:
-        df = pd.read_csv(filepath_or_buffer=path, sep=separator, engine="python", parse_dates=parse_dates)
+        source = FileByteCache.get_source(path=path)
+        df = pd.read_csv(filepath_or_buffer=source, sep=separator, engine="python", parse_dates=parse_dates)
         if sorted(df.columns) == sorted(expected_columns):
             return df
     raise AssertionError(f"could not read csv {path} with separators ; and ,")
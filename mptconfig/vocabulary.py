@@ -0,0 +1,94 @@
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import logging
+import pandas as pd  # noqa pandas comes with geopandas
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class IdVocabulary:
+    """Shared categorical vocabulary of location and parameter identifiers (and a few low cardinality location
+    attributes). Frames are categorized when they are loaded, so that the same id is stored once (as a category)
+    instead of as a python string in each frame and in each copy. Since location sets and idmaps share one dtype,
+    merges, groupbys and isin() tests between them work on integer codes.
+
+    The vocabulary grows when a new frame is categorized. The categories are kept sorted, so that sorting a
+    categorical column gives the same order as sorting the strings. Use categorize() again on an earlier frame to
+    recode it to the grown vocabulary (this is cheap: only the codes are recomputed).
+
+    Example:
+        vocabulary = IdVocabulary()
+        idmap_df = vocabulary.categorize(df=pd.DataFrame(data=idmaps))
+        idmap_df["internalLocation"].isin(hoofdloc_df["LOC_ID"])
+    """
+
+    # column name -> vocabulary name
+    column_vocabularies = {
+        "LOC_ID": "location",
+        "PAR_ID": "location",
+        "internalLocation": "location",
+        "externalLocation": "location",
+        "internalParameter": "parameter",
+        "externalParameter": "parameter",
+        "TYPE": "TYPE",
+        "FUNCTIE": "FUNCTIE",
+        "SYSTEEM": "SYSTEEM",
+        "RAYON": "RAYON",
+        "KOMPAS": "KOMPAS",
+    }
+
+    def __init__(self):
+        self._values = {name: set() for name in set(self.column_vocabularies.values())}
+        self._dtypes = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        # a lock can not be pickled (MptConfigChecker is pickled when checks run in a process pool)
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_columns(self, df: pd.DataFrame) -> List[str]:
+        return [column for column in df.columns if column in self.column_vocabularies]
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Add the values of the vocabulary columns of df."""
+        with self._lock:
+            for column in self.get_columns(df=df):
+                name = self.column_vocabularies[column]
+                values = df[column].cat.categories if isinstance(df[column].dtype, pd.CategoricalDtype) else df[column]
+                new_values = set(values.dropna().unique()).difference(self._values[name])
+                if new_values:
+                    self._values[name].update(new_values)
+                    self._dtypes.pop(name, None)
+
+    def get_dtype(self, column: str) -> Optional[pd.CategoricalDtype]:
+        """Current categorical dtype of a column (None if column has no vocabulary)."""
+        name = self.column_vocabularies.get(column)
+        if not name:
+            return None
+        with self._lock:
+            if name not in self._dtypes:
+                self._dtypes[name] = pd.CategoricalDtype(categories=sorted(self._values[name]), ordered=False)
+            return self._dtypes[name]
+
+    def categorize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Update the vocabulary with df and return df with its vocabulary columns as shared categoricals. Only
+        string columns (or categoricals of an earlier vocabulary) are converted, df itself is not changed."""
+        self.update(df=df)
+        dtypes = {}
+        for column in self.get_columns(df=df):
+            dtype = self.get_dtype(column=column)
+            is_string = pd.api.types.is_object_dtype(df[column]) and pd.api.types.infer_dtype(df[column]) == "string"
+            is_categorical = isinstance(df[column].dtype, pd.CategoricalDtype)
+            if (is_string or is_categorical) and df[column].dtype != dtype:
+                dtypes[column] = dtype
+        return df.astype(dtypes) if dtypes else df
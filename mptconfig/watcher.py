@@ -0,0 +1,208 @@
+from enum import Enum
+from mptconfig.check_registry import CheckChoices
+from mptconfig.check_registry import CheckInputChoices
+from mptconfig.check_registry import CheckScheduler
+from mptconfig.checker import MptConfigChecker
+from mptconfig.excel import ExcelSheet
+from mptconfig.excel import ExcelSheetCollector
+from mptconfig.instrumentation import PerformanceRecorder
+from mptconfig.result_cache import CheckResultCache
+from mptconfig.result_sinks import ResultSinkChoices
+from mptconfig.result_sinks import write_results
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Type
+
+import logging
+import shutil
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class CheckWatcher:
+    """Long-running watch mode: keep the parsed inputs of one MptConfigChecker in memory, poll the input files
+    (fews config and data/input) and re-run only the checks that are affected by a changed file.
+
+    Each poll stats the input files (see MptConfigChecker.get_input_paths); a file is only hashed again if its
+    mtime or size changed. A check is affected if its fingerprint changed (see CheckResultCache.get_fingerprints),
+    so also if it depends on a check whose inputs changed. The changed file of an input that no check mutates (e.g.
+    the histtags csv) is first compared on content: if the fingerprint of the reloaded input did not change (see
+    MptConfigChecker.get_input_fingerprint), e.g. as the file was only saved again, no check is affected. Checks that
+    mutate an input (e.g. check_dates_loc_sets) are re-run too if an affected check reads that input, on a freshly
+    read input, so each check sees the same state as in a full run. After each re-run the result files are
+    rewritten (all checks, also the unaffected ones), unless write_results=False (e.g. CheckService keeps the
+    results in memory only).
+
+    Watch mode never writes new csvs (like a run with a subset of the checks), so that it does not trigger itself.
+    Paths are read from path_constants (default constants.PathConstants, see MptConfigChecker).
+
+    Example:
+        watcher = CheckWatcher(checks=[CheckChoices.timeseries_logic], interval_s=1)
+        watcher.watch()  # until ctrl+c
+    """
+
+    def __init__(
+        self,
+        checks: List[CheckChoices] = None,
+        result_sinks: List[ResultSinkChoices] = None,
+        interval_s: float = 1.0,
+        trace_memory: bool = False,
+        write_results: bool = True,
+        path_constants: Type[Enum] = None,
+    ):
+        self.checks = [check for check in CheckChoices if check in checks] if checks else list(CheckChoices)
+        self.result_sinks = result_sinks if result_sinks else [ResultSinkChoices.xlsx]
+        self.interval_s = interval_s
+        self.write_results = write_results
+        self.checker = MptConfigChecker(trace_memory=trace_memory, path_constants=path_constants)
+        self.dependencies = CheckScheduler(checker=self.checker, checks=self.checks).get_dependencies()
+        self.check_inputs = CheckInputChoices.read_by(checks=self.checks)
+        self.sheets = {}
+        self._input_hashes = {}
+        self._fingerprints = {}
+        self._has_written = False
+        assert self.interval_s > 0, f"interval_s {self.interval_s} must be > 0"
+
+    def _get_input_hashes(self) -> Dict:
+        return CheckResultCache.get_input_hashes(checker=self.checker, check_inputs=self.check_inputs)
+
+    def get_rerun_checks(self, affected_checks: Set[CheckChoices]) -> List[CheckChoices]:
+        """Add the checks that mutate an input read (or mutated) by an affected check. These must run again on a
+        freshly read input, otherwise an affected check would see the mutations of a previous run."""
+        rerun_checks = set(affected_checks)
+        for check in affected_checks:
+            for mutator in self.checks:
+                if set(mutator.value.mutates) & set(check.value.inputs + check.value.mutates):
+                    rerun_checks.add(mutator)
+        return [check for check in self.checks if check in rerun_checks]
+
+    def _run_checks(self, checks: List[CheckChoices]) -> None:
+        # a new recorder per run, so the performance sheet only shows the last (re-)run
+        self.checker.performance = PerformanceRecorder(trace_memory=self.checker.performance.trace_memory)
+        scheduler = CheckScheduler(checker=self.checker, checks=checks, max_workers=1)
+        sheets = iter(scheduler.run())
+        for check in scheduler.checks:
+            self.sheets[check] = [next(sheets) for _ in check.value.sheet_names]
+
+    def _remove_written_results(self) -> None:
+        """The result writers do not overwrite files, so remove what this watcher wrote before."""
+        result_xlsx = self.checker.path_constants.result_xlsx.value.path
+        for sink in self.result_sinks:
+            if sink == ResultSinkChoices.xlsx:
+                if result_xlsx.is_file():
+                    result_xlsx.unlink()
+                continue
+            output_dir = result_xlsx.parent / result_xlsx.stem / sink.value
+            if output_dir.is_dir():
+                shutil.rmtree(output_dir)
+
+    def _write_results(self) -> None:
+        if self._has_written:
+            self._remove_written_results()
+        self.checker.results = ExcelSheetCollector()
+        for check in self.checks:
+            for sheet in self.sheets[check]:
+                self.checker.results.add_sheet(excelsheet=sheet)
+        self.checker._add_output_no_check_sheets(check_inputs=self.check_inputs, is_full_run=False)
+        write_results(
+            results=self.checker.results,
+            result_sinks=self.result_sinks,
+            result_xlsx=self.checker.path_constants.result_xlsx.value.path,
+        )
+        self._has_written = True
+
+    def run_once(self) -> None:
+        """Run all checks and write the results. This loads (and keeps) all inputs."""
+        self._input_hashes = self._get_input_hashes()
+        self._fingerprints = CheckResultCache.get_fingerprints(
+            checker=self.checker, dependencies=self.dependencies, input_hashes=self._input_hashes
+        )
+        self._run_checks(checks=self.checks)
+        if self.write_results:
+            self._write_results()
+
+    def rerun(self, checks: Set[CheckChoices], changed_inputs: List[CheckInputChoices] = None) -> List[CheckChoices]:
+        """Run checks again (and the checks that mutate their inputs, see get_rerun_checks) and rewrite the results.
+        Changed inputs are read again, as are the mutated inputs of re-run checks (undo previous mutations). Returns
+        the checks that were run again."""
+        assert self.sheets, "call run_once() before rerun()"
+        rerun_checks = self.get_rerun_checks(affected_checks=set(checks))
+        reset_inputs = set(changed_inputs or [])
+        for check in rerun_checks:
+            reset_inputs.update(check.value.mutates)
+        for check_input in reset_inputs:
+            self.checker.reset_input(check_input=check_input)
+        self._run_checks(checks=rerun_checks)
+        if self.write_results:
+            self._write_results()
+        return rerun_checks
+
+    def _get_changed_contents(self, check_inputs: List[CheckInputChoices]) -> List[CheckInputChoices]:
+        """Inputs (of check_inputs, whose files changed) whose content changed too. An input that is not mutated by
+        a check is read again and compared on fingerprint, other inputs count as changed."""
+        mutated_inputs = set(check_input for check in self.checks for check_input in check.value.mutates)
+        changed_inputs = []
+        for check_input in check_inputs:
+            old_fingerprint = None
+            if check_input not in mutated_inputs:
+                old_fingerprint = self.checker.get_input_fingerprint(check_input=check_input)
+            if old_fingerprint is None:
+                changed_inputs.append(check_input)
+                continue
+            self.checker.reset_input(check_input=check_input)
+            if self.checker.get_input_fingerprint(check_input=check_input) != old_fingerprint:
+                changed_inputs.append(check_input)
+            else:
+                logger.info(f"file(s) of input {check_input.value} changed, but its content did not")
+        return changed_inputs
+
+    def poll(self) -> List[CheckChoices]:
+        """Re-run the checks that are affected by changed input files (if any) and rewrite the results. Returns
+        the checks that were run again."""
+        assert self._fingerprints, "call run_once() before poll()"
+        input_hashes = self._get_input_hashes()
+        changed_inputs = [
+            check_input
+            for check_input in self.check_inputs
+            if input_hashes[check_input] != self._input_hashes[check_input]
+        ]
+        if not changed_inputs:
+            return []
+        start = time.perf_counter()
+        changed_inputs = self._get_changed_contents(check_inputs=changed_inputs)
+        # an input with a changed file, but with the same content, keeps its hash in the check fingerprints
+        content_hashes = {
+            check_input: input_hashes[check_input] if check_input in changed_inputs else self._input_hashes[check_input]
+            for check_input in self.check_inputs
+        }
+        fingerprints = CheckResultCache.get_fingerprints(
+            checker=self.checker, dependencies=self.dependencies, input_hashes=content_hashes
+        )
+        affected_checks = set(check for check in self.checks if fingerprints[check] != self._fingerprints[check])
+        rerun_checks = self.rerun(checks=affected_checks, changed_inputs=changed_inputs)
+        self._input_hashes = input_hashes
+        self._fingerprints = fingerprints
+        logger.info(
+            f"changed inputs {[check_input.value for check_input in changed_inputs]}: re-ran "
+            f"{[check.name for check in rerun_checks]} in {round(time.perf_counter() - start, 3)}s"
+        )
+        return rerun_checks
+
+    def get_sheets(self) -> List[ExcelSheet]:
+        return [sheet for check in self.checks for sheet in self.sheets[check]]
+
+    def watch(self, max_polls: int = None) -> None:
+        """Run all checks once, then poll every interval_s until ctrl+c (or until max_polls)."""
+        self.run_once()
+        logger.info(f"watching {len(self.check_inputs)} inputs every {self.interval_s}s (stop with ctrl+c)")
+        nr_polls = 0
+        try:
+            while max_polls is None or nr_polls < max_polls:
+                time.sleep(self.interval_s)
+                self.poll()
+                nr_polls += 1
+        except KeyboardInterrupt:
+            logger.info("stopped watching")
@@ -16,6 +16,7 @@ install_requires = [
     "lxml",
     "openpyxl",
     "xlrd",
+    "xlsxwriter",
     "pathlib",
     "typing",
 ]